@@ -0,0 +1,121 @@
+# benchmarks/bench_runlist.py
+# Micro-benchmark cho đường nóng giải mã runlist / duyệt attribute của fs/ntfs.
+#   python benchmarks/bench_runlist.py            (bản Python + C nếu đã build)
+#   python -m pyrecover.fs.ntfs.runlist build     (build bản C trước)
+from __future__ import annotations
+import os, random, struct, sys, timeit
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from pyrecover.fs.ntfs import runlist
+from pyrecover.fs.ntfs.mft import _iter_attrs, DataRun
+
+
+def encode_runs(runs: List[Tuple[int, int]]) -> bytes:
+    out = bytearray()
+    prev = 0
+    for lcn, length in runs:
+        lb = length.to_bytes((length.bit_length() + 8) // 8, 'little')
+        d = lcn - prev
+        n = 1
+        while not -(1 << (8 * n - 1)) <= d < (1 << (8 * n - 1)):
+            n += 1
+        out.append(len(lb) | (n << 4))
+        out += lb + d.to_bytes(n, 'little', signed=True)
+        prev = lcn
+    out.append(0)
+    return bytes(out)
+
+
+def fragmented(n: int, seed: int = 1) -> bytes:
+    rnd = random.Random(seed)
+    runs, lcn = [], 1 << 20
+    for _ in range(n):
+        lcn = max(1, lcn + rnd.randint(-1 << 24, 1 << 24))
+        runs.append((lcn, rnd.randint(1, 4096)))
+    return encode_runs(runs)
+
+
+def legacy_decode(mp: bytes):
+    # thuật toán trước khi tối ưu: cắt bytes cho từng trường, trả list DataRun
+    runs = []
+    i = 0
+    lcn = 0
+    while i < len(mp):
+        header = mp[i]
+        i += 1
+        if header == 0:
+            break
+        size_len = header & 0x0F
+        off_len = (header >> 4) & 0x0F
+        if size_len == 0:
+            break
+        run_len = int.from_bytes(mp[i:i + size_len], 'little', signed=False)
+        i += size_len
+        run_off_bytes = mp[i:i + off_len]
+        i += off_len
+        if off_len:
+            sign = 1 << (8 * off_len - 1)
+            val = int.from_bytes(run_off_bytes, 'little', signed=False)
+            if val & sign:
+                val -= 1 << (8 * off_len)
+            lcn += val
+        runs.append(DataRun(lcn=lcn, length=run_len))
+    return runs
+
+
+def legacy_iter_attrs(buf: bytes, o: int):
+    while o + 8 <= len(buf):
+        atype = struct.unpack_from('<I', buf, o)[0]
+        if atype == 0xFFFFFFFF:
+            break
+        alen = struct.unpack_from('<I', buf, o + 4)[0]
+        if alen == 0 or o + alen > len(buf):
+            break
+        yield atype, buf[o:o + alen]
+        o += alen
+
+
+def attr_block(count: int = 8, size: int = 120) -> bytearray:
+    buf = bytearray()
+    for k in range(count):
+        a = bytearray(size)
+        struct.pack_into('<II', a, 0, 0x10 * (k + 1), size)
+        buf += a
+    buf += struct.pack('<I', 0xFFFFFFFF) + bytes(4)
+    return buf
+
+
+def bench(label: str, fn, number: int) -> float:
+    t = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:<28} {t * 1e6:10.2f} µs")
+    return t
+
+
+def main() -> None:
+    print(f"C accelerator: {'yes' if runlist.has_accel() else 'no (python -m pyrecover.fs.ntfs.runlist build)'}")
+    for n in (1, 8, 100, 1000, 5000):
+        mp = fragmented(n)
+        number = max(10, 20000 // n)
+        print(f"runlist {n} runs ({len(mp)} B)")
+        base = bench('legacy (bytes slices)', lambda: legacy_decode(mp), number)
+        py = bench('decode_runs_py', lambda: runlist.decode_runs_py(mp), number)
+        mv = memoryview(bytearray(mp))
+        bench('decode_runs (memoryview)', lambda: runlist.decode_runs(mv), number)
+        if runlist.has_accel():
+            c = bench('decode_runs_c', lambda: runlist.decode_runs_c(mp), number)
+            print(f"  speedup py x{base / py:.2f}  c x{base / c:.2f}")
+        else:
+            print(f"  speedup py x{base / py:.2f}")
+    buf = attr_block()
+    print("attribute walk (8 attrs / record)")
+    base = bench('legacy (bytes slices)', lambda: [a for a in legacy_iter_attrs(buf, 0)], 20000)
+    new = bench('_iter_attrs (memoryview)', lambda: [a for a in _iter_attrs(buf, 0)], 20000)
+    print(f"  speedup x{base / new:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+# benchmarks/bench_scan.py
+# Benchmark end-to-end trên image tổng hợp (xem synth_ntfs.py): khởi động CLI, quét MFT,
+# dựng path, export và carve. So với baseline đã lưu và trả exit code 1 nếu chậm hơn ngưỡng.
+#   python benchmarks/bench_scan.py --save-baseline          (lần đầu / sau khi tối ưu có chủ đích)
+#   python benchmarks/bench_scan.py                          (so với benchmarks/baseline.json)
+#   python benchmarks/bench_scan.py --records 200000 --fragments 8 --threshold 0.1
+# Baseline phụ thuộc máy: tạo lại trên máy chạy benchmark, không dùng chung giữa các máy.
+from __future__ import annotations
+import argparse, json, os, platform, subprocess, sys, tempfile, time
+from dataclasses import asdict
+from typing import Callable, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+for p in (ROOT, HERE):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from synth_ntfs import SynthConfig, SynthManifest, generate
+from pyrecover.core.device import open_device
+from pyrecover.fs.ntfs.boot import parse_boot_sector
+from pyrecover.fs.ntfs.mft import iter_mft_records
+from pyrecover.scan.metadata_scan import scan_deleted
+from pyrecover.scan.paths import PathBuilder
+from pyrecover.recover.export import export_record
+from pyrecover.carve.scanner import carve_scan
+
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+EXPORT_SAMPLE = 16
+# `python -m pyrecover.cli --help` được chậm hơn `python -c pass` tối đa bấy nhiêu ms
+STARTUP_BUDGET_MS = 150.0
+# module chỉ được import khi lệnh cần tới (xem đầu pyrecover/cli.py)
+LAZY_MODULES = ('pyrecover.scan.', 'pyrecover.recover.', 'pyrecover.fs.', 'pyrecover.carve.',
+                'pyrecover.service', 'pyrecover.core.device_windows')
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _python(*argv: str) -> str:
+    return subprocess.run([sys.executable, *argv], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+
+def run_cases(image: str, man: SynthManifest, workdir: str, repeat: int, only: List[str] | None,
+              startup_budget: float = STARTUP_BUDGET_MS) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+
+    def case(name: str, fn: Callable[[], object], units: int, unit: str) -> None:
+        if only and name not in only:
+            return
+        sec = _best(fn, repeat)
+        results[name] = {'seconds': round(sec, 6), unit + '_per_s': round(units / sec, 1) if sec else 0.0}
+        print(f"  {name:<8} {sec * 1e3:10.2f} ms   {units / sec:14,.0f} {unit}/s")
+
+    # startup: process mới chạy `--help`; import pyrecover.cli không được kéo theo module quét/xuất
+    if not only or 'startup' in only:
+        eager = [m for m in _python('-c', 'import sys, pyrecover.cli; print(*sys.modules)').split()
+                 if m.startswith(LAZY_MODULES)]
+        if eager:
+            raise CheckFailed(f"startup: importing pyrecover.cli loads {', '.join(sorted(eager))}")
+    case('startup', lambda: _python('-m', 'pyrecover.cli', '--help'), 1, 'runs')
+    if 'startup' in results:
+        bare = _best(lambda: _python('-c', 'pass'), repeat)
+        over = (results['startup']['seconds'] - bare) * 1e3
+        results['startup']['over_interpreter_ms'] = round(over, 1)
+        print(f"           {over:10.2f} ms over bare interpreter start (budget {startup_budget:.0f} ms)")
+        if over > startup_budget:
+            raise CheckFailed(f"startup: {over:.0f} ms over interpreter start, budget {startup_budget:.0f} ms")
+
+    # scan: đồng thời kiểm tra kết quả với ground truth
+    def scan() -> None:
+        found = scan_deleted(image)
+        if len(found) != man.deleted_files:
+            raise CheckFailed(f"scan: {len(found)} deleted files, expected {man.deleted_files}")
+    case('scan', scan, man.config['records'], 'records')
+
+    # score: scan kèm recoverability; file bị ghi đè phải 0%, file đã xóa khác 100%
+    overwritten = set(man.overwritten)
+
+    def score() -> None:
+        wrong = [e['record'] for e in scan_deleted(image, recoverability=True)
+                 if (e['recoverable'] == 0.0) != (e['record'] in overwritten)]
+        if wrong:
+            raise CheckFailed(f"score: {len(wrong)} wrong recoverability, first record {wrong[0]}")
+    case('score', score, man.config['records'], 'records')
+
+    # paths: tách khỏi scan — chỉ đo dựng path trên summary đã có
+    dev = open_device(image)
+    try:
+        boot = parse_boot_sector(dev.read(0, 512))
+        index = {rid: rec.summary() for rid, rec in iter_mft_records(dev, boot)}
+    finally:
+        dev.close()
+
+    def paths() -> None:
+        pb = PathBuilder(index)
+        for rid in index:
+            pb.path(rid)
+    case('paths', paths, len(index), 'records')
+
+    sample = man.nonresident[-EXPORT_SAMPLE:]
+    out = os.path.join(workdir, 'export.bin')
+
+    def export() -> None:
+        for rid in sample:
+            export_record(image, rid, out)
+    case('export', export, len(sample), 'files')
+
+    def carve() -> None:
+        hits = {(h['offset'], h['kind']) for h in carve_scan(image)}
+        missing = [c for c in man.carve if tuple(c) not in hits]
+        if missing:
+            raise CheckFailed(f"carve: {len(missing)} targets not found, first {missing[0]}")
+    case('carve', carve, man.size // (1 << 20), 'MiB')
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        ratio = r['seconds'] / base['seconds'] if base['seconds'] else 1.0
+        mark = 'REGRESSION' if ratio > 1 + threshold else ('faster' if ratio < 1 - threshold else 'ok')
+        print(f"  {name:<8} {base['seconds'] * 1e3:10.2f} ms -> {r['seconds'] * 1e3:10.2f} ms  x{ratio:.2f}  {mark}")
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    d = SynthConfig()
+    ap = argparse.ArgumentParser(description='Benchmark startup/scan/path/export/carve trên image tổng hợp')
+    ap.add_argument('--records', type=int, default=d.records)
+    ap.add_argument('--deleted', type=float, default=d.deleted_ratio)
+    ap.add_argument('--resident', type=float, default=d.resident_ratio)
+    ap.add_argument('--fragments', type=int, default=d.max_fragments)
+    ap.add_argument('--carve', type=int, default=d.carve_targets)
+    ap.add_argument('--seed', type=int, default=d.seed)
+    ap.add_argument('--repeat', type=int, default=3, help='lấy thời gian tốt nhất trong N lần')
+    ap.add_argument('--only', nargs='*', choices=('startup', 'scan', 'score', 'paths', 'export', 'carve'))
+    ap.add_argument('--workdir', default=None, help='thư mục chứa image (mặc định: thư mục tạm)')
+    ap.add_argument('--baseline', default=DEFAULT_BASELINE)
+    ap.add_argument('--save-baseline', action='store_true')
+    ap.add_argument('--threshold', type=float, default=0.2, help='chậm hơn baseline quá tỉ lệ này = regression')
+    ap.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET_MS, metavar='MS',
+                    help='thời gian khởi động CLI tối đa (tính trên thời gian khởi động interpreter)')
+    ap.add_argument('--json', default=None, help='ghi kết quả ra file JSON')
+    args = ap.parse_args()
+
+    cfg = SynthConfig(records=args.records, deleted_ratio=args.deleted, resident_ratio=args.resident,
+                      max_fragments=args.fragments, carve_targets=args.carve, seed=args.seed)
+    with tempfile.TemporaryDirectory(dir=args.workdir) as tmp:
+        image = os.path.join(tmp, 'synth.img')
+        t0 = time.perf_counter()
+        man = generate(image, cfg)
+        print(f"image: {man.size / 1e6:.1f} MB, {cfg.records} records, "
+              f"{man.deleted_files} deleted, generated in {time.perf_counter() - t0:.1f}s")
+        try:
+            results = run_cases(image, man, tmp, args.repeat, args.only, args.startup_budget)
+        except CheckFailed as e:
+            print(f"FAILED: {e}")
+            return 2
+
+    report = {'config': asdict(cfg), 'python': platform.python_version(),
+              'machine': platform.machine(), 'results': results}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline} (run with --save-baseline)")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('config') != report['config']:
+        print("baseline was recorded with a different image config; not comparing")
+        return 0
+    print(f"vs baseline (threshold {args.threshold:.0%}):")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"regressions: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
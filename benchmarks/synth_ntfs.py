@@ -0,0 +1,335 @@
+# benchmarks/synth_ntfs.py
+# Sinh image "giống NTFS" đủ cho các parser của pyrecover (boot sector, $MFT liên tục,
+# record FILE có fixup, $SI/$FN/$DATA resident + non-resident phân mảnh) cùng với
+# header file (jpg/png/zip/mp4) rải trong vùng trống để đo carve, và $Bitmap (record 6) khớp
+# với cluster của file đang dùng — một phần file đã xóa có cluster bị file mới dùng lại.
+#   python benchmarks/synth_ntfs.py out.img --records 20000 --deleted 0.3 --fragments 4
+# Không phải NTFS hợp lệ cho Windows/ntfs-3g: không có $LogFile, index thư mục...
+from __future__ import annotations
+import argparse, json, random, struct
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+
+SECTOR = 512
+REC = 1024
+ROOT = 5
+FIRST_USER_RECORD = 16
+BITMAP_RECORD = 6
+FT_BASE = 133_000_000_000_000_000  # FILETIME ~ 2022
+
+CARVE_HEADERS = {
+    'jpg': b'\xFF\xD8\xFF\xE0\x00\x10JFIF\x00',
+    'png': b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR',
+    'zip': b'PK\x03\x04\x14\x00\x00\x00\x08\x00',
+    'mp4': b'\x00\x00\x00\x18ftypisom\x00\x00\x02\x00',
+}
+
+
+@dataclass
+class SynthConfig:
+    records: int = 10_000
+    deleted_ratio: float = 0.3      # tỉ lệ file (không tính thư mục) bị xóa
+    dir_ratio: float = 0.05         # tỉ lệ record là thư mục
+    resident_ratio: float = 0.5     # tỉ lệ file có $DATA resident
+    max_fragments: int = 3          # số run tối đa / file non-resident (1 = không phân mảnh)
+    max_run_clusters: int = 3
+    ads_ratio: float = 0.02         # tỉ lệ file có thêm alternate data stream
+    carve_targets: int = 64         # số header file rải trong vùng trống
+    overwrite_ratio: float = 0.1    # tỉ lệ file non-resident đang dùng chiếm lại cluster của một file đã xóa
+    cluster_size: int = 4096
+    seed: int = 1
+
+
+@dataclass
+class SynthManifest:
+    """Ground truth của image đã sinh — để benchmark kiểm tra kết quả chứ không chỉ đo giờ."""
+    config: Dict
+    size: int
+    mft_lcn: int
+    deleted_files: int = 0
+    live_files: int = 0
+    dirs: int = 0
+    nonresident: List[int] = field(default_factory=list)   # record có $DATA non-resident
+    carve: List[Tuple[int, str]] = field(default_factory=list)
+    overwritten: List[int] = field(default_factory=list)  # record đã xóa có cluster bị dùng lại
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(self), f)
+
+
+# ---- mã hóa cấu trúc on-disk ------------------------------------------------
+
+def boot_sector(total_sectors: int, mft_lcn: int, cluster_size: int, serial: int) -> bytes:
+    bs = bytearray(SECTOR)
+    bs[0:3] = b'\xebR\x90'
+    bs[3:11] = b'NTFS    '
+    struct.pack_into('<H', bs, 11, SECTOR)
+    bs[13] = cluster_size // SECTOR
+    struct.pack_into('<Q', bs, 40, total_sectors)
+    struct.pack_into('<Q', bs, 48, mft_lcn)
+    struct.pack_into('<Q', bs, 56, mft_lcn + 1)
+    struct.pack_into('<b', bs, 64, -10)   # record 1024 byte
+    struct.pack_into('<b', bs, 68, 1)     # index buffer 1 cluster
+    struct.pack_into('<Q', bs, 72, serial)
+    bs[510:512] = b'\x55\xaa'
+    return bytes(bs)
+
+
+def resident(atype: int, value: bytes, name: str = '', aid: int = 0) -> bytes:
+    nm = name.encode('utf-16le')
+    name_ofs = 24
+    value_ofs = (name_ofs + len(nm) + 7) & ~7
+    alen = (value_ofs + len(value) + 7) & ~7
+    a = bytearray(alen)
+    struct.pack_into('<IIBBHHH', a, 0, atype, alen, 0, len(name), name_ofs, 0, aid)
+    struct.pack_into('<IH', a, 16, len(value), value_ofs)
+    a[name_ofs:name_ofs + len(nm)] = nm
+    a[value_ofs:value_ofs + len(value)] = value
+    return bytes(a)
+
+
+def mapping_pairs(runs: List[Tuple[Optional[int], int]]) -> bytes:
+    """runs: [(lcn hoặc None cho sparse, số cluster)]."""
+    out = bytearray()
+    prev = 0
+    for lcn, length in runs:
+        lb = length.to_bytes((length.bit_length() + 8) // 8, 'little')
+        if lcn is None:
+            out.append(len(lb))
+            out += lb
+            continue
+        d = lcn - prev
+        n = 1
+        while not -(1 << (8 * n - 1)) <= d < (1 << (8 * n - 1)):
+            n += 1
+        out.append(len(lb) | (n << 4))
+        out += lb + d.to_bytes(n, 'little', signed=True)
+        prev = lcn
+    out.append(0)
+    return bytes(out)
+
+
+def nonresident(atype: int, runs, size: int, cluster_size: int, name: str = '', aid: int = 0) -> bytes:
+    nm = name.encode('utf-16le')
+    name_ofs = 64
+    mp = mapping_pairs(runs)
+    mp_ofs = (name_ofs + len(nm) + 7) & ~7
+    alen = (mp_ofs + len(mp) + 7) & ~7
+    a = bytearray(alen)
+    clusters = sum(length for _, length in runs)
+    struct.pack_into('<IIBBHHH', a, 0, atype, alen, 1, len(name), name_ofs, 0, aid)
+    struct.pack_into('<QQH', a, 16, 0, clusters - 1, mp_ofs)
+    struct.pack_into('<QQQ', a, 40, clusters * cluster_size, size, size)
+    a[name_ofs:name_ofs + len(nm)] = nm
+    a[mp_ofs:mp_ofs + len(mp)] = mp
+    return bytes(a)
+
+
+def si_value(t: int) -> bytes:
+    return struct.pack('<QQQQI', t, t + 10, t + 20, t + 30, 0x20) + bytes(12)
+
+
+def fn_value(parent: int, name: str, ns: int = 1, t: int = 0, size: int = 0, alloc: int = 0,
+             flags: int = 0x20, parent_seq: int = 1) -> bytes:
+    nm = name.encode('utf-16le')
+    v = struct.pack('<QQQQQQQII', parent | (parent_seq << 48), t, t, t, t, alloc, size, flags, 0)
+    return v + bytes([len(name), ns]) + nm
+
+
+def file_record(num: int, attrs: List[bytes], in_use: bool = True, is_dir: bool = False,
+                seq: int = 1, lsn: int = 0) -> bytes:
+    r = bytearray(REC)
+    r[0:4] = b'FILE'
+    nus = REC // SECTOR + 1
+    struct.pack_into('<HHQHHHHII', r, 4, 48, nus, lsn, seq, 1, 56,
+                     (1 if in_use else 0) | (2 if is_dir else 0), 0, REC)
+    struct.pack_into('<I', r, 44, num)
+    o = 56
+    if o + sum(map(len, attrs)) + 8 > REC:
+        raise ValueError(f"record {num}: attributes do not fit in {REC} bytes")
+    for a in attrs:
+        r[o:o + len(a)] = a
+        o += len(a)
+    struct.pack_into('<I', r, o, 0xFFFFFFFF)
+    struct.pack_into('<I', r, 24, o + 8)
+    # update sequence array: cuối mỗi sector thay bằng USN, bản gốc lưu trong mảng
+    usn = 1 + (num & 0x7F)
+    struct.pack_into('<H', r, 48, usn)
+    for i in range(REC // SECTOR):
+        end = (i + 1) * SECTOR - 2
+        r[50 + 2 * i:52 + 2 * i] = r[end:end + 2]
+        struct.pack_into('<H', r, end, usn)
+    return bytes(r)
+
+
+# ---- bố cục image ------------------------------------------------------------
+
+class _Allocator:
+    """Cấp cluster tuần tự trong vùng dữ liệu; phân mảnh = chừa khe trống giữa các run."""
+
+    def __init__(self, first_lcn: int, rnd: random.Random) -> None:
+        self.first = first_lcn
+        self.next = first_lcn
+        self.rnd = rnd
+        self.gaps: List[int] = []   # LCN đầu các khe trống (chỗ đặt header carve)
+
+    def runs(self, fragments: int, max_run: int) -> List[Tuple[int, int]]:
+        out = []
+        for k in range(fragments):
+            length = self.rnd.randint(1, max_run)
+            out.append((self.next, length))
+            self.next += length
+            if fragments > 1 and k < fragments - 1:
+                gap = self.rnd.randint(1, 4)
+                self.gaps.append(self.next)
+                self.next += gap
+        if len(out) > 2 and self.rnd.random() < 0.5:
+            # đảo thứ tự vài run để có delta LCN âm như trên đĩa thật
+            out[1], out[-1] = out[-1], out[1]
+        return out
+
+
+def generate(path: str, cfg: SynthConfig | None = None) -> SynthManifest:
+    cfg = cfg or SynthConfig()
+    rnd = random.Random(cfg.seed)
+    cs = cfg.cluster_size
+    n = max(cfg.records, FIRST_USER_RECORD + 1)
+    mft_lcn = 4
+    mft_clusters = (n * REC + cs - 1) // cs
+    alloc = _Allocator(mft_lcn + mft_clusters + 16, rnd)
+
+    dirs = [ROOT]
+    records: List[bytes] = []
+    payload: List[Tuple[int, List[Tuple[int, int]]]] = []
+    live_runs: List[Tuple[int, int]] = []
+    freed: List[Tuple[int, List[Tuple[int, int]]]] = []   # file đã xóa chưa bị ghi đè
+    man = SynthManifest(config=asdict(cfg), size=0, mft_lcn=mft_lcn)
+
+    for i in range(n):
+        t = FT_BASE + i * 10_000_000
+        si = resident(0x10, si_value(t))
+        if i < FIRST_USER_RECORD:
+            name = '.' if i == ROOT else f'$Sys{i}'
+            records.append(file_record(i, [si, resident(0x30, fn_value(ROOT, name, ns=3, t=t))], is_dir=i == ROOT))
+            continue
+        parent = rnd.choice(dirs[-64:])  # ưu tiên thư mục gần đây → cây có độ sâu
+        if rnd.random() < cfg.dir_ratio:
+            dirs.append(i)
+            man.dirs += 1
+            fn = resident(0x30, fn_value(parent, f'dir{i}', ns=3, t=t, flags=0x10000000))
+            records.append(file_record(i, [si, fn], is_dir=True))
+            continue
+        deleted = rnd.random() < cfg.deleted_ratio
+        seq = rnd.randint(1, 40)
+        name = f'file_{i}.dat'
+        attrs = [si]
+        if rnd.random() < 0.5:
+            attrs.append(resident(0x30, fn_value(parent, f'FILE_{i % 1000:03d}~1.DAT', ns=2, t=t)))
+        if rnd.random() < cfg.resident_ratio:
+            body = bytes([i & 0xFF]) * rnd.randint(1, 400)  # vừa record 1024 byte cùng $FN + ADS
+            size = len(body)
+            data = resident(0x80, body)
+        else:
+            if not deleted and freed and rnd.random() < cfg.overwrite_ratio:
+                # file mới được cấp đúng các cluster của một file đã xóa trước đó
+                victim, runs = freed.pop(rnd.randrange(len(freed)))
+                man.overwritten.append(victim)
+            else:
+                runs = alloc.runs(rnd.randint(1, max(1, cfg.max_fragments)), cfg.max_run_clusters)
+                if deleted:
+                    freed.append((i, runs))
+            if not deleted:
+                live_runs.extend(runs)
+            clusters = sum(length for _, length in runs)
+            size = clusters * cs - rnd.randint(0, cs - 1)
+            data = nonresident(0x80, runs, size, cs)
+            payload.append((i, runs))
+            man.nonresident.append(i)
+        attrs.append(resident(0x30, fn_value(parent, name, ns=1, t=t, size=size, alloc=size)))
+        attrs.append(data)
+        if rnd.random() < cfg.ads_ratio:
+            attrs.append(resident(0x80, b'[ZoneTransfer]\r\nZoneId=3\r\n', name='Zone.Identifier'))
+        records.append(file_record(i, attrs, in_use=not deleted, seq=seq, lsn=rnd.randint(1, 1 << 40)))
+        if deleted:
+            man.deleted_files += 1
+        else:
+            man.live_files += 1
+
+    # header carve: nửa đầu vào khe giữa các run, phần còn lại ở vùng trống sau dữ liệu
+    kinds = sorted(CARVE_HEADERS)
+    slots = rnd.sample(alloc.gaps, min(len(alloc.gaps), cfg.carve_targets // 2))
+    tail = alloc.next + 8
+    while len(slots) < cfg.carve_targets:
+        slots.append(tail)
+        tail += rnd.randint(1, 8)
+    man.carve = sorted((lcn * cs, kinds[k % len(kinds)]) for k, lcn in enumerate(slots))
+    # $Bitmap (record 6) đặt sau vùng carve: 1 bit / cluster cho vùng hệ thống, file đang
+    # dùng và chính nó
+    bm_lcn = tail
+    bm_clusters = 1
+    while True:
+        total_clusters = bm_lcn + bm_clusters + 16
+        bm_bytes = (total_clusters + 7) // 8
+        need = (bm_bytes + cs - 1) // cs
+        if need <= bm_clusters:
+            break
+        bm_clusters = need
+    bitmap = bytearray(bm_bytes)
+    for lcn, length in [(0, alloc.first), (bm_lcn, bm_clusters)] + live_runs:
+        for c in range(lcn, lcn + length):
+            bitmap[c >> 3] |= 1 << (c & 7)
+    t = FT_BASE + BITMAP_RECORD * 10_000_000
+    records[BITMAP_RECORD] = file_record(BITMAP_RECORD, [
+        resident(0x10, si_value(t)), resident(0x30, fn_value(ROOT, '$Bitmap', ns=3, t=t)),
+        nonresident(0x80, [(bm_lcn, bm_clusters)], bm_bytes, cs)])
+    man.size = total_clusters * cs
+
+    with open(path, 'wb') as f:
+        f.truncate(man.size)
+        f.write(boot_sector(total_clusters * (cs // SECTOR), mft_lcn, cs, rnd.getrandbits(64)))
+        f.seek(mft_lcn * cs)
+        f.write(b''.join(records))
+        # nội dung file: khối giả ngẫu nhiên (không trùng chữ ký carve) lặp lại, ghi thật
+        # chứ không để sparse — đọc vùng sparse nhanh bất thường, sai lệch số đo export
+        noise = bytearray(rnd.getrandbits(8) & 0x7F | 0x01 for _ in range(cs))
+        noise[::SECTOR] = b'\x01' * (cs // SECTOR)   # đầu sector không bao giờ khớp chữ ký
+        noise = bytes(noise)
+        for _, runs in payload:
+            for lcn, length in runs:
+                f.seek(lcn * cs)
+                f.write(noise * length)
+        for off, kind in man.carve:
+            f.seek(off)
+            f.write(CARVE_HEADERS[kind])
+        f.seek(bm_lcn * cs)
+        f.write(bitmap)
+    return man
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Sinh image NTFS tổng hợp cho benchmark')
+    ap.add_argument('out')
+    d = SynthConfig()
+    ap.add_argument('--records', type=int, default=d.records)
+    ap.add_argument('--deleted', type=float, default=d.deleted_ratio)
+    ap.add_argument('--dirs', type=float, default=d.dir_ratio)
+    ap.add_argument('--resident', type=float, default=d.resident_ratio)
+    ap.add_argument('--fragments', type=int, default=d.max_fragments)
+    ap.add_argument('--carve', type=int, default=d.carve_targets)
+    ap.add_argument('--overwrite', type=float, default=d.overwrite_ratio)
+    ap.add_argument('--seed', type=int, default=d.seed)
+    ap.add_argument('--manifest', default=None, help='ghi ground truth JSON')
+    args = ap.parse_args()
+    cfg = SynthConfig(records=args.records, deleted_ratio=args.deleted, dir_ratio=args.dirs,
+                      resident_ratio=args.resident, max_fragments=args.fragments,
+                      carve_targets=args.carve, overwrite_ratio=args.overwrite, seed=args.seed)
+    man = generate(args.out, cfg)
+    if args.manifest:
+        man.save(args.manifest)
+    print(f"{args.out}: {man.size / 1e6:.1f} MB, {man.live_files} live / {man.deleted_files} deleted files, "
+          f"{man.dirs} dirs, {len(man.carve)} carve targets, {len(man.overwritten)} overwritten")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from ..core.device import open_device
+from ..core.stats import ScanStats, instrument
+from ..fs.ntfs.boot import parse_boot_sector
+from ..scan.checkpoint import ScanCheckpoint, default_checkpoint_path, device_key
+from .signatures import MAGIC
+
+CHUNK = 8 * 1024 * 1024
+
+
+def _patterns() -> List[Tuple[str, bytes, int, bytes]]:
+    """(kind, pattern cần tìm, độ lệch của pattern so với đầu file, prefix phải khớp)."""
+    out = []
+    for kind, sigs in MAGIC.items():
+        if kind == 'mp4':
+            # box đầu tiên: size (4 byte, byte cao = 0) rồi "ftyp" — tìm "ftyp" rồi lùi 4
+            out.append((kind, sigs[1], 4, sigs[0]))
+        else:
+            out.append((kind, sigs[0], 0, b''))
+    return out
+
+
+def scan_signatures(dev, start: int = 0, end: int | None = None, align: int = 512,
+                    chunk: int = CHUNK, progress: Callable[[int], None] | None = None) -> Iterator[Tuple[int, str]]:
+    """Tìm header file theo MAGIC trong [start, end) của device, trả (offset, kind) theo offset tăng dần.
+    align: chỉ nhận header bắt đầu ở bội số của align (file trên NTFS bắt đầu ở đầu cluster,
+    nên 512 loại bớt trùng khớp ngẫu nhiên); align=1 để nhận mọi vị trí.
+    progress(pos): gọi sau mỗi chunk — mọi header trước pos đã được yield."""
+    if end is None:
+        end = dev.size
+    pats = _patterns()
+    # đọc chồng lên nhau một đoạn để không sót header nằm vắt qua ranh giới chunk
+    overlap = max(len(p) + shift for _, p, shift, _ in pats)
+    pos = start
+    while pos < end:
+        n = min(chunk, end - pos)
+        buf = dev.read(pos, min(n + overlap, end - pos))
+        hits = []
+        for kind, pat, shift, prefix in pats:
+            i = buf.find(pat, shift)
+            while i != -1:
+                h = i - shift
+                if h < n and (pos + h) % align == 0 and buf.startswith(prefix, h):
+                    hits.append((pos + h, kind))
+                i = buf.find(pat, i + 1)
+        hits.sort()
+        yield from hits
+        pos += n
+        if progress is not None:
+            progress(pos)
+
+
+def carve_scan(image_path: str, start: int = 0, end: int | None = None, align: int = 512,
+               stats: ScanStats | None = None, checkpoint: str | None = None,
+               resume: bool = False) -> List[Dict[str, Any]]:
+    """Quét chữ ký trên image/ổ đĩa. end=None: tới cuối device (hoặc cuối volume NTFS
+    theo boot sector nếu device không biết kích thước).
+    checkpoint/resume: như scan_deleted — ghi định kỳ offset đã quét tới và các header tìm
+    được, resume=True chạy tiếp từ đó."""
+    dev = instrument(open_device(image_path), stats)
+    try:
+        if end is None:
+            end = getattr(dev, 'size', None)
+            if end is None:
+                boot = parse_boot_sector(dev.read(0, 512))
+                end = boot.total_sectors * boot.bytes_per_sector
+        if checkpoint is not None or resume:
+            out = _carve_checkpointed(dev, start, end, align, checkpoint, resume)
+        else:
+            out = []
+            for off, kind in scan_signatures(dev, start, end, align):
+                out.append({'offset': off, 'kind': kind})
+        if stats is not None:
+            stats.count('carve_hits', len(out))
+        return out
+    finally:
+        dev.close()
+
+
+def _carve_checkpointed(dev, start: int, end: int, align: int, path: str | None,
+                        resume: bool) -> List[Dict[str, Any]]:
+    vol = device_key(dev)
+    params = {'start': start, 'end': end, 'align': align}
+    if path is None:
+        path = default_checkpoint_path(vol, 'carve')
+    if resume:
+        ck = ScanCheckpoint.load(path, 'carve', vol, params)
+        if ck is None:
+            raise ValueError(f"No checkpoint to resume at {path} (missing, or made for another device/options)")
+    else:
+        ck = ScanCheckpoint.create(path, 'carve', vol, params, position=start)
+    try:
+        if not ck.done:
+            for off, kind in scan_signatures(dev, ck.position, end, align, progress=ck.progress):
+                ck.add({'offset': off, 'kind': kind})
+            ck.finish()
+        return list(ck.results())
+    finally:
+        ck.close()
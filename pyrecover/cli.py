@@ -1,31 +1,234 @@
 from __future__ import annotations
-import argparse, json
-from .scan.metadata_scan import scan_deleted
-from .recover.export import export_record
+import argparse, json, sys
+from .core.utils import parse_date_arg
+from .core.stats import ScanStats, profiled
+from .core.device import configure_io
+from .core.images import CODECS, DEFAULT_CHUNK
+from .core.constants import SORT_KEYS, HASH_ALGOS
+
+# Module quét / xuất chỉ được import trong nhánh của lệnh dùng chúng (_run): `--help` và các
+# lệnh khác không phải trả giá import mft/index/checkpoint/pywin32 (xem case 'startup' của
+# benchmarks/bench_scan.py).
+
+
+def _parse_size(s: str) -> int:
+    mult = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    s = s.strip().upper().rstrip('B')
+    if s and s[-1] in mult:
+        return int(float(s[:-1]) * mult[s[-1]])
+    return int(s)
+
+
+def _scan_records(path: str, offset: int = 0) -> list:
+    """Record MFT trong kết quả scan-mft (mảng JSON) hoặc batch-scan (JSON lines, chỉ lấy
+    volume ở `offset`); bỏ entry từ slack $I30 và dòng event."""
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        text = f.read()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    try:
+        items = json.loads(text)
+    except ValueError:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    # entry từ slack $I30 (có 'dir_record') trỏ tới record đã bị file khác dùng lại
+    return [e['record'] for e in items
+            if 'event' not in e and 'dir_record' not in e and e.get('record', -1) >= 0
+            and e.get('volume_offset', offset) == offset]
 
 
 def main():
     ap = argparse.ArgumentParser(prog='pyrecover')
     sub = ap.add_subparsers(dest='cmd', required=True)
 
-    s1 = sub.add_parser('scan-mft', help='Quét MFT và liệt kê file đã xóa')
+    # tùy chọn đo đạc dùng chung cho mọi lệnh
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--stats', action='store_true', help='in số liệu đọc/parse dạng JSON ra stderr khi xong')
+    common.add_argument('--profile', default=None, metavar='FILE', help='profile lệnh và ghi kết quả vào FILE')
+    common.add_argument('--profiler', choices=('cprofile', 'pyinstrument'), default='cprofile')
+    # chế độ đọc device, dùng cho mọi lệnh có đọc đĩa
+    io_opts = argparse.ArgumentParser(add_help=False)
+    io_opts.add_argument('--direct', action='store_true',
+                         help='đọc không qua cache của OS (O_DIRECT / FILE_FLAG_NO_BUFFERING)')
+    io_opts.add_argument('--read-size', type=_parse_size, default=None, metavar='N[K|M]',
+                         help='kích thước mỗi lần đọc (mặc định 64K, 1M khi --direct; làm tròn lên bội 4K khi --direct)')
+    io_opts.add_argument('--strict-reads', action='store_true',
+                         help='dừng ở lỗi đọc đầu tiên thay vì đọc sector hỏng ra 0 rồi đọc tiếp')
+    io_opts.add_argument('--bad-map', default=None, metavar='FILE',
+                         help='đọc/ghi bản đồ sector hỏng (JSON) để lần chạy sau không đọc lại các vùng đó')
+    # quét dài (scan-mft, carve): ghi checkpoint định kỳ để chạy tiếp được nếu bị ngắt
+    resumable = argparse.ArgumentParser(add_help=False)
+    resumable.add_argument('--checkpoint', default=None, metavar='FILE',
+                           help='ghi checkpoint + kết quả từng phần vào FILE (và FILE.results) trong lúc quét')
+    resumable.add_argument('--resume', action='store_true',
+                           help='chạy tiếp từ checkpoint (mặc định: file checkpoint theo volume) với cùng tùy chọn')
+
+    s1 = sub.add_parser('scan-mft', help='Quét MFT và liệt kê file đã xóa', parents=[common, io_opts, resumable])
     s1.add_argument('--image', required=True)
-    s1.add_argument('--filter', default=None, help='lọc theo tên thư mục (đơn giản)')
+    s1.add_argument('--filter', '--path-prefix', dest='filter', default=None,
+                    help='chỉ file nằm dưới thư mục này, vd. "Users/an/Documents" (thêm "path" vào kết quả)')
     s1.add_argument('--name-contains', default=None)
+    s1.add_argument('--ext', nargs='+', default=(), metavar='EXT', help='đuôi file, vd. --ext jpg png')
+    s1.add_argument('--glob', default=None, help='tên theo glob, vd. "IMG_*.JPG" (không phân biệt hoa thường)')
+    s1.add_argument('--regex', default=None, help='tên khớp regex (re.search, không phân biệt hoa thường)')
+    s1.add_argument('--include-live', action='store_true', help='liệt kê cả file đang dùng (thêm "in_use")')
+    s1.add_argument('--min-size', type=int, default=None, help='bytes')
+    s1.add_argument('--max-size', type=int, default=None, help='bytes')
+    s1.add_argument('--modified-after', type=parse_date_arg, default=None, help='YYYY-MM-DD[THH:MM] (UTC)')
+    s1.add_argument('--modified-before', type=parse_date_arg, default=None, help='YYYY-MM-DD[THH:MM] (UTC)')
+    s1.add_argument('--sort', choices=SORT_KEYS, default=None)
+    s1.add_argument('--index-slack', action='store_true',
+                    help='quét thêm slack của index thư mục ($I30) để tìm file có record MFT đã bị tái sử dụng')
+    s1.add_argument('--recoverability', action='store_true',
+                    help="thêm 'recoverable': %% cluster của file chưa bị cấp lại (theo $Bitmap)")
+    s1.add_argument('--min-recoverable', type=float, default=None, metavar='PCT',
+                    help='chỉ liệt kê file có recoverable >= PCT (bật --recoverability)')
 
-    s2 = sub.add_parser('export', help='Xuất file theo record id')
+    s2 = sub.add_parser('export', help='Xuất file theo record id', parents=[common, io_opts])
     s2.add_argument('--image', required=True)
     s2.add_argument('--record', type=int, required=True)
     s2.add_argument('--out', required=True)
+    s2.add_argument('--offset', type=int, default=0, help='byte offset của volume trong image (xem batch-scan)')
+    s2.add_argument('--hash', choices=HASH_ALGOS, default=None, help='tính hash khi ghi, lưu vào OUT.<hash>')
+
+    s8 = sub.add_parser('export-store', help='Xuất nhiều record vào kho theo hash nội dung (bỏ bản trùng) + manifest',
+                        parents=[common, io_opts])
+    s8.add_argument('--image', required=True)
+    s8.add_argument('--records', type=int, nargs='*', default=[], metavar='ID')
+    s8.add_argument('--from-scan', default=None, metavar='FILE',
+                    help='lấy record từ kết quả scan-mft (JSON) hoặc batch-scan (JSON lines); "-" = stdin')
+    s8.add_argument('--out', required=True, help='thư mục kho (objects/ + manifest.jsonl)')
+    s8.add_argument('--hash', choices=HASH_ALGOS, default='sha256')
+    s8.add_argument('--workers', type=int, default=4, help='số record xuất song song')
+    s8.add_argument('--offset', type=int, default=0, help='byte offset của volume trong image (xem batch-scan)')
+
+    s3 = sub.add_parser('usn', help='Liệt kê file vừa bị xóa/đổi tên từ $UsnJrnl (không quét cả MFT)', parents=[common, io_opts])
+    s3.add_argument('--image', required=True)
+    g = s3.add_mutually_exclusive_group()
+    g.add_argument('--since', type=parse_date_arg, default=None, help='YYYY-MM-DD[THH:MM] (UTC)')
+    g.add_argument('--since-minutes', type=int, default=None)
+    s3.add_argument('--all-reasons', action='store_true', help='mọi event, không chỉ xóa/đổi tên')
+    s3.add_argument('--resolve', action='store_true', help='đọc các record MFT liên quan để xem còn khôi phục được không')
+
+    s4 = sub.add_parser('rescan', help='Quét lại MFT, chỉ parse record đã đổi so với snapshot lần trước', parents=[common, io_opts])
+    s4.add_argument('--image', required=True)
+    s4.add_argument('--snapshot', default=None, help='file snapshot (mặc định theo serial của volume)')
+
+    s5 = sub.add_parser('carve', help='Tìm header file (jpg/png/zip/mp4) theo chữ ký trên toàn bộ image', parents=[common, io_opts, resumable])
+    s5.add_argument('--image', required=True)
+    s5.add_argument('--start', type=int, default=0, help='byte offset bắt đầu')
+    s5.add_argument('--end', type=int, default=None, help='byte offset kết thúc (mặc định: cuối image)')
+    s5.add_argument('--align', type=int, default=512, help='chỉ nhận header ở bội số của align (1 = mọi vị trí)')
+
+    s7 = sub.add_parser('batch-scan', help='Quét song song nhiều image/ổ đĩa (mọi volume NTFS trong bảng MBR/GPT), in JSON lines', parents=[io_opts])
+    s7.add_argument('sources', nargs='+', help='file image, ổ "D:", /dev/sdb ...')
+    s7.add_argument('--workers', type=int, default=None, help='số đĩa quét song song tối đa')
+    s7.add_argument('--list', action='store_true', help='chỉ liệt kê volume NTFS tìm được')
+    s7.add_argument('--name-contains', default=None)
+    s7.add_argument('--min-size', type=int, default=None, help='bytes')
+    s7.add_argument('--max-size', type=int, default=None, help='bytes')
+    s7.add_argument('--modified-after', type=parse_date_arg, default=None, help='YYYY-MM-DD[THH:MM] (UTC)')
+    s7.add_argument('--modified-before', type=parse_date_arg, default=None, help='YYYY-MM-DD[THH:MM] (UTC)')
+    s7.add_argument('--index-slack', action='store_true')
+
+    s9 = sub.add_parser('compress-image', help='Nén image/ổ đĩa thành image nén theo chunk (.pzi), đọc trực tiếp được',
+                        parents=[common, io_opts])
+    s9.add_argument('--image', required=True, help='nguồn: file image, image chia nhỏ (.001), ổ đĩa')
+    s9.add_argument('--out', required=True)
+    s9.add_argument('--codec', choices=tuple(CODECS), default='zlib', help='zstd cần gói zstandard')
+    s9.add_argument('--chunk-size', type=_parse_size, default=DEFAULT_CHUNK, metavar='N[K|M]')
+    s9.add_argument('--level', type=int, default=None)
+    s9.add_argument('--workers', type=int, default=None, help='số thread nén (mặc định: số CPU)')
+
+    s6 = sub.add_parser('serve', help='Chạy service nền (JSON lines) giữ device/index MFT mở giữa các job', parents=[io_opts])
+    s6.add_argument('--listen', default='127.0.0.1:8765', help='HOST:PORT (chỉ loopback) hoặc unix:/path/to.sock')
+    s6.add_argument('--token-file', default=None, metavar='FILE',
+                    help='ghi token xác thực của lần chạy vào FILE (0600; mặc định theo --listen)')
+    s6.add_argument('--export-root', default=None, metavar='DIR',
+                    help='job export chỉ được ghi vào trong DIR (không đặt: không cho export)')
 
     args = ap.parse_args()
+    configure_io(args.direct, args.read_size, args.strict_reads, args.bad_map)
+    if args.cmd == 'batch-scan':
+        from .scan.batch import batch_scan, discover
+        if args.list:
+            for t in discover(args.sources):
+                print(json.dumps(t if isinstance(t, dict) else t.describe(), ensure_ascii=False), flush=True)
+            return
+        for item in batch_scan(args.sources, args.workers, args.name_contains, args.min_size, args.max_size,
+                               args.modified_after, args.modified_before, args.index_slack):
+            print(json.dumps(item, ensure_ascii=False), flush=True)
+        return
+    if args.cmd == 'serve':
+        import asyncio
+        from .service import serve
+        try:
+            asyncio.run(serve(args.listen, args.token_file, args.export_root))
+        except KeyboardInterrupt:
+            pass
+        return
+    stats = ScanStats() if args.stats else None
+    with profiled(args.profile, args.profiler):
+        _run(args, stats)
+    if stats is not None:
+        print(json.dumps(stats.snapshot(), indent=2), file=sys.stderr)
+
 
+def _run(args, stats) -> None:
     if args.cmd == 'scan-mft':
-        items = scan_deleted(args.image, args.filter, args.name_contains)
+        from .scan.metadata_scan import scan_deleted
+        items = scan_deleted(args.image, args.filter, args.name_contains,
+                             min_size=args.min_size, max_size=args.max_size,
+                             modified_after=args.modified_after, modified_before=args.modified_before,
+                             sort_by=args.sort, index_slack=args.index_slack, stats=stats,
+                             checkpoint=args.checkpoint, resume=args.resume,
+                             recoverability=args.recoverability, min_recoverable=args.min_recoverable,
+                             extensions=args.ext, name_glob=args.glob, name_regex=args.regex,
+                             include_live=args.include_live)
         print(json.dumps(items, ensure_ascii=False, indent=2))
     elif args.cmd == 'export':
-        export_record(args.image, args.record, args.out)
-        print(f"Exported record {args.record} -> {args.out}")
+        from .recover.export import export_record
+        digest = export_record(args.image, args.record, args.out, stats=stats, offset=args.offset, algo=args.hash)
+        print(f"Exported record {args.record} -> {args.out}" + (f" ({args.hash} {digest})" if digest else ''))
+    elif args.cmd == 'compress-image':
+        from .core.device import open_device
+        from .core.images import compress_image
+        from .core.stats import instrument
+        dev = instrument(open_device(args.image), stats)
+        try:
+            size = dev.size
+            n = compress_image(dev, args.out, args.codec, args.chunk_size, args.level, args.workers)
+        finally:
+            dev.close()
+        print(f"{args.image} ({size} bytes) -> {args.out} ({n} bytes, {n / size if size else 0:.1%})")
+    elif args.cmd == 'export-store':
+        from .recover.store import export_records
+        records = list(args.records)
+        if args.from_scan:
+            records += _scan_records(args.from_scan, args.offset)
+        summary = export_records(args.image, records, args.out, args.hash, args.workers, stats=stats,
+                                 offset=args.offset)
+        print(json.dumps(summary, indent=2))
+    elif args.cmd == 'usn':
+        from datetime import datetime, timezone, timedelta
+        from .core.utils import datetime_to_filetime
+        from .scan.journal_scan import recent_changes
+        since = args.since
+        if args.since_minutes is not None:
+            since = datetime_to_filetime(datetime.now(timezone.utc) - timedelta(minutes=args.since_minutes))
+        kw = {'reason_mask': 0} if args.all_reasons else {}
+        items = recent_changes(args.image, since=since, resolve=args.resolve, stats=stats, **kw)
+        print(json.dumps(items, ensure_ascii=False, indent=2))
+    elif args.cmd == 'rescan':
+        from .scan.incremental import incremental_rescan
+        delta = incremental_rescan(args.image, args.snapshot, stats=stats)
+        print(json.dumps(delta.as_dict(), ensure_ascii=False, indent=2))
+    elif args.cmd == 'carve':
+        from .carve.scanner import carve_scan
+        items = carve_scan(args.image, args.start, args.end, args.align, stats=stats,
+                           checkpoint=args.checkpoint, resume=args.resume)
+        print(json.dumps(items, ensure_ascii=False, indent=2))
 
 if __name__ == '__main__':
     main()
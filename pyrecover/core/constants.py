@@ -0,0 +1,6 @@
+"""Hằng số dùng chung giữa CLI và các module quét / xuất. Module này không import gì, để
+cli.py dựng argparse (choices=...) mà không phải import scan/recover (xem case 'startup'
+của benchmarks/bench_scan.py)."""
+
+SORT_KEYS = ('record', 'name', 'size', 'created', 'modified')   # scan_deleted(sort_by=...)
+HASH_ALGOS = ('sha256', 'blake2b')                              # export --hash, recover.store
@@ -1,15 +1,124 @@
 # pyrecover/core/device.py
 from __future__ import annotations
-import os
-from typing import BinaryIO
+import mmap, os, sys
+from typing import BinaryIO, Callable, Optional
+from .images import ChunkedImage, SplitImage, is_chunked_image, split_segments
+from .resilient import ResilientDevice
+
+# Căn lề cho I/O không qua cache: 4096 là bội của mọi bytes_per_sector NTFS gặp trong thực
+# tế (512, 512e, 4Kn) và của block size filesystem thường gặp khi mở file image với O_DIRECT.
+DIRECT_ALIGN = 4096
+DEFAULT_READ_SIZE = 64 * 1024           # buffered: page cache tự đọc trước
+DEFAULT_DIRECT_READ_SIZE = 1024 * 1024  # direct: mỗi read là một request xuống đĩa
+
+# cấu hình mặc định cho open_device (CLI --direct / --read-size / --strict-reads / --bad-map
+# đặt qua configure_io); thứ tự khóa = thứ tự tham số của configure_io
+_io_defaults = {'direct': False, 'read_size': None, 'strict': False, 'bad_map': None}
+
+
+def configure_io(direct: bool = False, read_size: Optional[int] = None, strict: bool = False,
+                 bad_map: Optional[str] = None) -> None:
+    _io_defaults['direct'] = direct
+    _io_defaults['read_size'] = read_size
+    _io_defaults['strict'] = strict
+    _io_defaults['bad_map'] = bad_map
+
+
+def io_options() -> dict:
+    return dict(_io_defaults)
+
+
+def aligned_size(n: int, align: int = DIRECT_ALIGN) -> int:
+    """Làm tròn lên bội của align (read size phải là bội số sector khi đọc direct)."""
+    return max(align, (n + align - 1) // align * align)
+
+
+class AlignedReader:
+    """Đọc (offset, size) bất kỳ qua một buffer căn lề dùng lại được: mở rộng ra các block
+    căn lề, đọc từng đoạn tối đa read_size vào buffer rồi cắt phần cần lấy.
+    read_into(memoryview, offset) -> số byte đọc được (ít hơn khi chạm cuối device)."""
+
+    def __init__(self, read_into: Callable[[memoryview, int], int], read_size: int,
+                 align: int = DIRECT_ALIGN) -> None:
+        self.align = align
+        self.read_size = aligned_size(read_size, align)
+        self._read_into = read_into
+        # mmap ẩn danh luôn căn theo page (>= 4096) — đúng yêu cầu bộ nhớ của O_DIRECT /
+        # FILE_FLAG_NO_BUFFERING; cấp một lần, dùng lại cho mọi lần đọc
+        self._buf = mmap.mmap(-1, self.read_size)
+        self._mv = memoryview(self._buf)
+
+    def read(self, offset: int, size: int) -> bytes:
+        a = self.align
+        pos = offset - offset % a
+        end = offset + size
+        parts = []
+        while pos < end:
+            n = min(self.read_size, aligned_size(end - pos, a))
+            got = self._read_into(self._mv[:n], pos)
+            lo = max(offset, pos) - pos
+            hi = min(end, pos + got) - pos
+            if hi > lo:
+                parts.append(self._mv[lo:hi].tobytes())
+            if got < n:
+                break
+            pos += n
+        data = parts[0] if len(parts) == 1 else b''.join(parts)
+        if len(data) != size:
+            raise IOError(f"Short read at off={offset} want={size} got={len(data)}")
+        return data
+
+    def close(self) -> None:
+        try:
+            self._mv.release()
+            self._buf.close()
+        except BufferError:
+            pass   # còn memoryview con đang sống: để GC giải phóng
 
 
 class BlockDevice:
-    def __init__(self, path: str, readonly: bool = True) -> None:
+    def __init__(self, path: str, readonly: bool = True, direct: bool = False,
+                 read_size: Optional[int] = None) -> None:
+        """direct=True: đọc không qua page cache (O_DIRECT trên Linux, F_NOCACHE trên macOS)
+        để quét/carve cả đĩa không đẩy dữ liệu của tiến trình khác ra khỏi cache. Nếu
+        filesystem không hỗ trợ O_DIRECT (tmpfs...) thì đọc thường và bỏ cache sau mỗi lần
+        đọc (posix_fadvise DONTNEED); self.direct cho biết chế độ thực sự."""
+        self.direct = False
+        self._reader: Optional[AlignedReader] = None
+        self._drop_cache = False
+        self._fd = -1
+        if direct:
+            self.read_size = aligned_size(read_size or DEFAULT_DIRECT_READ_SIZE)
+            self._open_direct(path, readonly)
+            self._size = os.lseek(self._fd, 0, os.SEEK_END)
+            return
+        self.read_size = read_size or DEFAULT_READ_SIZE
         mode = 'rb' if readonly else 'r+b'
         # buffering=0 để tránh bỏ qua seek/align; image file an toàn hơn raw device
         self._f: BinaryIO = open(path, mode, buffering=0)
-        self._size = os.path.getsize(path)
+        # getsize() trả 0 với block device (/dev/sdX): lấy kích thước bằng seek tới cuối
+        self._size = self._f.seek(0, os.SEEK_END)
+
+    def _open_direct(self, path: str, readonly: bool) -> None:
+        flags = os.O_RDONLY if readonly else os.O_RDWR
+        o_direct = getattr(os, 'O_DIRECT', 0)
+        if o_direct:
+            try:
+                self._fd = os.open(path, flags | o_direct)
+                self.direct = True
+            except OSError:
+                self._fd = -1
+        if self._fd < 0:
+            self._fd = os.open(path, flags)
+            if sys.platform == 'darwin':
+                import fcntl
+                fcntl.fcntl(self._fd, 48, 1)   # F_NOCACHE
+                self.direct = True
+            else:
+                self._drop_cache = hasattr(os, 'posix_fadvise')
+        if self.direct:
+            fd = self._fd
+            self._reader = AlignedReader(lambda mv, off: os.preadv(fd, [mv], off), self.read_size)
 
 
     @property
@@ -20,14 +129,61 @@ class BlockDevice:
     def read(self, offset: int, size: int) -> bytes:
         if offset < 0 or offset + size > self._size:
             raise ValueError(f"Read out of bounds: off={offset} size={size} total={self._size}")
-        self._f.seek(offset)
-        data = self._f.read(size)
+        if self._reader is not None:
+            return self._reader.read(offset, size)
+        if self._fd >= 0:
+            data = os.pread(self._fd, size, offset)
+            if self._drop_cache:
+                os.posix_fadvise(self._fd, offset, size, os.POSIX_FADV_DONTNEED)
+        else:
+            self._f.seek(offset)
+            data = self._f.read(size)
         if len(data) != size:
             raise IOError(f"Short read at off={offset} want={size} got={len(data)}")
         return data
 
     def close(self) -> None:
         try:
-            self._f.close()
+            if self._reader is not None:
+                self._reader.close()
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+            else:
+                self._f.close()
         except Exception:
-            pass
\ No newline at end of file
+            pass
+
+
+def _open_raw(path: str, readonly: bool, direct: bool, read_size: Optional[int]):
+    if sys.platform == 'win32':
+        from .device_windows import DeviceWindows
+        return DeviceWindows(path, readonly=readonly, direct=direct, read_size=read_size)
+    return BlockDevice(path, readonly=readonly, direct=direct, read_size=read_size)
+
+
+def open_device(path: str, readonly: bool = True, direct: Optional[bool] = None,
+                read_size: Optional[int] = None, strict: Optional[bool] = None):
+    """DeviceWindows trên Windows (ổ "C:", \\\\.\\PhysicalDriveN, file image), BlockDevice ở nơi khác.
+    Mặc định bọc trong ResilientDevice: sector hỏng đọc ra 0 và được ghi vào bản đồ bad block
+    thay vì làm hỏng cả lần quét; strict=True: lỗi đọc raise như cũ.
+    File image chia nhỏ (disk.001, disk.002...: mở bằng bất kỳ phần nào) được ghép thành một
+    device; image nén theo chunk (.pzi) được giải nén khi đọc (xem core.images).
+    direct/read_size/strict=None: dùng giá trị đặt bởi configure_io()."""
+    if direct is None:
+        direct = _io_defaults['direct']
+    if read_size is None:
+        read_size = _io_defaults['read_size']
+    if strict is None:
+        strict = _io_defaults['strict']
+    segments = split_segments(path) if os.path.isfile(path) else None
+    if segments is not None:
+        dev = SplitImage([_open_raw(p, readonly, direct, read_size) for p in segments])
+    elif os.path.isfile(path) and is_chunked_image(path):
+        dev = ChunkedImage(path)
+    else:
+        dev = _open_raw(path, readonly, direct, read_size)
+    if strict:
+        return dev
+    name = os.path.abspath(path) if os.path.isfile(path) else path
+    return ResilientDevice(dev, map_file=_io_defaults['bad_map'], name=name)
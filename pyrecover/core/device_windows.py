@@ -1,6 +1,11 @@
 # pyrecover/core/device_windows.py
 from __future__ import annotations
+import ctypes
 import win32file, win32con, win32security, win32api
+from .device import AlignedReader, aligned_size, DEFAULT_READ_SIZE, DEFAULT_DIRECT_READ_SIZE
+
+FILE_FLAG_NO_BUFFERING = 0x20000000
+FILE_FLAG_SEQUENTIAL_SCAN = 0x08000000
 
 def _enable_privileges(names):
     hProc = win32api.GetCurrentProcess()
@@ -18,7 +23,10 @@ def _enable_privileges(names):
         win32security.AdjustTokenPrivileges(hTok, False, privs)
 
 class DeviceWindows:
-    def __init__(self, path: str, readonly: bool = True) -> None:
+    def __init__(self, path: str, readonly: bool = True, direct: bool = False,
+                 read_size: int | None = None) -> None:
+        """direct=True: FILE_FLAG_NO_BUFFERING — đọc thẳng từ đĩa qua buffer căn lề dùng lại,
+        không đi qua (và không làm bẩn) system cache."""
         _enable_privileges([
             win32security.SE_BACKUP_NAME,
             win32security.SE_RESTORE_NAME,
@@ -41,6 +49,14 @@ class DeviceWindows:
                  win32con.FILE_SHARE_WRITE |
                  win32con.FILE_SHARE_DELETE)
         
+        self.direct = direct
+        self._reader = None
+        if direct:
+            self.read_size = aligned_size(read_size or DEFAULT_DIRECT_READ_SIZE)
+            flags = FILE_FLAG_NO_BUFFERING | FILE_FLAG_SEQUENTIAL_SCAN
+        else:
+            self.read_size = read_size or DEFAULT_READ_SIZE
+            flags = win32con.FILE_ATTRIBUTE_NORMAL
         try:
             self.handle = win32file.CreateFile(
                 device_path,
@@ -48,14 +64,31 @@ class DeviceWindows:
                 share,
                 None,
                 win32con.OPEN_EXISTING,
-                win32con.FILE_ATTRIBUTE_NORMAL,
+                flags,
                 None
             )
             self.path = device_path
         except Exception as e:
             raise IOError(f"Failed to open device {device_path}: {e}")
+        if direct:
+            self._reader = AlignedReader(self._read_into, self.read_size)
+
+    def _read_into(self, mv: memoryview, offset: int) -> int:
+        # pywin32 ReadFile không cho biết số byte đọc được khi truyền buffer sẵn → gọi
+        # kernel32.ReadFile trực tiếp vào buffer mmap (đã căn lề theo page)
+        win32file.SetFilePointer(self.handle, offset, win32con.FILE_BEGIN)
+        n = len(mv)
+        buf = (ctypes.c_char * n).from_buffer(mv)
+        got = ctypes.c_ulong(0)
+        ok = ctypes.windll.kernel32.ReadFile(int(self.handle), buf, n, ctypes.byref(got), None)
+        del buf
+        if not ok:
+            raise IOError(f"ReadFile failed at off={offset} err={ctypes.GetLastError()}")
+        return got.value
 
     def read(self, offset: int, size: int) -> bytes:
+        if self._reader is not None:
+            return self._reader.read(offset, size)
         # pywin32 SetFilePointer(handle, distance, moveMethod)
         win32file.SetFilePointer(self.handle, offset, win32con.FILE_BEGIN)
         hr, data = win32file.ReadFile(self.handle, size)
@@ -68,6 +101,8 @@ class DeviceWindows:
 
     def close(self):
         try:
+            if self._reader is not None:
+                self._reader.close()
             self.handle.Close()
         except Exception:
             pass
@@ -0,0 +1,261 @@
+"""Image bằng chứng không phải một file phẳng: image chia nhiều phần (.001, .002, ...) và
+image nén theo chunk có bảng chỉ mục (đọc ngẫu nhiên được, không phải giải nén cả file).
+
+Định dạng image nén (.pzi) — mỗi chunk nén độc lập bằng zlib hoặc zstd:
+  header 32 byte: MAGIC (8) | codec u8 | 3 byte 0 | chunk_size u32 | image_size u64 | index_offset u64
+  các chunk nén nối tiếp nhau
+  index tại index_offset: (số chunk + 1) offset u64 — chunk i nằm ở [off[i], off[i+1])
+Chunk nén không nhỏ hơn bản gốc được lưu nguyên (độ dài lưu == độ dài gốc → không nén).
+Tạo bằng compress_image() / `python -m pyrecover.cli compress-image`.
+"""
+from __future__ import annotations
+import bisect, os, re, struct, threading, zlib
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+MAGIC = b'PRCIMG01'
+HEADER = struct.Struct('<8sB3xIQQ')
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {'zlib': CODEC_ZLIB, 'zstd': CODEC_ZSTD}
+DEFAULT_CHUNK = 1024 * 1024
+CACHE_CHUNKS = 64          # số chunk đã giải nén giữ trong LRU (64 MiB với chunk 1 MiB)
+
+_SEGMENT_RE = re.compile(r'^(.*)\.(\d{3,})$')
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstandard is not installed (pip install zstandard)")
+    return zstandard
+
+
+def split_segments(path: str) -> Optional[List[str]]:
+    """'disk.001' (hoặc phần bất kỳ) → mọi phần liên tiếp từ .001 (.000 nếu có); None nếu
+    path không có dạng phần của image chia nhỏ. ValueError nếu thiếu phần ở giữa (quét trên
+    image bị cắt ngắn sẽ cho kết quả sai mà không báo lỗi)."""
+    m = _SEGMENT_RE.match(path)
+    if m is None:
+        return None
+    base, num = m.group(1), m.group(2)
+    width = len(num)
+    folder, prefix = os.path.split(base)
+    nums = set()
+    for name in os.listdir(folder or '.'):
+        ext = name[len(prefix) + 1:]
+        if name.startswith(prefix + '.') and len(ext) == width and ext.isdigit() \
+                and os.path.isfile(os.path.join(folder, name)):
+            nums.add(int(ext))
+    if not nums:
+        return None
+    first = 0 if 0 in nums else 1
+    last = max(nums)
+    missing = [i for i in range(first, last + 1) if i not in nums]
+    if missing:
+        raise ValueError(f"{path}: split image is missing segment(s) "
+                         + ', '.join(f"{base}.{i:0{width}d}" for i in missing[:5]))
+    return [f"{base}.{i:0{width}d}" for i in range(first, last + 1)]
+
+
+def is_chunked_image(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class SplitImage:
+    """Các phần của image chia nhỏ như một device liên tục; segments: device đã mở theo thứ tự."""
+
+    def __init__(self, segments: list) -> None:
+        if not segments:
+            raise ValueError("split image has no segments")
+        self._segs = segments
+        self._starts: List[int] = []
+        pos = 0
+        for d in segments:
+            self._starts.append(pos)
+            pos += d.size
+        self._size = pos
+        self.read_size = getattr(segments[0], 'read_size', 0) or 64 * 1024
+        self.direct = all(getattr(d, 'direct', False) for d in segments)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def read(self, offset: int, size: int) -> bytes:
+        if offset < 0 or offset + size > self._size:
+            raise ValueError(f"Read out of bounds: off={offset} size={size} total={self._size}")
+        i = bisect.bisect_right(self._starts, offset) - 1
+        parts = []
+        end = offset + size
+        while offset < end:
+            seg_start = self._starts[i]
+            n = min(end, seg_start + self._segs[i].size) - offset
+            if n > 0:
+                parts.append(self._segs[i].read(offset - seg_start, n))
+                offset += n
+            i += 1
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+    def close(self) -> None:
+        for d in self._segs:
+            d.close()
+
+
+class ChunkedImage:
+    """Đọc ngẫu nhiên image nén theo chunk (xem đầu module); giữ LRU các chunk đã giải nén
+    để đọc tuần tự / đọc lại gần nhau (quét MFT, export) không giải nén lại.
+    stats: core.stats.ScanStats — instrument() tự gắn vào (cache 'image.chunks')."""
+
+    def __init__(self, path: str, cache_chunks: int = CACHE_CHUNKS) -> None:
+        self._f = open(path, 'rb', buffering=0)
+        try:
+            magic, codec, chunk, size, index_off = HEADER.unpack(self._f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a chunked image")
+            if codec not in CODECS.values() or chunk <= 0 or not index_off:
+                raise ValueError(f"{path}: bad chunked image header (unfinished?)")
+            n = (size + chunk - 1) // chunk
+            self._f.seek(index_off)
+            raw = self._f.read(8 * (n + 1))
+            if len(raw) != 8 * (n + 1):
+                raise ValueError(f"{path}: truncated chunk index")
+        except BaseException:
+            self._f.close()
+            raise
+        self._offsets = struct.unpack(f'<{n + 1}Q', raw)
+        self.codec = codec
+        self.chunk_size = chunk
+        self._size = size
+        self.read_size = chunk
+        self.direct = False
+        self.cache_chunks = max(1, cache_chunks)
+        self._cache: 'OrderedDict[int, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._dctx = _zstd().ZstdDecompressor() if codec == CODEC_ZSTD else None
+        self.stats = None
+        # số liệu
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _load(self, i: int) -> bytes:
+        start, end = self._offsets[i], self._offsets[i + 1]
+        want = min(self.chunk_size, self._size - i * self.chunk_size)
+        if hasattr(os, 'pread'):
+            data = os.pread(self._f.fileno(), end - start, start)
+        else:
+            self._f.seek(start)
+            data = self._f.read(end - start)
+        if len(data) != end - start:
+            raise IOError(f"Short read of chunk {i}")
+        if len(data) == want:
+            return data   # lưu không nén
+        if self._dctx is not None:
+            out = self._dctx.decompress(data, max_output_size=want)
+        else:
+            out = zlib.decompress(data)
+        if len(out) != want:
+            raise IOError(f"Chunk {i} decompressed to {len(out)} bytes, expected {want}")
+        return out
+
+    def _chunk(self, i: int) -> bytes:
+        c = self._cache.get(i)
+        hit = c is not None
+        if hit:
+            self._cache.move_to_end(i)
+            self.hits += 1
+        else:
+            c = self._load(i)
+            self._cache[i] = c
+            if len(self._cache) > self.cache_chunks:
+                self._cache.popitem(last=False)
+            self.misses += 1
+        if self.stats is not None:
+            self.stats.cache('image.chunks', hit)
+        return c
+
+    def read(self, offset: int, size: int) -> bytes:
+        if offset < 0 or offset + size > self._size:
+            raise ValueError(f"Read out of bounds: off={offset} size={size} total={self._size}")
+        cs = self.chunk_size
+        end = offset + size
+        parts = []
+        with self._lock:
+            while offset < end:
+                i = offset // cs
+                lo = offset - i * cs
+                hi = min(cs, end - i * cs)
+                c = self._chunk(i)
+                parts.append(c[lo:hi] if lo or hi < len(c) else c)
+                offset = i * cs + hi
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+    def close(self) -> None:
+        self._cache.clear()
+        self._f.close()
+
+
+def compress_image(dev, out_path: str, codec: str = 'zlib', chunk_size: int = DEFAULT_CHUNK,
+                   level: Optional[int] = None, workers: Optional[int] = None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Nén toàn bộ device đang mở vào out_path; trả số byte của file nén.
+    Các chunk được nén song song trên thread pool (zlib/zstd nhả GIL khi nén).
+    progress(bytes_done, total) sau mỗi lô chunk."""
+    from concurrent.futures import ThreadPoolExecutor   # chỉ lệnh nén cần (import ~8 ms)
+    if codec not in CODECS:
+        raise ValueError(f"codec must be one of {tuple(CODECS)}")
+    if codec == 'zstd':
+        zstd = _zstd()
+        lvl = 3 if level is None else level
+        local = threading.local()
+
+        def compress(b: bytes) -> bytes:
+            c = getattr(local, 'c', None)
+            if c is None:
+                c = local.c = zstd.ZstdCompressor(level=lvl)
+            return c.compress(b)
+    else:
+        lvl = 6 if level is None else level
+
+        def compress(b: bytes) -> bytes:
+            return zlib.compress(b, lvl)
+
+    def pack(b: bytes) -> bytes:
+        c = compress(b)
+        return c if len(c) < len(b) else b
+
+    total = dev.size
+    workers = workers or os.cpu_count() or 1
+    offsets = []
+    tmp = out_path + '.tmp'
+    with open(tmp, 'wb') as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        f.write(HEADER.pack(MAGIC, CODECS[codec], chunk_size, total, 0))
+        pos = 0
+        batch = chunk_size * workers * 4
+        while pos < total:
+            stop = min(total, pos + batch)
+            chunks = [dev.read(p, min(chunk_size, stop - p)) for p in range(pos, stop, chunk_size)]
+            for c in pool.map(pack, chunks):
+                offsets.append(f.tell())
+                f.write(c)
+            pos = stop
+            if progress is not None:
+                progress(pos, total)
+        offsets.append(f.tell())
+        index_off = f.tell()
+        f.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+        # header ghi lại cuối cùng: file dở dang (index_offset = 0) không mở được
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, CODECS[codec], chunk_size, total, index_off))
+        out_size = index_off + 8 * len(offsets)
+    os.replace(tmp, out_path)
+    return out_size
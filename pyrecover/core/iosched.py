@@ -0,0 +1,185 @@
+"""Bộ lập lịch I/O dùng chung cho nhiều consumer đọc cùng một device.
+
+Mỗi consumer (scan, export, carve... chạy trên thread riêng) gọi read() như với device
+thường; request được xếp hàng, một thread dispatcher chọn request theo kiểu thang máy
+(C-LOOK: tiếp tục theo chiều tăng offset từ vị trí đầu đọc hiện tại, hết thì quay về
+offset nhỏ nhất), gộp các request kề nhau / chồng nhau / cách nhau một khe nhỏ thành một
+lần đọc lớn rồi chia lại dữ liệu cho từng consumer. Request chờ quá `deadline` được phục
+vụ trước để một consumer đọc tuần tự (quét MFT) không bỏ đói các consumer khác.
+"""
+from __future__ import annotations
+import threading, time
+from typing import Iterable, List, Optional, Tuple
+
+
+class _Request:
+    __slots__ = ('offset', 'end', 'queued', 'done', 'data', 'error')
+
+    def __init__(self, offset: int, size: int) -> None:
+        self.offset = offset
+        self.end = offset + size
+        self.queued = time.monotonic()
+        self.done = threading.Event()
+        self.data: Optional[bytes] = None
+        self.error: Optional[BaseException] = None
+
+
+class IoScheduler:
+    def __init__(self, dev, max_merge: int = 4 * 1024 * 1024, max_gap: int = 64 * 1024,
+                 deadline: float = 0.05) -> None:
+        """max_merge: kích thước tối đa một lần đọc gộp; max_gap: đọc luôn khe trống nhỏ hơn
+        ngưỡng này giữa hai request (rẻ hơn một lần seek trên HDD); deadline: giây."""
+        self.dev = dev
+        self.max_merge = max_merge
+        self.max_gap = max_gap
+        self.deadline = deadline
+        self._cv = threading.Condition()
+        self._pending: List[_Request] = []
+        self._head = 0
+        self._closed = False
+        # số liệu
+        self.requests = 0
+        self.dispatches = 0
+        self.deadline_dispatches = 0
+        self.bytes_requested = 0
+        self.bytes_read = 0
+        self.seek_distance = 0
+        self._depth_sum = 0
+        self.depth_max = 0
+        self._thread = threading.Thread(target=self._run, name='pyrecover-iosched', daemon=True)
+        self._thread.start()
+
+    # ---- phía consumer ----
+
+    def submit(self, offset: int, size: int) -> _Request:
+        req = _Request(offset, size)
+        with self._cv:
+            if self._closed:
+                raise IOError("I/O scheduler is closed")
+            self._pending.append(req)
+            self.requests += 1
+            self.bytes_requested += size
+            self._cv.notify()
+        return req
+
+    @staticmethod
+    def _result(req: _Request) -> bytes:
+        req.done.wait()
+        if req.error is not None:
+            raise req.error
+        return req.data
+
+    def read(self, offset: int, size: int) -> bytes:
+        return self._result(self.submit(offset, size))
+
+    def read_many(self, ranges: Iterable[Tuple[int, int]]) -> List[bytes]:
+        """Xếp hàng nhiều (offset, size) cùng lúc rồi chờ tất cả — cho phép gộp cả trong một consumer."""
+        reqs = [self.submit(o, n) for o, n in ranges]
+        return [self._result(r) for r in reqs]
+
+    def close(self) -> None:
+        with self._cv:
+            self._closed = True
+            self._cv.notify()
+        self._thread.join()
+
+    # ---- dispatcher ----
+
+    def _pick(self) -> List[_Request]:
+        pending = self._pending
+        depth = len(pending)
+        self._depth_sum += depth
+        if depth > self.depth_max:
+            self.depth_max = depth
+        pending.sort(key=lambda r: r.offset)
+        oldest = min(pending, key=lambda r: r.queued)
+        if time.monotonic() - oldest.queued > self.deadline:
+            i = pending.index(oldest)
+            self.deadline_dispatches += 1
+        else:
+            i = next((k for k, r in enumerate(pending) if r.offset >= self._head), 0)
+        batch = [pending[i]]
+        start, end = pending[i].offset, pending[i].end
+        j = i + 1
+        while j < depth:
+            r = pending[j]
+            if r.offset > end + self.max_gap or max(end, r.end) - start > self.max_merge:
+                break
+            batch.append(r)
+            end = max(end, r.end)
+            j += 1
+        del pending[i:j]
+        return batch
+
+    def _dispatch(self, batch: List[_Request]) -> None:
+        start = batch[0].offset
+        end = max(r.end for r in batch)
+        self.dispatches += 1
+        self.seek_distance += abs(start - self._head)
+        self._head = end
+        try:
+            data = self.dev.read(start, end - start)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = e
+                batch[0].done.set()
+                return
+            # lần đọc gộp lỗi (vd. chạm cuối device, sector hỏng): thử lại từng request để
+            # lỗi của một request không kéo theo các request khác
+            for r in batch:
+                try:
+                    r.data = self.dev.read(r.offset, r.end - r.offset)
+                except Exception as e2:
+                    r.error = e2
+                r.done.set()
+            return
+        self.bytes_read += len(data)
+        for r in batch:
+            if r.offset == start and r.end == end:
+                r.data = data
+            else:
+                r.data = data[r.offset - start:r.end - start]
+            r.done.set()
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while not self._pending and not self._closed:
+                    self._cv.wait()
+                if not self._pending:
+                    return
+                batch = self._pick()
+            self._dispatch(batch)
+
+    def snapshot(self) -> dict:
+        with self._cv:
+            depth = len(self._pending)
+        d = self.dispatches
+        return {
+            'queue_depth': depth,
+            'queue_depth_avg': round(self._depth_sum / d, 2) if d else 0.0,
+            'queue_depth_max': self.depth_max,
+            'requests': self.requests,
+            'dispatches': d,
+            'merge_ratio': round(self.requests / d, 3) if d else 0.0,   # request / lần đọc thật
+            'deadline_dispatches': self.deadline_dispatches,
+            'bytes_requested': self.bytes_requested,
+            'bytes_read': self.bytes_read,
+            'seek_distance': self.seek_distance,
+        }
+
+
+class ScheduledDevice:
+    """Giao diện device (read/size/close) đi qua IoScheduler; close() không đóng device thật."""
+
+    def __init__(self, sched: IoScheduler) -> None:
+        self.sched = sched
+
+    def read(self, offset: int, size: int) -> bytes:
+        return self.sched.read(offset, size)
+
+    def close(self) -> None:
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.sched.dev, name)
@@ -0,0 +1,155 @@
+"""Đọc bảng phân vùng MBR/GPT của image (hoặc ổ vật lý) để tìm các volume NTFS."""
+from __future__ import annotations
+import struct, uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+NTFS_OEM = b'NTFS    '
+MBR_EXTENDED = (0x05, 0x0F, 0x85)
+MBR_GPT_PROTECTIVE = 0xEE
+GPT_SIG = b'EFI PART'
+MAX_LOGICAL = 128  # chặn chuỗi EBR vòng lặp / hỏng
+
+
+@dataclass
+class Partition:
+    index: int            # 0 = cả device là một volume (không có bảng phân vùng)
+    scheme: str           # 'raw' | 'mbr' | 'gpt'
+    offset: int           # byte
+    size: int             # byte (0 = không biết)
+    type: str = ''        # MBR: '0x07'; GPT: GUID loại phân vùng
+    name: str = ''
+
+    @property
+    def label(self) -> str:
+        return f"{self.scheme}#{self.index}@{self.offset}"
+
+
+class OffsetDevice:
+    """Nhìn một đoạn [offset, offset+size) của device như một device riêng (offset tính từ 0)."""
+
+    def __init__(self, dev, offset: int, size: int = 0) -> None:
+        self._dev = dev
+        self.offset = offset
+        self._size = size
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def read(self, offset: int, size: int) -> bytes:
+        if offset < 0 or (self._size and offset + size > self._size):
+            raise ValueError(f"Read out of bounds: off={offset} size={size} total={self._size}")
+        return self._dev.read(self.offset + offset, size)
+
+    def unreadable(self, offset: int, size: int) -> bool:
+        fn = getattr(self._dev, 'unreadable', None)
+        return fn is not None and fn(self.offset + offset, size)
+
+    def close(self) -> None:
+        self._dev.close()
+
+    def __getattr__(self, name):
+        return getattr(self._dev, name)
+
+
+def is_ntfs_boot(sector: bytes) -> bool:
+    return len(sector) >= 512 and sector[3:11] == NTFS_OEM and sector[510:512] == b'\x55\xaa'
+
+
+def _mbr_entries(sector: bytes):
+    for i in range(4):
+        e = sector[446 + 16 * i:462 + 16 * i]
+        ptype = e[4]
+        lba, count = struct.unpack_from('<II', e, 8)
+        if ptype and count:
+            yield ptype, lba, count
+
+
+def parse_mbr(dev, sector_size: int = 512) -> List[Partition]:
+    """Phân vùng primary + logical (chuỗi EBR trong phân vùng extended)."""
+    mbr = dev.read(0, 512)
+    if mbr[510:512] != b'\x55\xaa':
+        return []
+    out: List[Partition] = []
+    n = 0
+    for ptype, lba, count in _mbr_entries(mbr):
+        if ptype in MBR_EXTENDED:
+            ext_base = lba
+            ebr_lba = lba
+            for _ in range(MAX_LOGICAL):
+                ebr = dev.read(ebr_lba * sector_size, 512)
+                if ebr[510:512] != b'\x55\xaa':
+                    break
+                ents = list(_mbr_entries(ebr))
+                if not ents:
+                    break
+                ltype, lrel, lcount = ents[0]
+                if ltype not in MBR_EXTENDED:
+                    n += 1
+                    out.append(Partition(n, 'mbr', (ebr_lba + lrel) * sector_size, lcount * sector_size, f"0x{ltype:02X}"))
+                nxt = [e for e in ents[1:] if e[0] in MBR_EXTENDED]
+                if not nxt:
+                    break
+                # EBR tiếp theo tính từ đầu phân vùng extended, không phải từ EBR hiện tại
+                ebr_lba = ext_base + nxt[0][1]
+            continue
+        n += 1
+        out.append(Partition(n, 'mbr', lba * sector_size, count * sector_size, f"0x{ptype:02X}"))
+    return out
+
+
+def parse_gpt(dev, sector_size: int = 512) -> List[Partition]:
+    hdr = dev.read(sector_size, 92)
+    if hdr[:8] != GPT_SIG:
+        return []
+    entries_lba, count, esize = struct.unpack_from('<QII', hdr, 72)
+    if esize < 128 or count > 4096:
+        return []
+    table = dev.read(entries_lba * sector_size, count * esize)
+    out: List[Partition] = []
+    for i in range(count):
+        e = table[i * esize:(i + 1) * esize]
+        if e[:16] == bytes(16):
+            continue
+        first, last = struct.unpack_from('<QQ', e, 32)
+        if last < first:
+            continue
+        name = e[56:128].decode('utf-16le', 'replace').split('\x00', 1)[0]
+        out.append(Partition(i + 1, 'gpt', first * sector_size, (last - first + 1) * sector_size,
+                             str(uuid.UUID(bytes_le=e[:16])), name))
+    return out
+
+
+def list_partitions(dev) -> List[Partition]:
+    """Bảng phân vùng của device; device không có bảng nhưng là volume NTFS → một Partition 'raw'."""
+    first = dev.read(0, 512)
+    if is_ntfs_boot(first):
+        return [Partition(0, 'raw', 0, getattr(dev, 'size', 0) or 0, 'ntfs')]
+    mbr = parse_mbr(dev)
+    if any(p.type == f"0x{MBR_GPT_PROTECTIVE:02X}" for p in mbr) or not mbr:
+        # GPT: thử sector 512 rồi 4096 (ổ 4Kn)
+        for ss in (512, 4096):
+            try:
+                gpt = parse_gpt(dev, ss)
+            except (ValueError, IOError):
+                continue
+            if gpt:
+                return gpt
+    return mbr
+
+
+def find_ntfs_volumes(dev) -> List[Partition]:
+    """Phân vùng có boot sector NTFS (kiểm tra chữ ký thật, không tin mã loại phân vùng)."""
+    out = []
+    for p in list_partitions(dev):
+        try:
+            if p.scheme == 'raw' or is_ntfs_boot(dev.read(p.offset, 512)):
+                out.append(p)
+        except (ValueError, IOError):
+            continue
+    return out
+
+
+def open_partition(dev, part: Optional[Partition]):
+    return dev if part is None or part.offset == 0 else OffsetDevice(dev, part.offset, part.size)
@@ -0,0 +1,315 @@
+"""Đọc chịu lỗi trên đĩa hỏng: lần đọc lớn lỗi được chia nhỏ dần để tìm sector hỏng đầu
+tiên, phần không đọc được trả về 0 và được ghi vào bản đồ bad block, rồi đọc tiếp.
+
+Giống ddrescue, vùng hỏng không bị đọc từng sector (mỗi lần đọc sector hỏng có thể mất vài
+giây và làm đĩa yếu thêm): từ sector hỏng đầu tiên, đọc thử các sector cách xa dần (1, 2, 4...
+sector, tối đa max_skip) tới khi gặp sector đọc được, rồi chia đôi khoảng giữa để tìm đúng
+chỗ hết vùng hỏng. Vùng đã biết là hỏng không bị đọc lại; bản đồ lưu ra file được để lần
+chạy sau cũng tránh các vùng đó.
+"""
+from __future__ import annotations
+import bisect, itertools, json, os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BAD = 'bad'          # đã đọc thử và lỗi
+SKIPPED = 'skipped'  # nằm giữa các sector đã đọc thử và lỗi (chưa đọc thử, coi như hỏng)
+MAX_SKIP = 1024 * 1024
+
+_tmp_seq = itertools.count(1)
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Khóa độc quyền giữa các process (và thread) trên file `path`.lock."""
+    fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)   # LK_LOCK tự thử lại ~10 giây
+                    break
+                except OSError:
+                    pass
+            try:
+                yield
+            finally:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield   # đóng fd là nhả khóa
+    finally:
+        os.close(fd)
+
+
+class BadBlockMap:
+    """Các vùng [start, end) không đọc được, không chồng nhau, sắp theo offset."""
+
+    def __init__(self, ranges: Optional[List[Tuple[int, int, str]]] = None) -> None:
+        self._starts: List[int] = []
+        self._ranges: List[Tuple[int, int, str]] = []
+        for s, e, kind in ranges or ():
+            self.add(s, e, kind)
+
+    @property
+    def ranges(self) -> List[Tuple[int, int, str]]:
+        return list(self._ranges)
+
+    def bytes(self, kind: Optional[str] = None) -> int:
+        return sum(e - s for s, e, k in self._ranges if kind is None or k == kind)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        i = bisect.bisect_right(self._starts, start) - 1
+        if i >= 0 and self._ranges[i][1] > start:
+            return True
+        return i + 1 < len(self._ranges) and self._ranges[i + 1][0] < end
+
+    def covers(self, start: int, end: int) -> bool:
+        """True nếu cả [start, end) nằm trong các vùng đã biết (liền nhau)."""
+        i = bisect.bisect_right(self._starts, start) - 1
+        pos = start
+        while 0 <= i < len(self._ranges) and self._ranges[i][0] <= pos:
+            pos = max(pos, self._ranges[i][1])
+            if pos >= end:
+                return True
+            i += 1
+        return False
+
+    def next_range(self, pos: int) -> Optional[Tuple[int, int, str]]:
+        """Vùng đầu tiên kết thúc sau pos (chứa pos hoặc nằm sau nó)."""
+        i = bisect.bisect_right(self._starts, pos) - 1
+        if i >= 0 and self._ranges[i][1] > pos:
+            return self._ranges[i]
+        return self._ranges[i + 1] if i + 1 < len(self._ranges) else None
+
+    def add(self, start: int, end: int, kind: str = BAD) -> int:
+        """Thêm phần của [start, end) chưa có trong bản đồ; gộp với vùng kề cùng loại.
+        Trả số byte mới được thêm."""
+        pieces = []
+        pos = start
+        i = max(0, bisect.bisect_right(self._starts, start) - 1)
+        while pos < end and i < len(self._ranges):
+            s, e, _ = self._ranges[i]
+            if s >= end:
+                break
+            if s > pos:
+                pieces.append((pos, s))
+            pos = max(pos, e)
+            i += 1
+        if pos < end:
+            pieces.append((pos, end))
+        for s, e in pieces:
+            i = bisect.bisect_left(self._starts, s)
+            if i > 0 and self._ranges[i - 1][1] == s and self._ranges[i - 1][2] == kind:
+                i -= 1
+                s = self._ranges[i][0]
+                del self._starts[i], self._ranges[i]
+            if i < len(self._ranges) and self._ranges[i][0] == e and self._ranges[i][2] == kind:
+                e = self._ranges[i][1]
+                del self._starts[i], self._ranges[i]
+            self._starts.insert(i, s)
+            self._ranges.insert(i, (s, e, kind))
+        return sum(e - s for s, e in pieces)
+
+    @staticmethod
+    def load(path: str, device: str) -> 'BadBlockMap':
+        """Bản đồ của `device` trong file (file chứa bản đồ của nhiều device, theo đường dẫn)."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return BadBlockMap()
+        return BadBlockMap([tuple(r) for r in data.get(device, ())])
+
+    def save(self, path: str, device: str) -> None:
+        """Gộp bản đồ này vào bản đồ của `device` trong file. Nhiều process có thể lưu cùng
+        file (batch-scan với --bad-map): đọc-gộp-ghi nằm trong khóa file, file tạm mang pid
+        + số thứ tự nên không process nào ghi đè bản đồ của device khác."""
+        with _file_lock(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            # vùng của bản đồ này (mới hơn) giữ loại của nó; vùng chỉ có trong file được giữ lại
+            merged = BadBlockMap(self._ranges)
+            for s, e, kind in data.get(device, ()):
+                merged.add(s, e, kind)
+            data[device] = [list(r) for r in merged._ranges]
+            tmp = f"{path}.{os.getpid()}-{next(_tmp_seq)}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+
+
+class ResilientDevice:
+    """Bọc device: read() không raise vì sector hỏng mà trả 0 cho phần không đọc được.
+    ValueError (đọc ngoài device) vẫn được raise như cũ.
+    sector: đơn vị nhỏ nhất khi chia nhỏ (mặc định 4096 với device đọc direct — mỗi lần
+    đọc đằng nào cũng là một block căn lề 4K — và 512 với device thường).
+    max_skip: khoảng xa nhất đọc thử phía sau một sector hỏng; vùng hỏng dài hơn được
+    xử lý từng đoạn max_skip.
+    map_file: file bản đồ bad block (khóa theo `name`) — đọc khi mở, ghi lại khi close().
+    stats: core.stats.ScanStats — instrument() tự gắn vào (bộ đếm salvaged_reads, bad_sectors...)."""
+
+    def __init__(self, dev, sector: Optional[int] = None, max_skip: int = MAX_SKIP,
+                 badmap: Optional[BadBlockMap] = None, map_file: Optional[str] = None,
+                 name: str = '') -> None:
+        self._dev = dev
+        self.sector = sector or (4096 if getattr(dev, 'direct', False) else 512)
+        self.max_skip = max(max_skip, self.sector)
+        self.map_file = map_file
+        self.name = name
+        if badmap is None:
+            badmap = BadBlockMap.load(map_file, name) if map_file else BadBlockMap()
+        self.badmap = badmap
+        self.stats = None
+        # số liệu
+        self.salvaged_reads = 0    # lần đọc phải chia nhỏ
+        self.retry_reads = 0       # số lần đọc con
+        self.bad_sectors = 0       # sector đã đọc thử và lỗi
+
+    def read(self, offset: int, size: int) -> bytes:
+        end = offset + size
+        total = getattr(self._dev, 'size', 0)
+        if offset < 0 or (total and end > total):
+            raise ValueError(f"Read out of bounds: off={offset} size={size} total={total}")
+        failed = False
+        if not self.badmap.overlaps(offset, end):
+            try:
+                return self._dev.read(offset, size)
+            except ValueError:
+                raise
+            except Exception:
+                failed = True   # OSError, pywintypes.error (không phải OSError)...
+        self.salvaged_reads += 1
+        if self.stats is not None:
+            self.stats.count('salvaged_reads')
+        buf = bytearray(size)
+        self._salvage(buf, offset, end, failed)
+        return bytes(buf)
+
+    def _try(self, buf: bytearray, base: int, lo: int, hi: int) -> bool:
+        """Đọc [lo, hi) vào buf (buf[0] ứng với offset base); False nếu lỗi."""
+        self.retry_reads += 1
+        try:
+            data = self._dev.read(lo, hi - lo)
+        except ValueError:
+            raise
+        except Exception:
+            return False
+        if buf is not None:
+            buf[lo - base:hi - base] = data
+        return True
+
+    def _salvage(self, buf: bytearray, base: int, end: int, failed: bool) -> None:
+        pos = base
+        while pos < end:
+            r = self.badmap.next_range(pos)
+            if r is not None and r[0] <= pos:
+                pos = r[1]          # vùng đã biết hỏng: để 0, không đọc lại
+                continue
+            seg_end = min(end, r[0]) if r is not None else end
+            bad = self._first_bad(buf, base, pos, seg_end, failed)
+            failed = False
+            if bad is None:
+                pos = seg_end
+            else:
+                pos = self._bad_extent(bad)
+
+    def _first_bad(self, buf: bytearray, base: int, lo: int, hi: int, failed: bool) -> Optional[int]:
+        """Đọc phần đọc được của [lo, hi) từ đầu tới sector hỏng đầu tiên; trả offset đầu
+        sector đó (None nếu đọc được hết). failed: cả đoạn vừa đọc lỗi, không đọc lại."""
+        if not failed and self._try(buf, base, lo, hi):
+            return None
+        ss = self.sector
+        if lo // ss == (hi - 1) // ss:
+            return lo // ss * ss
+        mid = (lo + hi) // 2 // ss * ss
+        if mid <= lo:
+            mid = lo // ss * ss + ss
+        bad = self._first_bad(buf, base, lo, mid, False)
+        if bad is not None:
+            return bad
+        return self._first_bad(buf, base, mid, hi, False)
+
+    def _probe(self, sector_off: int) -> bool:
+        """Đọc thử một sector; sector lỗi được ghi vào bản đồ."""
+        total = getattr(self._dev, 'size', 0)
+        if total and sector_off + self.sector > total:
+            return True   # hết device: coi như hết vùng hỏng
+        if self._try(None, 0, sector_off, sector_off + self.sector):
+            return True
+        self._mark(sector_off, sector_off + self.sector, BAD)
+        return False
+
+    def _bad_extent(self, start: int) -> int:
+        """start: đầu một sector vừa đọc lỗi. Tìm chỗ hết vùng hỏng (đọc thử cách xa dần rồi
+        chia đôi), ghi cả vùng vào bản đồ; trả offset sector đầu tiên sau vùng hỏng."""
+        ss = self.sector
+        self._mark(start, start + ss, BAD)
+        last_bad = start
+        step = ss
+        good = None
+        while step <= self.max_skip:
+            p = start + step
+            if self._probe(p):
+                good = p
+                break
+            last_bad = p
+            step *= 2
+        if good is None:
+            # vùng hỏng dài hơn max_skip: bỏ qua tới sector hỏng xa nhất đã thử, đoạn sau
+            # sẽ được xử lý như một vùng hỏng mới
+            good = last_bad + ss
+        else:
+            lo, hi = last_bad + ss, good   # lo..hi-1: chưa biết, hi đọc được
+            while lo < hi:
+                mid = (lo + hi) // 2 // ss * ss
+                if self._probe(mid):
+                    hi = mid
+                else:
+                    lo = mid + ss
+            good = lo
+        # các sector chưa đọc thử nằm giữa những sector hỏng: coi như hỏng
+        self._mark(start, good, SKIPPED)
+        return good
+
+    def _mark(self, lo: int, hi: int, kind: str) -> None:
+        added = self.badmap.add(lo, hi, kind)
+        if kind == BAD:
+            self.bad_sectors += added // self.sector
+        if self.stats is not None and added:
+            self.stats.count('bad_sectors' if kind == BAD else 'skipped_bytes',
+                             added // self.sector if kind == BAD else added)
+
+    def unreadable(self, offset: int, size: int) -> bool:
+        """True nếu [offset, offset+size) có phần đã được trả về 0 vì không đọc được."""
+        return self.badmap.overlaps(offset, offset + size)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            'salvaged_reads': self.salvaged_reads,
+            'retry_reads': self.retry_reads,
+            'bad_sectors': self.bad_sectors,
+            'bad_bytes': self.badmap.bytes(BAD),
+            'skipped_bytes': self.badmap.bytes(SKIPPED),
+        }
+
+    def close(self) -> None:
+        try:
+            if self.map_file:
+                self.badmap.save(self.map_file, self.name)
+        finally:
+            self._dev.close()
+
+    def __getattr__(self, name):
+        return getattr(self._dev, name)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from .images import ChunkedImage
+from .resilient import ResilientDevice
+
+
+class LatencyHistogram:
+    """Histogram độ trễ theo bucket lũy thừa 2 (µs): bucket k chứa mẫu trong [2^(k-1), 2^k)."""
+
+    def __init__(self, buckets: int = 32) -> None:
+        self.counts: List[int] = [0] * buckets
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        us = int(seconds * 1e6)
+        k = min(us.bit_length(), len(self.counts) - 1)
+        self.counts[k] += 1
+        self.n += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Cận trên (µs) của bucket chứa percentile p — đủ để so sánh, không chính xác tuyệt đối."""
+        if not self.n:
+            return 0.0
+        target = p / 100.0 * self.n
+        acc = 0
+        for k, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return float(1 << k)
+        return float(1 << (len(self.counts) - 1))
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.n,
+            'avg_us': round(self.total / self.n * 1e6, 2) if self.n else 0.0,
+            'p50_us': self.percentile(50),
+            'p99_us': self.percentile(99),
+            'max_us': round(self.max * 1e6, 2),
+            # "<2^k µs": số mẫu; bỏ bucket rỗng cho gọn
+            'buckets': {f"<{1 << k}us": c for k, c in enumerate(self.counts) if c},
+        }
+
+
+class ScanStats:
+    """Số liệu đo cho một lần quét/xuất: byte đọc, độ trễ đọc, thời gian từng stage,
+    bộ đếm (record, byte ghi, ...) và tỉ lệ trúng cache. Không thread-safe."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.bytes_read = 0
+        self.reads = 0
+        self.read_latency = LatencyHistogram()
+        self.counters: Dict[str, int] = {}
+        self.stages: Dict[str, List[float]] = {}  # name -> [calls, seconds]
+        self.caches: Dict[str, List[int]] = {}    # name -> [hits, misses]
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, stage: str, seconds: float, calls: int = 1) -> None:
+        st = self.stages.get(stage)
+        if st is None:
+            self.stages[stage] = [calls, seconds]
+        else:
+            st[0] += calls
+            st[1] += seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def record_read(self, nbytes: int, seconds: float) -> None:
+        self.reads += 1
+        self.bytes_read += nbytes
+        self.read_latency.add(seconds)
+
+    def cache(self, name: str, hit: bool) -> None:
+        c = self.caches.get(name)
+        if c is None:
+            c = self.caches[name] = [0, 0]
+        c[0 if hit else 1] += 1
+
+    def snapshot(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        records = self.counters.get('records', 0)
+        return {
+            'elapsed_s': round(elapsed, 4),
+            'bytes_read': self.bytes_read,
+            'reads': self.reads,
+            'read_mb_s': round(self.bytes_read / elapsed / 1e6, 2) if elapsed > 0 else 0.0,
+            'read_latency': self.read_latency.as_dict(),
+            'records_per_s': round(records / elapsed, 1) if elapsed > 0 else 0.0,
+            'counters': dict(self.counters),
+            'stages': {
+                name: {'calls': int(calls), 'total_s': round(sec, 4),
+                       'avg_us': round(sec / calls * 1e6, 2) if calls else 0.0}
+                for name, (calls, sec) in self.stages.items()
+            },
+            'caches': {
+                name: {'hits': h, 'misses': m, 'hit_rate': round(h / (h + m), 4) if h + m else 0.0}
+                for name, (h, m) in self.caches.items()
+            },
+        }
+
+
+class InstrumentedDevice:
+    """Bọc một device (BlockDevice/DeviceWindows) để đo mọi lần read() vào ScanStats."""
+
+    def __init__(self, dev, stats: ScanStats) -> None:
+        self._dev = dev
+        self.stats = stats
+
+    def read(self, offset: int, size: int) -> bytes:
+        t0 = time.perf_counter()
+        data = self._dev.read(offset, size)
+        self.stats.record_read(len(data), time.perf_counter() - t0)
+        return data
+
+    def close(self) -> None:
+        self._dev.close()
+
+    def __getattr__(self, name):
+        return getattr(self._dev, name)
+
+
+def instrument(dev, stats: Optional[ScanStats]):
+    if stats is None:
+        return dev
+    base = dev
+    if isinstance(dev, ResilientDevice):
+        dev.stats = stats   # đếm sector hỏng / lần đọc phải chia nhỏ
+        base = dev._dev
+    if isinstance(base, ChunkedImage):
+        base.stats = stats  # tỉ lệ trúng cache chunk đã giải nén
+    return InstrumentedDevice(dev, stats)
+
+
+@contextmanager
+def profiled(out_path: Optional[str], engine: str = 'cprofile') -> Iterator[None]:
+    """Profile khối lệnh: 'cprofile' ghi file .prof (xem bằng snakeviz/pstats),
+    'pyinstrument' (nếu đã cài) ghi báo cáo HTML. out_path=None: không làm gì."""
+    if not out_path:
+        yield
+        return
+    if engine == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("pyinstrument is not installed (pip install pyinstrument)")
+        prof = Profiler()
+        prof.start()
+        try:
+            yield
+        finally:
+            prof.stop()
+            with open(out_path, 'w', encoding='utf-8') as f:
+                f.write(prof.output_html())
+        return
+    import cProfile
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        prof.dump_stats(out_path)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+from datetime import datetime, timezone, timedelta
+
+# Số khoảng 100ns giữa 1601-01-01 (mốc FILETIME của NTFS) và 1970-01-01
+FILETIME_UNIX_DELTA = 116444736000000000
+_EPOCH_1601 = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+
+def filetime_to_datetime(ft: int) -> datetime | None:
+    if not ft:
+        return None
+    try:
+        return _EPOCH_1601 + timedelta(microseconds=ft // 10)
+    except OverflowError:
+        return None
+
+
+def filetime_to_iso(ft: int) -> str | None:
+    dt = filetime_to_datetime(ft)
+    return dt.isoformat(timespec='seconds') if dt else None
+
+
+def datetime_to_filetime(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - _EPOCH_1601
+    return (delta.days * 86400 + delta.seconds) * 10_000_000 + delta.microseconds * 10
+
+
+def parse_date_arg(s: str) -> int:
+    """'2024-05-01' hoặc '2024-05-01T13:00' (UTC nếu không ghi múi giờ) -> FILETIME."""
+    return datetime_to_filetime(datetime.fromisoformat(s))
@@ -0,0 +1,62 @@
+/* Bộ giải mã mapping pairs (runlist NTFS) cho đường tăng tốc ctypes của runlist.py.
+ *
+ * Build (đặt thư viện cạnh runlist.py):
+ *   python -m pyrecover.fs.ntfs.runlist build
+ * hoặc thủ công:
+ *   cc -O2 -shared -fPIC -o _runlist.so _runlist.c      (Linux/macOS)
+ *   cl /O2 /LD _runlist.c /Fe:_runlist.dll                (Windows, MSVC)
+ */
+#include <stddef.h>
+#include <stdint.h>
+
+#ifdef _WIN32
+#define EXPORT __declspec(dllexport)
+#else
+#define EXPORT
+#endif
+
+#define SPARSE_LCN (-1)
+
+/* Ghi các cặp (lcn, length) vào out[0..2*max_pairs). Trả số cặp, hoặc -1 nếu out không đủ chỗ.
+ * Dừng ở header 0 hoặc khi run bị cắt cụt/không hợp lệ (LCN âm, tràn) — giống hệt bản Python. */
+EXPORT ptrdiff_t pyrecover_decode_runs(const uint8_t *mp, size_t n, int64_t *out, size_t max_pairs)
+{
+    size_t i = 0, k = 0;
+    int64_t lcn = 0;
+    while (i < n) {
+        uint8_t h = mp[i];
+        unsigned sl = h & 0x0F, ol = h >> 4, b;
+        uint64_t len = 0, v = 0;
+        if (h == 0 || sl == 0 || sl > 8 || ol > 8 || i + 1 + sl + ol > n)
+            break;
+        i++;
+        for (b = 0; b < sl; b++)
+            len |= (uint64_t)mp[i + b] << (8 * b);
+        i += sl;
+        if (len > (uint64_t)INT64_MAX)
+            break;
+        if (k >= max_pairs)
+            return -1;
+        if (ol == 0) {
+            out[2 * k] = SPARSE_LCN;
+            out[2 * k + 1] = (int64_t)len;
+            k++;
+            continue;
+        }
+        for (b = 0; b < ol; b++)
+            v |= (uint64_t)mp[i + b] << (8 * b);
+        i += ol;
+        if (ol < 8 && ((v >> (8 * ol - 1)) & 1))
+            v |= ~(uint64_t)0 << (8 * ol);
+        /* LCN âm hoặc tràn int64 = runlist hỏng */
+        if ((int64_t)v > 0 && lcn > INT64_MAX - (int64_t)v)
+            break;
+        lcn += (int64_t)v;
+        if (lcn < 0)
+            break;
+        out[2 * k] = lcn;
+        out[2 * k + 1] = (int64_t)len;
+        k++;
+    }
+    return (ptrdiff_t)k;
+}
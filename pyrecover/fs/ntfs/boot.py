@@ -11,6 +11,7 @@ class NtfsBoot:
     clusters_per_mft_record: int # signed char spec
     clusters_per_index_buffer: int
     total_sectors: int
+    volume_serial: int = 0
     @property
     def sector_size(self) -> int:
         return self.bytes_per_sector
@@ -29,6 +30,14 @@ class NtfsBoot:
         return c * self.cluster_size
 
 
+    @property
+    def index_buffer_size(self) -> int:
+        c = self.clusters_per_index_buffer
+        if c < 0:
+            return 1 << (-c)
+        return c * self.cluster_size
+
+
     def lcn_to_off(self, lcn: int) -> int:
         return lcn * self.cluster_size
 def parse_boot_sector(bs: bytes) -> NtfsBoot:
@@ -42,6 +51,7 @@ def parse_boot_sector(bs: bytes) -> NtfsBoot:
     mftmirr_lcn = struct.unpack_from('<Q', bs, 56)[0]
     clusters_per_mft_record = struct.unpack_from('<b', bs, 64)[0]
     clusters_per_index_buffer = struct.unpack_from('<b', bs, 68)[0]
+    volume_serial = struct.unpack_from('<Q', bs, 72)[0]
     if bs[3:11] != b"NTFS ":
         # Vẫn cho phép tiếp tục: đôi khi boot backup… nhưng nên cảnh báo
         pass
@@ -53,4 +63,5 @@ def parse_boot_sector(bs: bytes) -> NtfsBoot:
     clusters_per_mft_record=clusters_per_mft_record,
     clusters_per_index_buffer=clusters_per_index_buffer,
     total_sectors=total_sectors,
+    volume_serial=volume_serial,
     )
\ No newline at end of file
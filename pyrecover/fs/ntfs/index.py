@@ -0,0 +1,236 @@
+from __future__ import annotations
+import struct
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+from .boot import NtfsBoot
+from .mft import DataAttr, _apply_fixup, _NS_RANK
+
+INDX_SIG = b"INDX"
+
+# Index entry flags
+IE_SUBNODE = 0x01
+IE_LAST = 0x02
+
+FN_KEY_MIN = 66  # FILE_NAME cố định 66 byte + tên UTF-16
+FILE_ATTR_DIRECTORY = 0x10000000  # bit "is directory" trong flags của $FILE_NAME
+
+# Khoảng FILETIME hợp lệ để lọc rác khi carve slack: 1980-01-01 .. 2100-01-01
+_FT_MIN = 119600064000000000
+_FT_MAX = 157469184000000000
+
+BATCH_BYTES = 32 * 1024 * 1024
+CHUNK = 4 * 1024 * 1024
+
+
+@dataclass
+class IndexEntry:
+    file_ref: Optional[int]  # record number (48 bit thấp); None nếu header entry đã bị ghi đè
+    seq: int
+    parent_ref: int
+    name: str
+    namespace: int
+    created: int
+    modified: int
+    mft_modified: int
+    accessed: int
+    allocated_size: int
+    real_size: int
+    flags: int
+    dir_record: int = -1
+    in_slack: bool = False
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.flags & FILE_ATTR_DIRECTORY)
+
+    @property
+    def size(self) -> int:
+        return self.real_size
+
+
+class SeqMap:
+    """record -> (sequence, in_use) dạng mảng gọn, để đối chiếu entry trong index với MFT
+    mà không giữ lại MftRecord."""
+
+    def __init__(self) -> None:
+        self._seq = array('H')
+        self._state = bytearray()  # 0 = chưa thấy, 1 = đã xóa, 2 = đang dùng
+
+    def add(self, rid: int, seq: int, in_use: bool) -> None:
+        if rid >= len(self._state):
+            grow = rid + 1 - len(self._state)
+            self._seq.extend([0] * grow)
+            self._state.extend(bytes(grow))
+        self._seq[rid] = seq
+        self._state[rid] = 2 if in_use else 1
+
+    def covers(self, ref: int, seq: int) -> bool:
+        """True nếu MFT vẫn còn mô tả đúng file mà entry trỏ tới (không cần báo lại)."""
+        if ref >= len(self._state) or not self._state[ref]:
+            return False
+        cur = self._seq[ref]
+        if cur == seq:
+            return True
+        # NTFS tăng sequence khi xóa: record đã xóa mang seq+1 vẫn là chính file đó
+        return self._state[ref] == 1 and cur == ((seq + 1) & 0xFFFF)
+
+
+def _parse_fn_key(buf, o: int, end: int, strict: bool) -> Optional[Tuple]:
+    if o + FN_KEY_MIN > end:
+        return None
+    name_len = buf[o + 64]
+    ns = buf[o + 65]
+    if o + FN_KEY_MIN + name_len * 2 > end:
+        return None
+    parent_raw, c, m, mm, a, alloc, real, flags = struct.unpack_from('<QQQQQQQI', buf, o)
+    if strict:
+        if name_len == 0 or ns > 3:
+            return None
+        if not (_FT_MIN <= c <= _FT_MAX and _FT_MIN <= m <= _FT_MAX and _FT_MIN <= mm <= _FT_MAX):
+            return None
+        if alloc < real or (parent_raw & 0xFFFFFFFFFFFF) > 0xFFFFFFFF:
+            return None
+    try:
+        name = bytes(buf[o + 66:o + 66 + name_len * 2]).decode('utf-16le')
+    except UnicodeDecodeError:
+        return None
+    if strict and (not name or any(ch < ' ' or ch in '/\\' for ch in name)):
+        return None
+    return (parent_raw & 0xFFFFFFFFFFFF, name, ns, c, m, mm, a, alloc, real, flags)
+
+
+def _make_entry(ref_raw: Optional[int], key: Tuple, in_slack: bool) -> IndexEntry:
+    parent, name, ns, c, m, mm, a, alloc, real, flags = key
+    return IndexEntry(
+        file_ref=(ref_raw & 0xFFFFFFFFFFFF) if ref_raw is not None else None,
+        seq=(ref_raw >> 48) if ref_raw is not None else 0,
+        parent_ref=parent, name=name, namespace=ns,
+        created=c, modified=m, mft_modified=mm, accessed=a,
+        allocated_size=alloc, real_size=real, flags=flags, in_slack=in_slack,
+    )
+
+
+def iter_node_entries(buf, hdr_ofs: int) -> Iterator[IndexEntry]:
+    """Duyệt các entry hợp lệ của một index node (INDEX_ROOT hoặc INDX) từ index header."""
+    entries_ofs, index_len = struct.unpack_from('<II', buf, hdr_ofs)
+    o = hdr_ofs + entries_ofs
+    end = min(hdr_ofs + index_len, len(buf))
+    while o + 16 <= end:
+        ref_raw, elen, klen, eflags = struct.unpack_from('<QHHI', buf, o)
+        if eflags & IE_LAST or elen < 16:
+            break
+        key = _parse_fn_key(buf, o + 16, o + 16 + klen, strict=False) if klen >= FN_KEY_MIN else None
+        if key is not None:
+            yield _make_entry(ref_raw, key, False)
+        o += elen
+
+
+def iter_index_root_entries(index_root: bytes) -> Iterator[IndexEntry]:
+    if len(index_root) < 32:
+        return iter(())
+    return iter_node_entries(index_root, 16)
+
+
+def carve_slack(buf, start: int, end: int) -> Iterator[IndexEntry]:
+    """Carve các FILE_NAME key còn sót trong vùng slack [start, end) của một INDX block.
+    Entry luôn căn 8 byte nên chỉ thử ở các offset bội 8."""
+    o = (start + 7) & ~7
+    while o + 16 + FN_KEY_MIN <= end:
+        key = _parse_fn_key(buf, o + 16, end, strict=True)
+        if key is None:
+            o += 8
+            continue
+        ref_raw, elen, klen = struct.unpack_from('<QHH', buf, o)
+        name_len = len(key[1])
+        # header entry có thể đã bị ghi đè một phần → chỉ tin file_ref nếu độ dài khớp
+        header_ok = klen == FN_KEY_MIN + 2 * name_len and 16 + klen <= elen <= 16 + klen + 16
+        yield _make_entry(ref_raw if header_ok else None, key, True)
+        o += (16 + FN_KEY_MIN + 2 * name_len + 7) & ~7
+
+
+def parse_index_block(block: bytearray, sector_size: int, slack: bool = True) -> Tuple[List[IndexEntry], List[IndexEntry]]:
+    """Trả (entry hợp lệ, entry carve từ slack) của một INDX block; ([], []) nếu hỏng."""
+    if not _apply_fixup(block, sector_size, INDX_SIG):
+        return [], []
+    entries = list(iter_node_entries(block, 24))
+    if not slack:
+        return entries, []
+    _, index_len, alloc_len = struct.unpack_from('<III', block, 24)
+    end = min(24 + alloc_len, len(block))
+    return entries, list(carve_slack(block, 24 + index_len, end))
+
+
+def _read_batch(dev, boot: NtfsBoot, batch: List[Tuple[int, DataAttr]]) -> Iterator[Tuple[int, bytearray]]:
+    cs = boot.cluster_size
+    # gom extent của cả batch, sắp theo LCN và gộp extent liền kề thành lần đọc lớn
+    extents = []  # (lcn, clusters, dir_idx, vcn)
+    for di, (_, attr) in enumerate(batch):
+        vcn = 0
+        for lcn, length in attr.iter_runs():
+            if lcn > 0 and length > 0:
+                extents.append((lcn, length, di, vcn))
+            vcn += length
+    extents.sort()
+    streams = [bytearray(sum(attr.run_pairs[1::2]) * cs) for _, attr in batch]
+    i = 0
+    while i < len(extents):
+        lcn0 = extents[i][0]
+        j = i + 1
+        end = lcn0 + extents[i][1]
+        while j < len(extents) and extents[j][0] == end and (end - lcn0) * cs < CHUNK:
+            end += extents[j][1]
+            j += 1
+        data = dev.read(boot.lcn_to_off(lcn0), (end - lcn0) * cs)
+        for lcn, ln, di, vcn in extents[i:j]:
+            rel = (lcn - lcn0) * cs
+            streams[di][vcn * cs:(vcn + ln) * cs] = data[rel:rel + ln * cs]
+        i = j
+    for (rid, _), st in zip(batch, streams):
+        yield rid, st
+
+
+def iter_index_streams(dev, boot: NtfsBoot, dirs: Iterable[Tuple[int, DataAttr]],
+                       batch_bytes: int = BATCH_BYTES) -> Iterator[Tuple[int, bytearray]]:
+    """Đọc toàn bộ $INDEX_ALLOCATION:$I30 của nhiều thư mục theo batch, mỗi batch đọc
+    theo thứ tự LCN tăng dần để tránh seek ngẫu nhiên. Trả (record thư mục, dữ liệu)."""
+    cs = boot.cluster_size
+    ordered = sorted((d for d in dirs if d[1].run_pairs),
+                     key=lambda d: next((lcn for lcn in d[1].run_pairs[0::2] if lcn > 0), 0))
+    batch: List[Tuple[int, DataAttr]] = []
+    size = 0
+    for rid, attr in ordered:
+        batch.append((rid, attr))
+        size += sum(attr.run_pairs[1::2]) * cs
+        if size >= batch_bytes:
+            yield from _read_batch(dev, boot, batch)
+            batch, size = [], 0
+    if batch:
+        yield from _read_batch(dev, boot, batch)
+
+
+def scan_index_slack(dev, boot: NtfsBoot, dirs: Iterable[Tuple[int, DataAttr]],
+                     known: SeqMap | None = None) -> Iterator[IndexEntry]:
+    """Tìm file đã xóa còn dấu vết trong slack của index thư mục ($I30).
+    Bỏ các entry mà MFT vẫn mô tả (theo `known`) và trùng lặp giữa các bản sao trong slack;
+    với cùng một file ưu tiên tên Win32 hơn tên DOS 8.3."""
+    bsize = boot.index_buffer_size
+    best: dict = {}
+    for dir_rid, stream in iter_index_streams(dev, boot, dirs):
+        for o in range(0, len(stream) - bsize + 1, bsize):
+            block = stream[o:o + bsize]
+            _, carved = parse_index_block(block, boot.sector_size)
+            for e in carved:
+                if e.file_ref is not None and known is not None and known.covers(e.file_ref, e.seq):
+                    continue
+                e.dir_record = dir_rid
+                if e.file_ref is not None:
+                    k = (e.file_ref, e.seq)
+                else:
+                    k = (e.parent_ref, e.name.lower())
+                prev = best.get(k)
+                if prev is None or _NS_RANK.get(e.namespace, 3) < _NS_RANK.get(prev.namespace, 3):
+                    best[k] = e
+    # entry mất header chỉ giữ lại nếu chưa có bản nào cùng (parent, tên) có file_ref
+    named = {(e.parent_ref, e.name.lower()) for e in best.values() if e.file_ref is not None}
+    return (e for e in best.values() if e.file_ref is not None or (e.parent_ref, e.name.lower()) not in named)
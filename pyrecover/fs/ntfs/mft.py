@@ -1,27 +1,93 @@
 from __future__ import annotations
-import struct
+import struct, time
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple, Iterable
+from typing import Callable, Iterator, List, Optional, Tuple, Iterable, NamedTuple
 from .boot import NtfsBoot
+from .runlist import SPARSE_LCN, decode_runs
 
 FILE_SIG = b"FILE"
 
+ATTR_STANDARD_INFORMATION = 0x10
+ATTR_FILE_NAME = 0x30
+ATTR_DATA = 0x80
+ATTR_INDEX_ROOT = 0x90
+ATTR_INDEX_ALLOCATION = 0xA0
+
+I30 = '$I30'  # index tên file của thư mục
+
+# $FILE_NAME namespace
+FN_POSIX = 0
+FN_WIN32 = 1
+FN_DOS = 2
+FN_WIN32_DOS = 3
+# Thứ tự ưu tiên khi record có nhiều $FILE_NAME: tên Win32 (dài) trước, 8.3 sau cùng
+_NS_RANK = {FN_WIN32: 0, FN_WIN32_DOS: 0, FN_POSIX: 1, FN_DOS: 2}
+
 @dataclass
 class DataRun:
     lcn: int
     length: int  # clusters
 
+    @property
+    def is_sparse(self) -> bool:
+        return self.lcn == SPARSE_LCN
+
 @dataclass
 class FileNameAttr:
     parent_ref: int
     name: str
     flags: int
+    namespace: int = FN_WIN32
+
+@dataclass
+class StdInfoAttr:
+    # FILETIME: số khoảng 100ns tính từ 1601-01-01 UTC
+    created: int
+    modified: int
+    mft_modified: int
+    accessed: int
+    flags: int
 
 @dataclass
 class DataAttr:
     non_resident: bool
-    runs: List[DataRun] = field(default_factory=list)
+    # runlist dạng gọn [lcn0, len0, lcn1, len1, ...] (xem runlist.decode_runs)
+    run_pairs: array = field(default_factory=lambda: array('q'))
     resident_data: bytes | None = None
+    name: str = ''  # '' = stream chính, khác rỗng = ADS
+    real_size: int = 0
+    allocated_size: int = 0
+    initialized_size: int = 0
+
+    @property
+    def runs(self) -> List[DataRun]:
+        p = self.run_pairs
+        return [DataRun(lcn=p[i], length=p[i+1]) for i in range(0, len(p), 2)]
+
+    @property
+    def run_count(self) -> int:
+        return len(self.run_pairs) // 2
+
+    def iter_runs(self) -> Iterator[Tuple[int, int]]:
+        """(lcn, length) không tạo DataRun — dùng ở vòng lặp nóng."""
+        p = self.run_pairs
+        return zip(p[0::2], p[1::2])
+
+class RecordSummary(NamedTuple):
+    """Dạng gọn của một record: đủ để dựng path, sắp xếp và lọc theo ngày/kích thước
+    mà không phải giữ lại MftRecord hay đọc lại đĩa."""
+    name: str
+    parent: Optional[int]
+    is_dir: bool
+    in_use: bool
+    size: int
+    allocated: int
+    created: int
+    modified: int
+    mft_modified: int
+    accessed: int
+    streams: Tuple[str, ...] = ()
 
 @dataclass
 class MftRecord:
@@ -31,41 +97,100 @@ class MftRecord:
     base_ref: Optional[int]
     fn: Optional[FileNameAttr]
     data: Optional[DataAttr]
+    si: Optional[StdInfoAttr] = None
+    streams: List[DataAttr] = field(default_factory=list)  # các $DATA có tên (ADS)
+    seq: int = 0  # sequence number trong header (tăng mỗi lần record bị xóa/tái sử dụng)
+    lsn: int = 0  # $LogFile sequence number của lần sửa record gần nhất
+    index_root: bytes | None = None        # value của $INDEX_ROOT:$I30 (thư mục)
+    index_alloc: Optional[DataAttr] = None  # $INDEX_ALLOCATION:$I30 (thư mục)
 
+    @property
+    def size(self) -> int:
+        return self.data.real_size if self.data else 0
 
-def _apply_fixup(record: bytearray, sector_size: int) -> bool:
-    # FILE record header: offset 4: usa_ofs (2), offset 6: usa_count (2)
-    if record[0:4] != FILE_SIG:
+    def summary(self) -> RecordSummary:
+        fn, si, data = self.fn, self.si, self.data
+        return RecordSummary(
+            name=fn.name if fn else f"Unknown_Record_{self.record_num}",
+            parent=fn.parent_ref if fn else None,
+            is_dir=self.is_dir,
+            in_use=self.in_use,
+            size=data.real_size if data else 0,
+            allocated=data.allocated_size if data else 0,
+            created=si.created if si else 0,
+            modified=si.modified if si else 0,
+            mft_modified=si.mft_modified if si else 0,
+            accessed=si.accessed if si else 0,
+            streams=tuple(st.name for st in self.streams),
+        )
+
+
+def _apply_fixup(record: bytearray, sector_size: int, sig: bytes = FILE_SIG) -> bool:
+    # FILE/INDX header: offset 4: usa_ofs (2), offset 6: usa_count (2)
+    if record[0:4] != sig:
         return False
     usa_ofs, usa_count = struct.unpack_from('<HH', record, 4)
     if usa_ofs == 0 or usa_count == 0:
         return False
-    usn = struct.unpack_from('<H', record, usa_ofs)[0]
+    usn = record[usa_ofs:usa_ofs+2]
     # USA array entries (after the first USN) replace last 2 bytes of each sector
     count_sectors = usa_count - 1
+    if usa_ofs + 2 + 2*count_sectors > len(record) or count_sectors * sector_size > len(record):
+        return False
     for i in range(count_sectors):
         off = (i+1) * sector_size - 2
-        expected = record[off:off+2]
-        if expected != struct.pack('<H', usn):
+        if record[off:off+2] != usn:
             return False  # torn record
-        newv = struct.unpack_from('<H', record, usa_ofs + 2 + 2*i)[0]
-        record[off:off+2] = struct.pack('<H', newv)
+        u = usa_ofs + 2 + 2*i
+        record[off:off+2] = record[u:u+2]
     return True
 
 
-def _iter_attrs(buf: bytes, first_attr_ofs: int) -> Iterable[Tuple[int, bytes]]:
+def read_record_header(raw: bytes) -> Tuple[int, int, int] | None:
+    """(lsn, seq, flags) từ header FILE — không cần fixup (các trường nằm trong sector đầu),
+    đủ rẻ để quyết định bỏ qua record trước khi parse attribute."""
+    if len(raw) < 24 or raw[0:4] != FILE_SIG:
+        return None
+    lsn, seq, _, _, flags = struct.unpack_from('<QHHHH', raw, 8)
+    return lsn, seq, flags
+
+
+def _iter_attrs(buf, first_attr_ofs: int) -> Iterable[Tuple[int, memoryview]]:
+    # trả memoryview (không copy) — nơi nào cần giữ dữ liệu lâu thì tự bytes()
+    mv = memoryview(buf)
+    n = len(buf)
+    unpack = struct.unpack_from
     o = first_attr_ofs
-    while o + 8 <= len(buf):
-        atype = struct.unpack_from('<I', buf, o)[0]
+    while o + 8 <= n:
+        atype, alen = unpack('<II', buf, o)
         if atype == 0xFFFFFFFF:
             break
-        alen = struct.unpack_from('<I', buf, o+4)[0]
-        if alen == 0 or o + alen > len(buf):
+        if alen == 0 or o + alen > n:
             break
-        yield atype, buf[o:o+alen]
+        yield atype, mv[o:o+alen]
         o += alen
 
 
+def _attr_name(attr: bytes) -> str:
+    name_len = attr[9]
+    if not name_len:
+        return ''
+    name_ofs = struct.unpack_from('<H', attr, 10)[0]
+    return str(attr[name_ofs:name_ofs+name_len*2], 'utf-16le', 'replace')
+
+
+def _parse_stdinfo_attr(attr: bytes) -> StdInfoAttr | None:
+    if attr[8]:
+        return None
+    value_len = struct.unpack_from('<I', attr, 16)[0]
+    value_ofs = struct.unpack_from('<H', attr, 20)[0]
+    if value_len < 36 or value_ofs + 36 > len(attr):
+        return None
+    created, modified, mft_modified, accessed, flags = struct.unpack_from('<QQQQI', attr, value_ofs)
+    return StdInfoAttr(created=created, modified=modified, mft_modified=mft_modified,
+                       accessed=accessed, flags=flags)
+
+
 def _parse_filename_attr(attr: bytes) -> FileNameAttr | None:
     # Resident value starts at value_offset
     non_resident = attr[8]
@@ -79,58 +204,48 @@ def _parse_filename_attr(attr: bytes) -> FileNameAttr | None:
     parent_ref = struct.unpack_from('<Q', v, 0)[0] & ((1<<48)-1)  # low 48 bits
     name_len = v[64]
     name_ns  = v[65]
-    name = v[66:66+name_len*2].decode('utf-16le', errors='replace')
+    name = str(v[66:66+name_len*2], 'utf-16le', 'replace')
     flags = struct.unpack_from('<I', v, 56)[0]
-    return FileNameAttr(parent_ref=parent_ref, name=name, flags=flags)
+    return FileNameAttr(parent_ref=parent_ref, name=name, flags=flags, namespace=name_ns)
 
 
-def _decode_mapping_pairs(mp: bytes) -> List[DataRun]:
-    runs: List[DataRun] = []
-    i = 0
-    lcn = 0
-    while i < len(mp):
-        header = mp[i]
-        i += 1
-        if header == 0:
-            break
-        size_len = header & 0x0F
-        off_len  = (header >> 4) & 0x0F
-        if size_len == 0:
-            break
-        run_len = int.from_bytes(mp[i:i+size_len], 'little', signed=False)
-        i += size_len
-        run_off_bytes = mp[i:i+off_len]
-        i += off_len
-        # sign-extend the offset
-        if off_len == 0:
-            lcn_delta = 0
-        else:
-            sign = 1 << (8*off_len - 1)
-            val = int.from_bytes(run_off_bytes, 'little', signed=False)
-            if val & sign:
-                val = val - (1 << (8*off_len))
-            lcn_delta = val
-        lcn += lcn_delta
-        runs.append(DataRun(lcn=lcn, length=run_len))
-    return runs
+def _decode_mapping_pairs(mp) -> List[DataRun]:
+    pairs = decode_runs(mp)
+    return [DataRun(lcn=pairs[i], length=pairs[i+1]) for i in range(0, len(pairs), 2)]
 
 
 def _parse_data_attr(attr: bytes) -> DataAttr | None:
     non_resident = attr[8]
+    name = _attr_name(attr)
     if not non_resident:
         value_len = struct.unpack_from('<I', attr, 16)[0]
         value_ofs = struct.unpack_from('<H', attr, 20)[0]
-        data = attr[value_ofs:value_ofs+value_len]
-        return DataAttr(non_resident=False, resident_data=data)
+        data = bytes(attr[value_ofs:value_ofs+value_len])
+        n = len(data)
+        return DataAttr(non_resident=False, resident_data=data, name=name,
+                        real_size=n, allocated_size=n, initialized_size=n)
     # Non-resident
+    if len(attr) < 64:
+        return None
     mapping_ofs = struct.unpack_from('<H', attr, 32)[0]
-    data_size   = struct.unpack_from('<Q', attr, 48)[0]
-    mp = attr[mapping_ofs:]
-    runs = _decode_mapping_pairs(mp)
-    return DataAttr(non_resident=True, runs=runs)
+    alloc_size, data_size, init_size = struct.unpack_from('<QQQ', attr, 40)
+    return DataAttr(non_resident=True, run_pairs=decode_runs(attr[mapping_ofs:]), name=name, real_size=data_size,
+                    allocated_size=alloc_size, initialized_size=init_size)
+
+
+def _lowest_vcn(attr: bytes) -> int:
+    return struct.unpack_from('<Q', attr, 16)[0] if attr[8] else 0
 
 
-def parse_mft_record(raw: bytes, sector_size: int) -> MftRecord | None:
+# parse_mft_record(accept=...) trả FILTERED khi accept() loại record: khác None (record vô hiệu)
+FILTERED = object()
+
+
+def parse_mft_record(raw: bytes, sector_size: int,
+                     accept: Callable[[int, Optional[FileNameAttr], Optional[StdInfoAttr]], bool] | None = None
+                     ) -> MftRecord | None:
+    """accept(flags, fn, si): gọi khi đã qua $STANDARD_INFORMATION / $FILE_NAME (attribute sắp
+    theo type), trước khi parse $DATA / index; False → trả FILTERED, bỏ phần còn lại của record."""
     if len(raw) < 48:
         return None
     buf = bytearray(raw)
@@ -138,6 +253,7 @@ def parse_mft_record(raw: bytes, sector_size: int) -> MftRecord | None:
         return None
     # basic header
     first_attr_ofs = struct.unpack_from('<H', buf, 20)[0]
+    lsn, seq = struct.unpack_from('<QH', buf, 8)
     flags = struct.unpack_from('<H', buf, 22)[0]
     in_use = bool(flags & 0x0001)
     is_dir = bool(flags & 0x0002)
@@ -145,13 +261,56 @@ def parse_mft_record(raw: bytes, sector_size: int) -> MftRecord | None:
     base_ref = (base_ref & ((1<<48)-1)) if base_ref else None
 
     fn: FileNameAttr | None = None
+    si: StdInfoAttr | None = None
     data: DataAttr | None = None
+    streams: List[DataAttr] = []
+    index_root: bytes | None = None
+    index_alloc: DataAttr | None = None
 
+    # Một lượt duyệt attribute duy nhất: lấy mọi thứ cần cho liệt kê/sắp xếp/lọc
+    check = accept is not None
     for atype, abuf in _iter_attrs(buf, first_attr_ofs):
-        if atype == 0x30:  # FILE_NAME
-            fn = _parse_filename_attr(abuf) or fn
-        elif atype == 0x80:  # DATA
-            data = _parse_data_attr(abuf) or data
+        if check and atype > ATTR_FILE_NAME:
+            if not accept(flags, fn, si):
+                return FILTERED
+            check = False
+        if atype == ATTR_STANDARD_INFORMATION:
+            si = _parse_stdinfo_attr(abuf) or si
+        elif atype == ATTR_FILE_NAME:
+            cand = _parse_filename_attr(abuf)
+            if cand is not None and (fn is None or
+                                     _NS_RANK.get(cand.namespace, 3) < _NS_RANK.get(fn.namespace, 3)):
+                fn = cand
+        elif atype == ATTR_DATA:
+            d = _parse_data_attr(abuf)
+            if d is None:
+                continue
+            if d.name:
+                prev = next((x for x in streams if x.name == d.name), None)
+                if prev is None:
+                    streams.append(d)
+                elif prev.non_resident and d.non_resident and _lowest_vcn(abuf) > 0:
+                    # extent tiếp theo của ADS này: gộp vào entry đã có, như stream chính
+                    prev.run_pairs.extend(d.run_pairs)
+            elif data is None:
+                data = d
+            elif data.non_resident and d.non_resident and _lowest_vcn(abuf) > 0:
+                # extent tiếp theo của stream chính trong cùng record
+                data.run_pairs.extend(d.run_pairs)
+        elif atype == ATTR_INDEX_ROOT:
+            if not abuf[8] and _attr_name(abuf) == I30:
+                value_len = struct.unpack_from('<I', abuf, 16)[0]
+                value_ofs = struct.unpack_from('<H', abuf, 20)[0]
+                index_root = bytes(abuf[value_ofs:value_ofs+value_len])
+        elif atype == ATTR_INDEX_ALLOCATION:
+            if abuf[8] and _attr_name(abuf) == I30:
+                d = _parse_data_attr(abuf)
+                if d is not None and index_alloc is None:
+                    index_alloc = d
+                elif d is not None and _lowest_vcn(abuf) > 0:
+                    index_alloc.run_pairs.extend(d.run_pairs)
+    if check and not accept(flags, fn, si):
+        return FILTERED
 
     return MftRecord(
         record_num=None,
@@ -160,24 +319,106 @@ def parse_mft_record(raw: bytes, sector_size: int) -> MftRecord | None:
         base_ref=base_ref,
         fn=fn,
         data=data,
+        si=si,
+        streams=streams,
+        seq=seq,
+        lsn=lsn,
+        index_root=index_root,
+        index_alloc=index_alloc,
     )
 
 
-def iter_mft_records(dev, boot: NtfsBoot, max_records: int = 2_000_000) -> Iterable[Tuple[int, MftRecord]]:
+def read_mft_record(dev, boot: NtfsBoot, idx: int) -> MftRecord | None:
+    """Đọc và parse đúng một record theo số thứ tự (cùng giả định MFT liên tục như
+    iter_mft_records) — dùng cho quét có mục tiêu thay vì duyệt cả MFT."""
+    rec_size = boot.mft_record_size
+    raw = dev.read(boot.lcn_to_off(boot.mft_lcn) + idx * rec_size, rec_size)
+    rec = parse_mft_record(raw, boot.sector_size)
+    if rec is not None:
+        rec.record_num = idx
+    return rec
+
+
+def _iter_raw_records(dev, mft_off: int, rec_size: int, max_records: int,
+                      batch: int, start: int = 0) -> Iterable[Tuple[int, bytes | None]]:
+    """(idx, raw) liên tiếp; đọc `batch` record mỗi lần. Lần đọc gộp lỗi (chạm cuối device,
+    sector hỏng...) thì đọc lại từng record của lô đó: record không đọc được trả raw=None
+    rồi đọc tiếp, chỉ dừng khi ra ngoài device (ValueError)."""
+    for first in range(start, max_records, batch):
+        n = min(batch, max_records - first)
+        try:
+            buf = dev.read(mft_off + first * rec_size, n * rec_size)
+        except Exception:
+            for idx in range(first, first + n):
+                try:
+                    raw = dev.read(mft_off + idx * rec_size, rec_size)
+                except ValueError:
+                    return
+                except Exception:
+                    raw = None
+                yield idx, raw
+            continue
+        for k in range(n):
+            yield first + k, buf[k * rec_size:(k + 1) * rec_size]
+
+
+def iter_mft_records(dev, boot: NtfsBoot, max_records: int = 2_000_000,
+                     skip: Callable[[int, int, int, int], bool] | None = None,
+                     stats=None, batch: int | None = None, start: int = 0,
+                     accept: Callable[[int, Optional[FileNameAttr], Optional[StdInfoAttr]], bool] | None = None
+                     ) -> Iterable[Tuple[int, MftRecord]]:
     """Duyệt MFT thô: đọc liên tiếp các record có kích thước boot.mft_record_size.
     *Heuristic*: dừng khi gặp chuỗi dài record vô hiệu.
+    skip(idx, lsn, seq, flags) -> True: bỏ qua record ngay sau khi đọc header, trước khi
+    apply fixup / parse attribute (dùng cho quét lại tăng dần).
+    stats: core.stats.ScanStats — đếm record và đo thời gian parse (stage 'mft.parse').
+    batch: số record mỗi lần đọc (một read lớn rẻ hơn nhiều read 1 KiB, nhất là khi
+    device đi qua IoScheduler); mặc định theo dev.read_size (64 KiB nếu device không có).
+    start: record bắt đầu (chạy tiếp từ checkpoint, xem scan.checkpoint).
+    accept(flags, fn, si) -> False: bỏ qua record sau khi parse tên, trước khi giải mã $DATA
+    (xem parse_mft_record; đếm 'records_filtered').
     """
     rec_size = boot.mft_record_size
+    if batch is None:
+        batch = getattr(dev, 'read_size', 0) // rec_size or 64
     mft_off = boot.lcn_to_off(boot.mft_lcn)
+    # device bọc ResilientDevice: record nằm trên sector hỏng được đọc ra 0 → không tính
+    # vào chuỗi record vô hiệu (vùng hỏng lớn trong MFT không phải là hết MFT)
+    unreadable = getattr(dev, 'unreadable', None)
     bad = 0
-    for idx in range(max_records):
-        off = mft_off + idx * rec_size
-        try:
-            raw = dev.read(off, rec_size)
-        except Exception:
-            break
-        rec = parse_mft_record(raw, boot.sector_size)
+    for idx, raw in _iter_raw_records(dev, mft_off, rec_size, max_records, max(1, batch), start):
+        if raw is None:
+            # record nằm trên sector hỏng (device không bọc ResilientDevice): bỏ qua, đọc tiếp
+            if stats is not None:
+                stats.count('records_unreadable')
+            bad += 1
+            if bad > 1024:
+                break
+            continue
+        if skip is not None:
+            hdr = read_record_header(raw)
+            if hdr is not None and skip(idx, *hdr):
+                bad = 0
+                if stats is not None:
+                    stats.count('records_skipped')
+                continue
+        if stats is not None:
+            t0 = time.perf_counter()
+            rec = parse_mft_record(raw, boot.sector_size, accept)
+            stats.add_time('mft.parse', time.perf_counter() - t0)
+            stats.count('records' if rec is not None else 'records_invalid')
+        else:
+            rec = parse_mft_record(raw, boot.sector_size, accept)
+        if rec is FILTERED:
+            bad = 0
+            if stats is not None:
+                stats.count('records_filtered')
+            continue
         if rec is None:
+            if unreadable is not None and unreadable(mft_off + idx * rec_size, rec_size):
+                if stats is not None:
+                    stats.count('records_unreadable')
+                continue
             bad += 1
             if bad > 1024:
                 break
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import struct
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+from .boot import NtfsBoot
+from .mft import DataAttr, read_mft_record, SPARSE_LCN
+from .index import iter_index_root_entries, iter_index_streams, parse_index_block
+
+EXTEND_RECORD = 11   # $Extend
+USNJRNL_NAME = '$UsnJrnl'
+USN_STREAM = '$J'
+
+# USN_REASON_*
+USN_REASON_DATA_OVERWRITE = 0x00000001
+USN_REASON_DATA_EXTEND = 0x00000002
+USN_REASON_DATA_TRUNCATION = 0x00000004
+USN_REASON_FILE_CREATE = 0x00000100
+USN_REASON_FILE_DELETE = 0x00000200
+USN_REASON_RENAME_OLD_NAME = 0x00001000
+USN_REASON_RENAME_NEW_NAME = 0x00002000
+USN_REASON_CLOSE = 0x80000000
+
+REASON_NAMES = {
+    USN_REASON_DATA_OVERWRITE: 'DATA_OVERWRITE',
+    USN_REASON_DATA_EXTEND: 'DATA_EXTEND',
+    USN_REASON_DATA_TRUNCATION: 'DATA_TRUNCATION',
+    USN_REASON_FILE_CREATE: 'FILE_CREATE',
+    USN_REASON_FILE_DELETE: 'FILE_DELETE',
+    USN_REASON_RENAME_OLD_NAME: 'RENAME_OLD_NAME',
+    USN_REASON_RENAME_NEW_NAME: 'RENAME_NEW_NAME',
+    USN_REASON_CLOSE: 'CLOSE',
+}
+DELETE_RENAME_MASK = USN_REASON_FILE_DELETE | USN_REASON_RENAME_OLD_NAME | USN_REASON_RENAME_NEW_NAME
+
+PAGE = 4096  # journal ghi theo page; phần cuối page không đủ chỗ cho record được đệm 0
+CHUNK = 4 * 1024 * 1024
+
+_V2 = struct.Struct('<IHHQQqqIIII HH')
+_V3 = struct.Struct('<IHH16s16sqqIIII HH')
+
+
+@dataclass
+class UsnEvent:
+    usn: int
+    timestamp: int  # FILETIME
+    reason: int
+    file_ref: int   # record number (48 bit thấp)
+    file_seq: int
+    parent_ref: int
+    name: str
+    attributes: int
+
+    @property
+    def reasons(self) -> List[str]:
+        return [n for bit, n in REASON_NAMES.items() if self.reason & bit]
+
+
+def find_usn_journal(dev, boot: NtfsBoot) -> Optional[DataAttr]:
+    """Tìm stream $Extend\\$UsnJrnl:$J (các extent trong record đã được parse_mft_record gộp);
+    None nếu volume không bật change journal. RuntimeError nếu runlist không phủ hết real_size
+    (extent nằm ở record mở rộng qua $ATTRIBUTE_LIST): không đọc một journal bị cắt cụt."""
+    ext = read_mft_record(dev, boot, EXTEND_RECORD)
+    if ext is None:
+        return None
+    entries = list(iter_index_root_entries(ext.index_root)) if ext.index_root else []
+    if ext.index_alloc is not None:
+        bsize = boot.index_buffer_size
+        for _, stream in iter_index_streams(dev, boot, [(EXTEND_RECORD, ext.index_alloc)]):
+            for o in range(0, len(stream) - bsize + 1, bsize):
+                valid, _ = parse_index_block(stream[o:o + bsize], boot.sector_size, slack=False)
+                entries.extend(valid)
+    for e in entries:
+        if e.name == USNJRNL_NAME and e.file_ref is not None:
+            rec = read_mft_record(dev, boot, e.file_ref)
+            if rec is None:
+                return None
+            stream = next((st for st in rec.streams if st.name == USN_STREAM and st.non_resident), None)
+            if stream is not None:
+                covered = sum(length for _, length in stream.iter_runs()) * boot.cluster_size
+                if covered < stream.real_size:
+                    raise RuntimeError(f"USN journal runlist is incomplete: covers {covered} of "
+                                       f"{stream.real_size} bytes (extents in other MFT records)")
+            return stream
+    return None
+
+
+def _allocated_extents(stream: DataAttr) -> List[Tuple[int, int, int]]:
+    """(vcn, lcn, clusters) của các run có dữ liệu thật — run sparse bị bỏ qua, không đọc."""
+    out = []
+    vcn = 0
+    for lcn, length in stream.iter_runs():
+        if lcn != SPARSE_LCN and length > 0:
+            out.append((vcn, lcn, length))
+        vcn += length
+    return out
+
+
+def decode_usn_records(buf, base_usn: int = 0) -> Iterator[UsnEvent]:
+    """Giải mã hàng loạt USN_RECORD_V2/V3 trong một buffer đọc liền (bội số PAGE)."""
+    mv = memoryview(buf)
+    n = len(buf)
+    o = 0
+    while o + 8 <= n:
+        rlen, major = struct.unpack_from('<IH', buf, o)
+        if rlen == 0:
+            o = (o // PAGE + 1) * PAGE  # phần đệm cuối page
+            continue
+        if rlen & 7 or rlen < 64 or o + rlen > n or major not in (2, 3):
+            o += 8
+            continue
+        if major == 2:
+            (_, _, _, fref, pref, usn, ts, reason, _, _, attrs,
+             name_len, name_ofs) = _V2.unpack_from(buf, o)
+        else:
+            if rlen < _V3.size:
+                o += 8
+                continue
+            (_, _, _, fref128, pref128, usn, ts, reason, _, _, attrs,
+             name_len, name_ofs) = _V3.unpack_from(buf, o)
+            fref = int.from_bytes(fref128[:8], 'little')
+            pref = int.from_bytes(pref128[:8], 'little')
+        if name_ofs + name_len > rlen or usn != base_usn + o:
+            o += 8
+            continue
+        name = bytes(mv[o + name_ofs:o + name_ofs + name_len]).decode('utf-16le', errors='replace')
+        yield UsnEvent(usn=usn, timestamp=ts, reason=reason,
+                       file_ref=fref & 0xFFFFFFFFFFFF, file_seq=fref >> 48,
+                       parent_ref=pref & 0xFFFFFFFFFFFF, name=name, attributes=attrs)
+        o += rlen
+
+
+def _first_timestamp(dev, off: int, usn: int) -> Optional[int]:
+    for ev in decode_usn_records(dev.read(off, PAGE), usn):
+        return ev.timestamp
+    return None
+
+
+def _seek_since(dev, boot: NtfsBoot, extents, since: int) -> int:
+    """Tìm nhị phân (theo page) vị trí USN đầu tiên có timestamp >= since.
+    Journal ghi tuần tự nên timestamp tăng theo USN; mỗi bước chỉ đọc một page."""
+    cs = boot.cluster_size
+    pages = []  # (page bắt đầu toàn cục, số page, offset đĩa, usn đầu extent)
+    total = 0
+    for vcn, lcn, ln in extents:
+        npages = ln * cs // PAGE
+        pages.append((total, npages, boot.lcn_to_off(lcn), vcn * cs))
+        total += npages
+
+    def locate(g: int) -> Tuple[int, int]:
+        for start, npages, off, usn in pages:
+            if start <= g < start + npages:
+                return off + (g - start) * PAGE, usn + (g - start) * PAGE
+        raise IndexError(g)
+
+    lo, hi = 0, total
+    while lo < hi:
+        mid = (lo + hi) // 2
+        ts = _first_timestamp(dev, *locate(mid))
+        if ts is not None and ts < since:
+            lo = mid + 1
+        else:
+            hi = mid
+    if total == 0:
+        return 0
+    # lùi một page: record đầu tiên >= since có thể nằm ở cuối page trước
+    return locate(max(0, lo - 1))[1]
+
+
+def iter_usn_events(dev, boot: NtfsBoot, stream: DataAttr, since: int | None = None,
+                    start_usn: int = 0, reason_mask: int = 0) -> Iterator[UsnEvent]:
+    """Đọc tuần tự $UsnJrnl:$J theo runlist: bỏ qua vùng sparse (phần journal đã bị cắt),
+    đọc phần còn lại theo khối lớn và giải mã hàng loạt.
+    since: FILETIME — dùng tìm nhị phân để bắt đầu gần đúng chỗ, không duyệt từ đầu.
+    reason_mask: chỉ trả event có ít nhất một bit reason trong mask (0 = tất cả)."""
+    cs = boot.cluster_size
+    extents = _allocated_extents(stream)
+    if since is not None and extents:
+        start_usn = max(start_usn, _seek_since(dev, boot, extents, since))
+    for vcn, lcn, ln in extents:
+        run_usn = vcn * cs
+        run_end = run_usn + ln * cs
+        if run_end <= start_usn:
+            continue
+        pos = max(run_usn, start_usn - start_usn % PAGE)
+        while pos < run_end:
+            n = min(CHUNK, run_end - pos)
+            buf = dev.read(boot.lcn_to_off(lcn) + (pos - run_usn), n)
+            for ev in decode_usn_records(buf, pos):
+                if ev.usn < start_usn:
+                    continue
+                if since is not None and ev.timestamp < since:
+                    continue
+                if reason_mask and not ev.reason & reason_mask:
+                    continue
+                yield ev
+            pos += n
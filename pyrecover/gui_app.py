@@ -5,8 +5,12 @@
 from __future__ import annotations
 import sys
 import os
+import time
 import ctypes
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 # --- Make sure project root is on sys.path so `import pyrecover...` works ---
@@ -18,17 +22,27 @@ if ROOT not in sys.path:
 
 # Back-end imports (use the code you already have)
 try:
-    from pyrecover.core.device_windows import DeviceWindows
+    from pyrecover.core.resilient import ResilientDevice
     from pyrecover.fs.ntfs.boot import parse_boot_sector, NtfsBoot
-    from pyrecover.fs.ntfs.mft import iter_mft_records, MftRecord
+    from pyrecover.fs.ntfs.mft import MftRecord, RecordSummary
+    from pyrecover.scan.incremental import (
+        MftSnapshot, ScanDelta, iter_incremental, default_snapshot_path, volume_key
+    )
+    from pyrecover.scan.checkpoint import ScanCheckpoint, default_checkpoint_path
+    from pyrecover.scan.paths import PathBuilder
+    from pyrecover.core.stats import ScanStats, instrument
+    from pyrecover.core.utils import filetime_to_datetime, datetime_to_filetime
+    from pyrecover.recover.preview import Preview, Previewer, PREVIEW_SIZE, decode_text, hexdump
 except Exception as e:
     raise SystemExit(f"❌ Could not import pyrecover modules: {e}\nMake sure `pyrecover/` folder is next to this file and contains __init__.py.")
 
-from PySide6.QtCore import Qt, QThread, Signal, Slot, QTimer
+from PySide6.QtCore import Qt, QThread, Signal, Slot, QTimer, QDate
+from PySide6.QtGui import QFontDatabase, QPixmap
 from PySide6.QtWidgets import (
     QApplication, QWidget, QMainWindow, QStackedWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QListWidget, QListWidgetItem, QProgressBar, QTreeWidget,
-    QTreeWidgetItem, QLineEdit, QSplitter, QMessageBox
+    QTreeWidgetItem, QLineEdit, QSplitter, QMessageBox, QSpinBox, QDateEdit, QCheckBox,
+    QComboBox, QPlainTextEdit
 )
 
 # ------------------------ Windows drive helpers ------------------------
@@ -70,62 +84,75 @@ def _get_roots() -> list[str]:
     print(f"Found roots: {roots}")
     return roots
 
+def probe_drive(root: str) -> Optional[DriveInfo]:
+    """Size/label of one volume root ('C:\\'); None if it cannot be queried.
+    Only cheap volume queries — no raw device is opened (that happens when a scan starts)."""
+    # lấy dung lượng bằng shutil (ổ không truy cập được sẽ ném OSError)
+    try:
+        usage = shutil.disk_usage(root)  # total, used, free (bytes)
+    except Exception:
+        return None
+
+    # label best‑effort
+    label = root
+    vol_name_buf = ctypes.create_unicode_buffer(256)
+    fs_name_buf  = ctypes.create_unicode_buffer(256)
+    sn = ctypes.c_ulong(0); mcl = ctypes.c_ulong(0); fs_flags = ctypes.c_ulong(0)
+    try:
+        GetVolumeInformationW(
+            ctypes.c_wchar_p(root),
+            vol_name_buf, 256,
+            ctypes.byref(sn), ctypes.byref(mcl), ctypes.byref(fs_flags),
+            fs_name_buf, 256
+        )
+        if vol_name_buf.value:
+            label = vol_name_buf.value
+    except Exception:
+        pass
+
+    # type chỉ để tham khảo
+    dtyp = GetDriveTypeW(ctypes.c_wchar_p(root))
+    letter = root[:2]                       # 'C:'
+    raw_path = r"\\.\{}".format(letter)     # đường dẫn raw để scan
+    return DriveInfo(
+        letter=letter,
+        path=raw_path,
+        label=label,
+        total=usage.total,
+        free=usage.free,
+        type=dtyp
+    )
+
+
 def list_fixed_drives() -> List[DriveInfo]:
     """Liệt kê mọi volume có thể truy cập (không phân biệt FIXED/REMOVABLE).
     Ổ nào không đọc được dung lượng sẽ tự bị bỏ qua."""
-    out: List[DriveInfo] = []
-    for root in _get_roots():
-        # lấy dung lượng bằng shutil (ổ không truy cập được sẽ ném OSError)
-        try:
-            usage = shutil.disk_usage(root)  # total, used, free (bytes)
-        except Exception:
-            continue
-
-        # label best‑effort
-        label = root
-        vol_name_buf = ctypes.create_unicode_buffer(256)
-        fs_name_buf  = ctypes.create_unicode_buffer(256)
-        sn = ctypes.c_ulong(0); mcl = ctypes.c_ulong(0); fs_flags = ctypes.c_ulong(0)
-        try:
-            GetVolumeInformationW(
-                ctypes.c_wchar_p(root),
-                vol_name_buf, 256,
-                ctypes.byref(sn), ctypes.byref(mcl), ctypes.byref(fs_flags),
-                fs_name_buf, 256
-            )
-            if vol_name_buf.value:
-                label = vol_name_buf.value
-        except Exception:
-            pass
-
-        # type chỉ để tham khảo
-        dtyp = GetDriveTypeW(ctypes.c_wchar_p(root))
-        letter = root[:2]                       # 'C:'
-        raw_path = r"\\.\{}".format(letter)     # đường dẫn raw để scan
-        
-        # Thêm tất cả ổ đĩa có thể truy cập được qua shutil
-        # (DeviceWindows test có thể fail nếu không có quyền Administrator)
-        try:
-            # Test xem có thể mở device không (optional)
-            test_dev = DeviceWindows(raw_path, readonly=True)
-            test_dev.close()
-            has_raw_access = True
-        except Exception:
-            # Không có quyền Administrator, nhưng vẫn hiển thị ổ đĩa
-            has_raw_access = False
-            
-        out.append(DriveInfo(
-            letter=letter,
-            path=raw_path,
-            label=label,
-            total=usage.total,
-            free=usage.free,
-            type=dtyp
-        ))
-            
-    return out
+    return [d for d in map(probe_drive, _get_roots()) if d is not None]
 
 
+def open_volume(device_path: str):
+    """Raw volume for reading; bad sectors read back as zeros (and are remembered) instead of
+    aborting. pywin32 is only imported here, so the window can paint before it loads."""
+    from pyrecover.core.device_windows import DeviceWindows
+    return ResilientDevice(DeviceWindows(device_path, readonly=True))
+
+
+class DriveProbeWorker(QThread):
+    """Probes every volume root on a thread pool: a slow/asleep drive (network, USB, optical)
+    only delays its own row instead of blocking the window."""
+    found = Signal(object)        # DriveInfo
+    finished_probe = Signal(int)  # number of drives found
+
+    def run(self):
+        roots = _get_roots()
+        n = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(roots)))) as pool:
+            for fut in as_completed([pool.submit(probe_drive, r) for r in roots]):
+                d = fut.result()
+                if d is not None:
+                    self.found.emit(d)
+                    n += 1
+        self.finished_probe.emit(n)
 
 
 # ------------------------ Scanner thread ------------------------
@@ -135,23 +162,62 @@ class ScanWorker(QThread):
     started_scan = Signal()
     finished_scan = Signal()
 
-    def __init__(self, device_path: str):
+    def __init__(self, device_path: str, incremental: bool = True, resume: bool = True):
         super().__init__()
         self.device_path = device_path
+        self.incremental = incremental  # reuse the previous scan's snapshot for unchanged records
+        self.resume = resume  # continue an interrupted scan of this volume from its checkpoint
         self._stop = False
         self._items: List[dict] = []
         self._update_counter = 0  # Counter for UI updates
-        # cache for path reconstruction
-        self._names: Dict[int, Tuple[str, Optional[int], bool]] = {}  # rec_id -> (name, parent, is_dir)
+        # cache for path reconstruction (compact per-record summary)
+        self._names: Dict[int, RecordSummary] = {}
+        self.stats = ScanStats()  # read/parse/path telemetry, see stats.snapshot()
 
     def stop(self):
         self._stop = True
 
+    @staticmethod
+    def _item(rec_id: int, summ: RecordSummary) -> dict:
+        return {
+            "record": rec_id,
+            "name": summ.name,
+            "path": None,           # fill later
+            "is_dir": summ.is_dir,
+            "status": "existing" if summ.in_use else "deleted",
+            "size": summ.size,
+            "allocated": summ.allocated,
+            "created": summ.created,    # FILETIME
+            "modified": summ.modified,  # FILETIME
+        }
+
+    def _open_checkpoint(self, vol) -> Tuple[Optional[ScanCheckpoint], int]:
+        """Checkpoint of this volume's scan (resumed if an unfinished one exists) and the record to start from.
+        Every scanned record is appended to the checkpoint's result file as [record, *RecordSummary]."""
+        key = ('ntfs',) + tuple(vol)   # same key as scan.checkpoint.device_key
+        path = default_checkpoint_path(key, 'gui-scan')
+        ck = ScanCheckpoint.load(path, 'gui-scan', key, {}) if self.resume else None
+        if ck is not None and not ck.done:
+            for row in ck.results():
+                summ = RecordSummary(*row[1:-1], tuple(row[-1]))
+                self._names[row[0]] = summ
+                self._items.append(self._item(row[0], summ))
+            self.status.emit(f"Resuming interrupted scan at record {ck.position} ({len(self._items)} records restored) ...")
+            return ck, ck.position
+        if ck is not None:
+            ck.close()
+        try:
+            return ScanCheckpoint.create(path, 'gui-scan', key, {}), 0
+        except OSError as e:
+            print(f"Could not create scan checkpoint: {e}")
+            return None, 0
+
     def run(self):
         self.started_scan.emit()
+        ck = None
         try:
             self.status.emit(f"Opening {self.device_path} ...")
-            dev = DeviceWindows(self.device_path, readonly=True)
+            dev = instrument(open_volume(self.device_path), self.stats)
             try:
                 boot = parse_boot_sector(dev.read(0, 512))
             except Exception as e:
@@ -160,11 +226,28 @@ class ScanWorker(QThread):
                 self.finished_scan.emit()
                 return
 
-            self.status.emit("Scanning $MFT ... (this may take a while)")
+            snap_path = default_snapshot_path(boot)
+            vol = volume_key(boot)
+            old_snap = MftSnapshot.load(snap_path, vol) if self.incremental else None
+            new_snap = MftSnapshot(vol)
+            delta = ScanDelta()
+            complete = True
+            ck, start = self._open_checkpoint(vol)
+            # a resumed scan was already reported by _open_checkpoint
+            if not start and old_snap is not None:
+                self.status.emit(f"Incremental scan of $MFT against previous snapshot ({len(old_snap.entries)} records) ...")
+            elif not start:
+                self.status.emit("Scanning $MFT ... (this may take a while)")
             record_count = 0
             total_processed = 0
-            for rec_id, rec in iter_mft_records(dev, boot):
+            for rec_id, summ, _parsed in iter_incremental(dev, boot, old_snap, new_snap, delta,
+                                                          stats=self.stats, start=start):
+                if ck is not None:
+                    ck.progress(rec_id)
                 if self._stop:
+                    complete = False
+                    if ck is not None:
+                        ck.save(rec_id)
                     break
                 
                 record_count += 1
@@ -172,41 +255,21 @@ class ScanWorker(QThread):
                 if record_count % 5000 == 0:  # Update less frequently for large scans
                     deleted_count = sum(1 for item in self._items if item["status"] == "deleted")
                     existing_count = len(self._items) - deleted_count
-                    self.status.emit(f"Scanned {record_count} records, found {len(self._items)} files ({deleted_count} deleted, {existing_count} existing)...")
+                    rate = self.stats.snapshot()["records_per_s"]
+                    self.status.emit(f"Scanned {record_count} records ({rate:.0f}/s), found {len(self._items)} files ({deleted_count} deleted, {existing_count} existing)...")
                 
                 # Always process the record, regardless of filename
-                if rec.fn is None:
-                    # Record without filename - might be deleted or system file
-                    name = f"Unknown_Record_{rec_id}"
-                    parent = None
-                    self._names[rec_id] = (name, parent, rec.is_dir)
-                else:
-                    # Record with filename
-                    name = rec.fn.name
-                    parent = rec.fn.parent_ref if rec.fn else None
-                    self._names[rec_id] = (name, parent, rec.is_dir)
+                # (records without $FILE_NAME get an "Unknown_Record_N" name)
+                self._names[rec_id] = summ
+                name = summ.name
 
-                # Determine basic size if resident
-                size = 0
-                try:
-                    if rec.data and rec.data.resident_data is not None:
-                        size = len(rec.data.resident_data)
-                    # Non-resident: we don't parse initialized size in this MVP
-                except Exception:
-                    pass
-
-                item = {
-                    "record": rec_id,
-                    "name": name,
-                    "path": None,           # fill later
-                    "is_dir": rec.is_dir,
-                    "status": "existing" if rec.in_use else "deleted",
-                    "size": size,
-                }
+                item = self._item(rec_id, summ)
                 self._items.append(item)
+                if ck is not None:
+                    ck.add([rec_id, *summ])
                 
                 # Emit files with smart batching to prevent UI blocking
-                if not rec.in_use:  # deleted files - emit immediately
+                if not summ.in_use:  # deleted files - emit immediately
                     self.found.emit(item)
                     # Debug logging
                     if len(self._items) % 1000 == 0:  # Log every 1000th deleted file
@@ -220,32 +283,31 @@ class ScanWorker(QThread):
                 # Allow large scans but with better memory management
                 if len(self._items) > 500000:  # Increase limit to 500k files for thorough scan
                     self.status.emit(f"Stopping scan: Found {len(self._items)} files (limit reached)")
+                    complete = False
+                    if ck is not None:
+                        ck.save(rec_id + 1)
                     break
 
+            if ck is not None:
+                if complete:
+                    ck.discard()   # the snapshot below (or the next scan) replaces it
+                else:
+                    ck.close()
+            # a resumed scan's new_snap only covers records >= start: keep the old snapshot
+            if complete and not start:
+                try:
+                    new_snap.save(snap_path)
+                except Exception as e:
+                    print(f"Could not save scan snapshot: {e}")
+                if old_snap is not None:
+                    self.status.emit(
+                        f"Changes since last scan: {len(delta.added)} added, {len(delta.newly_deleted)} newly deleted, "
+                        f"{len(delta.removed)} removed, {len(delta.changed)} changed "
+                        f"({delta.reused} records reused, {delta.parsed} parsed)")
+
             # reconstruct paths once we gathered names
             self.status.emit("Reconstructing paths ...")
-            index: Dict[int, Tuple[str, Optional[int], bool]] = dict(self._names)
-
-            def build_path(rid: int) -> Optional[str]:
-                # Simplified path building to avoid infinite loops
-                segs = []
-                seen = set()
-                cur = rid
-                max_depth = 10  # Prevent infinite loops
-                depth = 0
-                
-                while cur in index and cur not in seen and depth < max_depth:
-                    seen.add(cur)
-                    nm, parent, is_dir = index[cur]
-                    segs.append(nm)
-                    if parent is None:
-                        break
-                    cur = int(parent)
-                    depth += 1
-                
-                if not segs:
-                    return None
-                return "/".join(reversed(segs))
+            paths = PathBuilder(self._names, stats=self.stats)
 
             # Skip path reconstruction for large datasets to prevent UI blocking
             if len(self._items) > 50000:  # Higher threshold for large scans
@@ -266,7 +328,9 @@ class ScanWorker(QThread):
                     for it in batch:
                         if self._stop:
                             break
-                        p = build_path(it["record"]) or it["name"]
+                        t0 = time.perf_counter()
+                        p = paths.path(it["record"]) or it["name"]
+                        self.stats.add_time("paths", time.perf_counter() - t0)
                         it["path"] = p
                         self.found.emit({"update": True, **it})  # notify UI to update path text
                         processed_count += 1
@@ -284,7 +348,9 @@ class ScanWorker(QThread):
             existing_count = len(self._items) - deleted_count
             
             # Show summary immediately
-            self.status.emit(f"Scan complete! Found {len(self._items)} files ({deleted_count} deleted, {existing_count} existing)")
+            snap = self.stats.snapshot()
+            self.status.emit(f"Scan complete! Found {len(self._items)} files ({deleted_count} deleted, {existing_count} existing) "
+                             f"in {snap['elapsed_s']:.1f}s, {snap['bytes_read'] / 1e6:.0f} MB read")
             
             # Emit all remaining files that weren't emitted during scan
             self.status.emit("Loading all files into UI...")
@@ -303,9 +369,86 @@ class ScanWorker(QThread):
                 dev.close()
             except Exception:
                 pass
+            if ck is not None:
+                ck.close()
             self.finished_scan.emit()
 
+# ------------------------ Preview thread ------------------------
+class PreviewWorker(QThread):
+    """Reads file previews (a byte range through the record's runlist) off the UI thread.
+    Only the newest request is served, so moving through the tree never queues stale reads;
+    the Previewer's per-record range cache makes revisiting a file free."""
+    ready = Signal(object)        # Preview
+    failed = Signal(int, str)     # record, error text
+
+    def __init__(self, device_path: str):
+        super().__init__()
+        self.device_path = device_path
+        self._cond = threading.Condition()
+        self._pending: Optional[Tuple[int, int, int]] = None
+        self._stop = False
+
+    def request(self, record: int, offset: int = 0, size: int = PREVIEW_SIZE):
+        with self._cond:
+            self._pending = (record, offset, size)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+
+    def run(self):
+        dev = None
+        previewer: Optional[Previewer] = None
+        try:
+            while True:
+                with self._cond:
+                    while self._pending is None and not self._stop:
+                        self._cond.wait()
+                    if self._stop:
+                        return
+                    record, offset, size = self._pending
+                    self._pending = None
+                try:
+                    if previewer is None:
+                        # opened on first use and kept: boot sector parsed once, cache survives
+                        opened = open_volume(self.device_path)
+                        try:
+                            previewer = Previewer(opened)
+                        except Exception:
+                            opened.close()  # bad boot sector etc.: don't leak the handle on every click
+                            raise
+                        dev = opened
+                    self.ready.emit(previewer.preview(record, offset, size))
+                except Exception as e:
+                    self.failed.emit(record, str(e))
+        finally:
+            if dev is not None:
+                dev.close()
+
+
 # ------------------------ UI ------------------------
+COL_NAME, COL_PATH, COL_STATUS, COL_SIZE, COL_MODIFIED, COL_CREATED, COL_RECORD = range(7)
+PREVIEW_THUMB = 320  # max thumbnail edge in pixels
+_NUMERIC_COLS = (COL_SIZE, COL_MODIFIED, COL_CREATED, COL_RECORD)
+
+
+def _fmt_filetime(ft: int) -> str:
+    dt = filetime_to_datetime(ft)
+    return dt.strftime("%Y-%m-%d %H:%M") if dt else ""
+
+
+class ResultItem(QTreeWidgetItem):
+    """Tree row that sorts size/date/record columns by their raw value (kept in UserRole)."""
+
+    def __lt__(self, other: QTreeWidgetItem) -> bool:
+        col = self.treeWidget().sortColumn() if self.treeWidget() else 0
+        if col in _NUMERIC_COLS:
+            return (self.data(col, Qt.UserRole) or 0) < (other.data(col, Qt.UserRole) or 0)
+        return self.text(col).lower() < other.text(col).lower()
+
+
 class DrivePickerPage(QWidget):
     drive_chosen = Signal(DriveInfo)
 
@@ -324,30 +467,47 @@ class DrivePickerPage(QWidget):
         self.refresh_btn.clicked.connect(self.populate)
         lay.addWidget(self.refresh_btn)
 
-        self.populate()
+        self.probe: Optional[DriveProbeWorker] = None
         self.listw.itemDoubleClicked.connect(self._on_double)
+        # probe after the first paint: the window shows up at once, drives fill in as they answer
+        QTimer.singleShot(0, self.populate)
 
     def populate(self):
+        if self.probe is not None and self.probe.isRunning():
+            return
         self.listw.clear()
-        drives = list_fixed_drives()
-        
-        if not drives:
+        self.refresh_btn.setEnabled(False)
+        self.title.setText("Looking for drives …")
+        self.probe = DriveProbeWorker()
+        self.probe.found.connect(self._add_drive)
+        self.probe.finished_probe.connect(self._on_probe_finished)
+        self.probe.start()
+
+    @Slot(object)
+    def _add_drive(self, d: DriveInfo):
+        gb_total = d.total / (1024**3) if d.total else 0
+        gb_free = d.free / (1024**3) if d.free else 0
+
+        # Thêm thông tin về loại ổ đĩa
+        drive_type = "Fixed" if d.type == 3 else "Removable" if d.type == 2 else "Unknown"
+
+        text = f"{d.label}  ({d.letter})  —  {gb_total:.2f} GB total, {gb_free:.2f} GB free  [{drive_type}]"
+        item = QListWidgetItem(text)
+        item.setData(Qt.UserRole, d)
+        # probes finish in any order: keep the list sorted by drive letter
+        row = self.listw.count()
+        while row > 0 and self.listw.item(row - 1).data(Qt.UserRole).letter > d.letter:
+            row -= 1
+        self.listw.insertItem(row, item)
+
+    @Slot(int)
+    def _on_probe_finished(self, count: int):
+        self.title.setText("Select a location to search for lost data")
+        self.refresh_btn.setEnabled(True)
+        if not count:
             item = QListWidgetItem("No accessible drives found. Make sure you're running as Administrator.")
             item.setFlags(item.flags() & ~Qt.ItemIsEnabled)
             self.listw.addItem(item)
-            return
-            
-        for d in drives:
-            gb_total = d.total / (1024**3) if d.total else 0
-            gb_free = d.free / (1024**3) if d.free else 0
-            
-            # Thêm thông tin về loại ổ đĩa
-            drive_type = "Fixed" if d.type == 3 else "Removable" if d.type == 2 else "Unknown"
-            
-            text = f"{d.label}  ({d.letter})  —  {gb_total:.2f} GB total, {gb_free:.2f} GB free  [{drive_type}]"
-            item = QListWidgetItem(text)
-            item.setData(Qt.UserRole, d)
-            self.listw.addItem(item)
 
     def _on_double(self, item: QListWidgetItem):
         d: DriveInfo = item.data(Qt.UserRole)
@@ -390,6 +550,24 @@ class ScanPage(QWidget):
         
         outer.addLayout(search_row)
 
+        # Size / date filters (work on the raw values collected during the scan)
+        range_row = QHBoxLayout()
+        range_row.addWidget(QLabel("Min size (KB):"))
+        self.min_size = QSpinBox()
+        self.min_size.setRange(0, 2**31 - 1)
+        self.min_size.valueChanged.connect(self._apply_filter)
+        range_row.addWidget(self.min_size)
+        self.modified_since_chk = QCheckBox("Modified since:")
+        self.modified_since_chk.toggled.connect(self._apply_filter)
+        range_row.addWidget(self.modified_since_chk)
+        self.modified_since = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.modified_since.setCalendarPopup(True)
+        self.modified_since.setDisplayFormat("yyyy-MM-dd")
+        self.modified_since.dateChanged.connect(self._apply_filter)
+        range_row.addWidget(self.modified_since)
+        range_row.addStretch(1)
+        outer.addLayout(range_row)
+
         # Progress + status
         self.progress = QProgressBar()
         self.progress.setRange(0, 0)  # indeterminate
@@ -399,9 +577,52 @@ class ScanPage(QWidget):
 
         # Tree results
         self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["Name", "Path", "Status", "Size", "Record#"])
-        self.tree.setColumnWidth(0, 280)
-        outer.addWidget(self.tree)
+        self.tree.setHeaderLabels(["Name", "Path", "Status", "Size", "Modified", "Created", "Record#"])
+        self.tree.setColumnWidth(COL_NAME, 280)
+        self.tree.setSortingEnabled(True)
+        self.tree.sortByColumn(COL_RECORD, Qt.AscendingOrder)
+        self.tree.currentItemChanged.connect(self._on_current_changed)
+
+        # Preview pane: reads only the shown range of the selected file (first 64 KB by default)
+        preview_box = QWidget()
+        pv = QVBoxLayout(preview_box)
+        pv.setContentsMargins(0, 0, 0, 0)
+        self.preview_info = QLabel("Select a file to preview")
+        self.preview_info.setWordWrap(True)
+        pv.addWidget(self.preview_info)
+        nav = QHBoxLayout()
+        nav.addWidget(QLabel("Offset (KB):"))
+        self.preview_offset = QSpinBox()
+        self.preview_offset.setRange(0, 2**31 - 1)
+        self.preview_offset.setSingleStep(PREVIEW_SIZE // 1024)
+        self.preview_offset.valueChanged.connect(self._request_preview)
+        nav.addWidget(self.preview_offset)
+        self.preview_next = QPushButton("Next ▸")
+        self.preview_next.clicked.connect(
+            lambda: self.preview_offset.setValue(self.preview_offset.value() + PREVIEW_SIZE // 1024))
+        nav.addWidget(self.preview_next)
+        self.preview_mode = QComboBox()
+        self.preview_mode.addItems(["Auto", "Hex", "Text"])
+        self.preview_mode.currentIndexChanged.connect(self._render_preview)
+        nav.addWidget(self.preview_mode)
+        nav.addStretch(1)
+        pv.addLayout(nav)
+        self.preview_image = QLabel()
+        self.preview_image.setAlignment(Qt.AlignCenter)
+        self.preview_image.hide()
+        pv.addWidget(self.preview_image, 1)
+        self.preview_text = QPlainTextEdit()
+        self.preview_text.setReadOnly(True)
+        self.preview_text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.preview_text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        pv.addWidget(self.preview_text, 1)
+
+        split = QSplitter(Qt.Horizontal)
+        split.addWidget(self.tree)
+        split.addWidget(preview_box)
+        split.setStretchFactor(0, 3)
+        split.setStretchFactor(1, 2)
+        outer.addWidget(split)
 
         # Start/Stop
         row = QHBoxLayout()
@@ -410,11 +631,17 @@ class ScanPage(QWidget):
         self.stop_btn.setEnabled(False)
         row.addWidget(self.start_btn)
         row.addWidget(self.stop_btn)
+        self.incremental_chk = QCheckBox("Incremental (reuse last scan)")
+        self.incremental_chk.setChecked(True)
+        row.addWidget(self.incremental_chk)
         row.addStretch(1)
         outer.addLayout(row)
 
         self.worker: Optional[ScanWorker] = None
         self.device_path: Optional[str] = None
+        self.preview_worker: Optional[PreviewWorker] = None
+        self._preview_record: Optional[int] = None
+        self._preview_last: Optional[Preview] = None
 
         self.start_btn.clicked.connect(self._start)
         self.stop_btn.clicked.connect(self._stop)
@@ -447,9 +674,88 @@ class ScanPage(QWidget):
         self.back.emit()
 
     def set_drive(self, d: DriveInfo):
+        if d.path != self.device_path:
+            self.stop_preview()
         self.device_path = d.path
         self.info.setText(f"Drive {d.letter} — {d.label}  |  Device: {d.path}")
         self.tree.clear()
+        self._clear_preview()
+
+    def stop_preview(self):
+        if self.preview_worker is not None:
+            self.preview_worker.stop()
+            self.preview_worker.wait(2000)
+            self.preview_worker = None
+
+    def _clear_preview(self):
+        self._preview_record = None
+        self._preview_last = None
+        self.preview_info.setText("Select a file to preview")
+        self.preview_text.clear()
+        self.preview_image.clear()
+
+    @Slot(QTreeWidgetItem, QTreeWidgetItem)
+    def _on_current_changed(self, current: Optional[QTreeWidgetItem], _previous: Optional[QTreeWidgetItem]):
+        if current is None:
+            return
+        self._preview_record = current.data(COL_RECORD, Qt.UserRole)
+        self._preview_last = None
+        self.preview_offset.blockSignals(True)
+        self.preview_offset.setValue(0)
+        self.preview_offset.blockSignals(False)
+        self._request_preview()
+
+    @Slot()
+    def _request_preview(self):
+        if self._preview_record is None or not self.device_path:
+            return
+        if self.preview_worker is None:
+            self.preview_worker = PreviewWorker(self.device_path)
+            self.preview_worker.ready.connect(self._on_preview_ready)
+            self.preview_worker.failed.connect(self._on_preview_failed)
+            self.preview_worker.start()
+        self.preview_info.setText(f"Loading record {self._preview_record} …")
+        self.preview_worker.request(self._preview_record, self.preview_offset.value() * 1024)
+
+    @Slot(object)
+    def _on_preview_ready(self, pv: Preview):
+        # drop answers to requests the user has already moved past
+        if pv.record != self._preview_record or pv.offset != self.preview_offset.value() * 1024:
+            return
+        self._preview_last = pv
+        self._render_preview()
+
+    @Slot(int, str)
+    def _on_preview_failed(self, record: int, error: str):
+        if record == self._preview_record:
+            self._preview_last = None
+            self.preview_info.setText(f"Record {record}: {error}")
+            self.preview_text.clear()
+            self.preview_image.hide()
+            self.preview_text.show()
+
+    @Slot()
+    def _render_preview(self):
+        pv = self._preview_last
+        if pv is None:
+            return
+        self.preview_info.setText(f"{pv.name or '(no name)'}  —  record {pv.record}, {pv.size} bytes ({pv.kind}), "
+                                  f"showing {pv.offset}–{pv.offset + len(pv.data)}")
+        mode = self.preview_mode.currentText()
+        if mode == "Auto" and pv.kind == "image" and pv.offset == 0:
+            pix = QPixmap()
+            if pix.loadFromData(pv.data):
+                self.preview_image.setPixmap(pix.scaled(PREVIEW_THUMB, PREVIEW_THUMB, Qt.KeepAspectRatio,
+                                                        Qt.SmoothTransformation))
+                self.preview_text.hide()
+                self.preview_image.show()
+                return
+        if mode == "Text" or (mode == "Auto" and pv.kind == "text"):
+            self.preview_text.setPlainText(decode_text(pv.data))
+        else:
+            self.preview_text.setPlainText(hexdump(pv.data, pv.offset))
+        self.preview_image.hide()
+        self.preview_text.show()
 
     @Slot()
     def _start(self):
@@ -459,9 +765,12 @@ class ScanPage(QWidget):
         if self.worker and self.worker.isRunning():
             return
         self.tree.clear()
+        # Sorting off while rows stream in (each insert would re-sort the whole tree);
+        # _on_finished turns it back on and sorts once.
+        self.tree.setSortingEnabled(False)
         self.status.setText("Preparing scan …")
         self.progress.setRange(0, 0)
-        self.worker = ScanWorker(self.device_path)
+        self.worker = ScanWorker(self.device_path, incremental=self.incremental_chk.isChecked())
         self.worker.found.connect(self._on_found)
         self.worker.status.connect(self.status.setText)
         self.worker.started_scan.connect(lambda: (self.start_btn.setEnabled(False), self.stop_btn.setEnabled(True)))
@@ -490,23 +799,29 @@ class ScanPage(QWidget):
             # simple linear search; dataset is big so could be optimized, but fine for MVP
             for i in range(self.tree.topLevelItemCount()):
                 it = self.tree.topLevelItem(i)
-                if it.text(4) == rec:
-                    it.setText(1, item.get("path") or "")
+                if it.text(COL_RECORD) == rec:
+                    it.setText(COL_PATH, item.get("path") or "")
                     break
             return
 
         # Create new tree item
-        node = QTreeWidgetItem()
-        node.setText(0, item.get("name", ""))
-        node.setText(1, item.get("path") or "")
-        node.setText(2, item.get("status", ""))
-        node.setText(3, str(item.get("size", 0)))
-        node.setText(4, str(item.get("record", "")))
+        node = ResultItem()
+        node.setText(COL_NAME, item.get("name", ""))
+        node.setText(COL_PATH, item.get("path") or "")
+        node.setText(COL_STATUS, item.get("status", ""))
+        node.setText(COL_SIZE, str(item.get("size", 0)))
+        node.setData(COL_SIZE, Qt.UserRole, item.get("size", 0))
+        node.setText(COL_MODIFIED, _fmt_filetime(item.get("modified", 0)))
+        node.setData(COL_MODIFIED, Qt.UserRole, item.get("modified", 0))
+        node.setText(COL_CREATED, _fmt_filetime(item.get("created", 0)))
+        node.setData(COL_CREATED, Qt.UserRole, item.get("created", 0))
+        node.setText(COL_RECORD, str(item.get("record", "")))
+        node.setData(COL_RECORD, Qt.UserRole, item.get("record", 0))
         
         # color code deleted
         if item.get("status") == "deleted":
-            node.setForeground(0, Qt.red)
-            node.setForeground(2, Qt.red)
+            node.setForeground(COL_NAME, Qt.red)
+            node.setForeground(COL_STATUS, Qt.red)
             # Add deleted files at the top
             self.tree.insertTopLevelItem(0, node)
         else:
@@ -519,10 +834,19 @@ class ScanPage(QWidget):
             self.status.setText(f"Displaying {total_items} files...")
         
         # Limit the number of items to prevent UI slowdown
-        if self.tree.topLevelItemCount() > 10000:  # Higher limit for large scans
-            # Remove oldest items (keep deleted files)
-            while self.tree.topLevelItemCount() > 5000:  # Keep more items
-                self.tree.takeTopLevelItem(self.tree.topLevelItemCount() - 1)
+        count = self.tree.topLevelItemCount()
+        if count > 10000:  # Higher limit for large scans
+            # Remove existing (non-deleted) files first, chosen by status rather than row position
+            i = count - 1
+            while count > 5000 and i >= 0:  # Keep more items
+                if self.tree.topLevelItem(i).text(COL_STATUS) != "deleted":
+                    self.tree.takeTopLevelItem(i)
+                    count -= 1
+                i -= 1
+            # Only deleted files left: drop the surplus from the end
+            while count > 5000:
+                self.tree.takeTopLevelItem(count - 1)
+                count -= 1
 
     @Slot()
     def _on_finished(self):
@@ -530,6 +854,9 @@ class ScanPage(QWidget):
         self.progress.setRange(0, 1)
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
+
+        # Sort once now that all rows are in (keeps the header's current sort column/order)
+        self.tree.setSortingEnabled(True)
         
         # Apply filter and show count
         self._apply_filter()
@@ -546,6 +873,11 @@ class ScanPage(QWidget):
         q = self.search.text().lower().strip()
         show_deleted_only = self.show_deleted_btn.isChecked()
         show_all = self.show_all_btn.isChecked()
+        min_size = self.min_size.value() * 1024
+        since = None
+        if self.modified_since_chk.isChecked():
+            d = self.modified_since.date()
+            since = datetime_to_filetime(datetime(d.year(), d.month(), d.day()))
         
         visible_count = 0
         for i in range(self.tree.topLevelItemCount()):
@@ -563,7 +895,10 @@ class ScanPage(QWidget):
             elif show_all:
                 status_match = True
             
-            is_visible = text_match and status_match
+            range_match = ((it.data(COL_SIZE, Qt.UserRole) or 0) >= min_size and
+                           (since is None or (it.data(COL_MODIFIED, Qt.UserRole) or 0) >= since))
+
+            is_visible = text_match and status_match and range_match
             it.setHidden(not is_visible)
             
             if is_visible:
@@ -597,6 +932,12 @@ class MainWindow(QMainWindow):
         self.page_scan.set_drive(d)
         self.stack.setCurrentWidget(self.page_scan)
 
+    def closeEvent(self, event):
+        if self.page_pick.probe is not None:
+            self.page_pick.probe.wait(2000)
+        self.page_scan.stop_preview()
+        super().closeEvent(event)
+
 
 def main():
     app = QApplication(sys.argv)
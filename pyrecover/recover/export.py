@@ -1,44 +1,137 @@
 from __future__ import annotations
-import os
-from typing import Optional
-from ..core.device_windows import DeviceWindows
+import hashlib, os, time
+from typing import Callable, Iterator, Optional
+from ..core.device import open_device
+from ..core.partitions import OffsetDevice
+from ..core.stats import ScanStats, instrument
 from ..fs.ntfs.boot import parse_boot_sector, NtfsBoot
-from ..fs.ntfs.mft import iter_mft_records
+from ..fs.ntfs.mft import read_mft_record, DataAttr, MftRecord, SPARSE_LCN
 
 CHUNK = 4 * 1024 * 1024
 
-def export_record(image_path: str, record_id: int, out_path: str) -> None:
-    dev = DeviceWindows(image_path)
+def _write(f, buf, stats: Optional[ScanStats]) -> None:
+    if stats is None:
+        f.write(buf)
+        return
+    t0 = time.perf_counter()
+    f.write(buf)
+    stats.add_time('export.write', time.perf_counter() - t0)
+    stats.count('bytes_written', len(buf))
+
+
+def iter_data(dev, boot: NtfsBoot, data: DataAttr, size: Optional[int] = None) -> Iterator[bytes]:
+    """Nội dung $DATA theo từng chunk (tối đa CHUNK byte), tuần tự theo runlist; vùng sparse
+    ra byte 0. size: dừng sau size byte (None: tới hết run cuối, gồm cả phần dư của cluster)."""
+    if data.resident_data is not None:
+        yield data.resident_data if size is None else data.resident_data[:size]
+        return
+    if not data.run_pairs:
+        raise RuntimeError("Non-resident DATA has no runs")
+    cluster_size = boot.cluster_size
+    left = size
+    for lcn, length in data.iter_runs():
+        if left is not None and left <= 0:
+            break
+        if length <= 0 or (lcn <= 0 and lcn != SPARSE_LCN):
+            continue
+        remaining = length * cluster_size
+        if left is not None:
+            remaining = min(remaining, left)
+            left -= remaining
+        if lcn == SPARSE_LCN:
+            # vùng sparse: giữ đúng offset của phần sau bằng cách ghi 0
+            while remaining > 0:
+                n = min(remaining, CHUNK)
+                yield bytes(n)
+                remaining -= n
+            continue
+        cur = boot.lcn_to_off(lcn)
+        while remaining > 0:
+            to_read = min(remaining, CHUNK)
+            yield dev.read(cur, to_read)
+            cur += to_read
+            remaining -= to_read
+
+
+def read_range(dev, boot: NtfsBoot, data: DataAttr, offset: int, size: int) -> bytes:
+    """size byte của $DATA bắt đầu từ offset trong file (bị cắt ở real_size), chỉ đọc các
+    cluster chứa đoạn đó; vùng sparse / ngoài runlist ra byte 0."""
+    if offset < 0 or size < 0:
+        raise ValueError(f"Bad range: off={offset} size={size}")
+    end = min(offset + size, data.real_size)
+    if end <= offset:
+        return b''
+    if data.resident_data is not None:
+        return data.resident_data[offset:end]
+    cluster_size = boot.cluster_size
+    parts = []
+    pos = 0          # offset trong file của đầu run hiện tại
+    cur = offset
+    for lcn, length in data.iter_runs():
+        if cur >= end:
+            break
+        run_end = pos + length * cluster_size
+        if run_end > cur and length > 0:
+            n = min(run_end, end) - cur
+            if lcn == SPARSE_LCN or lcn <= 0:
+                parts.append(bytes(n))
+            else:
+                parts.append(dev.read(boot.lcn_to_off(lcn) + cur - pos, n))
+            cur += n
+        pos = run_end
+    if cur < end:
+        parts.append(bytes(end - cur))   # runlist ngắn hơn real_size
+    return parts[0] if len(parts) == 1 else b''.join(parts)
+
+
+def export_data(dev, boot: NtfsBoot, rec: MftRecord, out_path: str, stats: Optional[ScanStats] = None,
+                progress: Optional[Callable[[int], None]] = None, hasher=None) -> int:
+    """Ghi $DATA của record đã parse ra out_path trên device đang mở; trả số byte đã ghi.
+    Chỉ ghi real_size byte (nội dung file gốc, không kèm phần dư của cluster cuối) — cùng nội
+    dung và hash với object của recover.store.
+    progress(bytes_written) được gọi sau mỗi chunk (có thể raise để hủy).
+    hasher: đối tượng hashlib — được update với mọi byte ghi ra."""
+    if rec.data is None:
+        raise RuntimeError("No DATA attribute")
+    if rec.data.resident_data is None and not rec.data.run_pairs:
+        raise RuntimeError("Non-resident DATA has no runs")
+    written = 0
+    with open(out_path, 'wb') as f:
+        for buf in iter_data(dev, boot, rec.data, rec.data.real_size):
+            _write(f, buf, stats)
+            if hasher is not None:
+                hasher.update(buf)
+            written += len(buf)
+            if progress is not None:
+                progress(written)
+    return written
+
+
+def export_record(image_path: str, record_id: int, out_path: str, stats: Optional[ScanStats] = None,
+                  offset: int = 0, algo: Optional[str] = None) -> Optional[str]:
+    """offset: byte offset của volume NTFS trong image có bảng phân vùng (0 = image là volume).
+    algo: tên hash (vd. 'sha256') — tính trong lúc ghi, ghi thêm `<out_path>.<algo>` dạng
+    sha256sum và trả hash hex (None nếu không dùng)."""
+    dev = instrument(open_device(image_path), stats)
+    if offset:
+        dev = OffsetDevice(dev, offset)
     try:
         boot = parse_boot_sector(dev.read(0, 512))
-        cluster_size = boot.cluster_size
-        for rid, rec in iter_mft_records(dev, boot):
-            if rid != record_id:
-                continue
-            if rec.data is None:
-                raise RuntimeError("No DATA attribute")
-            if rec.data.resident_data is not None:
-                with open(out_path, 'wb') as f:
-                    f.write(rec.data.resident_data)
-                return
-            if not rec.data.runs:
-                raise RuntimeError("Non-resident DATA has no runs")
-            # Xuất tuần tự theo runlist
-            with open(out_path, 'wb') as f:
-                for run in rec.data.runs:
-                    if run.lcn <= 0 or run.length <= 0:
-                        continue
-                    off = boot.lcn_to_off(run.lcn)
-                    total = run.length * cluster_size
-                    remaining = total
-                    cur = off   
-                    while remaining > 0:
-                        to_read = min(remaining, CHUNK)
-                        buf = dev.read(cur, to_read)
-                        f.write(buf)
-                        cur += to_read
-                        remaining -= to_read
-                return
-        raise RuntimeError(f"Record {record_id} not found")
+        # đọc thẳng record cần xuất (cùng giả định MFT liên tục như iter_mft_records)
+        # thay vì duyệt cả MFT tới record_id
+        try:
+            rec = read_mft_record(dev, boot, record_id)
+        except (ValueError, IOError):
+            rec = None
+        if rec is None:
+            raise RuntimeError(f"Record {record_id} not found")
+        hasher = hashlib.new(algo) if algo else None
+        export_data(dev, boot, rec, out_path, stats, hasher=hasher)
     finally:
         dev.close()
+    if hasher is None:
+        return None
+    digest = hasher.hexdigest()
+    with open(f"{out_path}.{algo}", 'w', encoding='utf-8') as f:
+        f.write(f"{digest}  {os.path.basename(out_path)}\n")
+    return digest
@@ -0,0 +1,202 @@
+"""Xem trước nội dung record mà không xuất cả file: chỉ đọc đoạn byte cần xem qua runlist
+(read_range), giữ cache nhỏ theo record để cuộn / xem lại không đọc đĩa lần nữa.
+
+Previewer không thread-safe: mỗi thread xem trước dùng một Previewer riêng (GUI dùng một
+thread nền duy nhất).
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from ..fs.ntfs.boot import parse_boot_sector, NtfsBoot
+from ..fs.ntfs.mft import read_mft_record, DataAttr
+from .export import read_range
+
+PREVIEW_SIZE = 64 * 1024           # mặc định: 64 KiB đầu file
+IMAGE_PREVIEW_MAX = 8 * 1024 * 1024   # ảnh nhỏ hơn mức này được đọc cả file để làm thumbnail
+CACHE_BYTES = 16 * 1024 * 1024
+
+IMAGE_MAGIC = {
+    'jpg': b'\xFF\xD8\xFF',
+    'png': b'\x89PNG\r\n\x1a\n',
+    'gif': b'GIF8',
+    'bmp': b'BM',
+}
+
+
+def sniff(head: bytes) -> str:
+    """'image' / 'text' / 'binary' theo các byte đầu file."""
+    for magic in IMAGE_MAGIC.values():
+        if head.startswith(magic):
+            return 'image'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image'
+    if not head:
+        return 'binary'
+    if head.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'text'   # BOM UTF-16
+    sample = head[:4096]
+    if b'\x00' in sample:
+        return 'binary'
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(sample) - 3:   # ký tự nhiều byte bị cắt ở cuối mẫu thì bỏ qua
+            return 'binary'
+    return 'text'
+
+
+def decode_text(data: bytes) -> str:
+    if data.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return data.decode('utf-16', errors='replace')
+    return data.decode('utf-8', errors='replace')
+
+
+def hexdump(data: bytes, base: int = 0, width: int = 16) -> str:
+    """Dạng `xxd`: offset | hex | ASCII; base: offset của data trong file."""
+    lines = []
+    for i in range(0, len(data), width):
+        row = data[i:i + width]
+        hx = ' '.join(f"{b:02x}" for b in row)
+        text = ''.join(chr(b) if 32 <= b < 127 else '.' for b in row)
+        lines.append(f"{base + i:08x}  {hx:<{width * 3 - 1}}  {text}")
+    return '\n'.join(lines)
+
+
+@dataclass
+class Preview:
+    record: int
+    name: Optional[str]
+    size: int            # real_size của $DATA
+    offset: int
+    data: bytes
+    kind: str            # 'image' / 'text' / 'binary' (theo đầu file, không theo đoạn đang xem)
+
+
+class _Entry:
+    __slots__ = ('name', 'data', 'kind', 'ranges', 'nbytes')
+
+    def __init__(self, name: Optional[str], data: DataAttr) -> None:
+        self.name = name
+        self.data = data
+        self.kind: Optional[str] = None
+        self.ranges: List[Tuple[int, bytes]] = []   # (offset, bytes), sắp theo offset, không chồng nhau
+        self.nbytes = 0
+
+
+class RangeCache:
+    """LRU theo record: mỗi record giữ $DATA đã parse và các đoạn byte đã đọc (gộp đoạn kề /
+    chồng nhau); khi vượt max_bytes thì bỏ cả record ít dùng nhất."""
+
+    def __init__(self, max_bytes: int = CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[int, _Entry]' = OrderedDict()
+        self._bytes = 0
+        # số liệu
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, rid: int) -> Optional[_Entry]:
+        e = self._entries.get(rid)
+        if e is not None:
+            self._entries.move_to_end(rid)
+        return e
+
+    def add_entry(self, rid: int, e: _Entry) -> None:
+        old = self._entries.pop(rid, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[rid] = e
+
+    def get(self, rid: int, offset: int, size: int) -> Optional[bytes]:
+        e = self.entry(rid)
+        if e is not None:
+            for start, buf in e.ranges:
+                if start <= offset and offset + size <= start + len(buf):
+                    self.hits += 1
+                    return buf[offset - start:offset - start + size]
+        self.misses += 1
+        return None
+
+    def put(self, rid: int, offset: int, buf: bytes) -> None:
+        e = self._entries.get(rid)
+        if e is None or not buf:
+            return
+        end = offset + len(buf)
+        keep = []
+        for start, old in e.ranges:
+            old_end = start + len(old)
+            if old_end < offset or start > end:
+                keep.append((start, old))
+                continue
+            # gộp: phần cũ nằm ngoài đoạn mới được giữ lại ở hai đầu
+            if start < offset:
+                buf = old[:offset - start] + buf
+                offset = start
+            if old_end > end:
+                buf = buf + old[end - start:]
+                end = old_end
+        keep.append((offset, buf))
+        keep.sort(key=lambda r: r[0])
+        n = sum(len(b) for _, b in keep)
+        self._bytes += n - e.nbytes
+        e.ranges, e.nbytes = keep, n
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.nbytes
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+
+class Previewer:
+    """Xem trước record trên device đang mở (volume NTFS ở offset 0)."""
+
+    def __init__(self, dev, boot: Optional[NtfsBoot] = None, cache_bytes: int = CACHE_BYTES) -> None:
+        self.dev = dev
+        self.boot = boot if boot is not None else parse_boot_sector(dev.read(0, 512))
+        self.cache = RangeCache(cache_bytes)
+        self.bytes_read = 0
+
+    def _entry(self, rid: int) -> _Entry:
+        e = self.cache.entry(rid)
+        if e is None:
+            try:
+                rec = read_mft_record(self.dev, self.boot, rid)
+            except (ValueError, IOError):
+                rec = None
+            if rec is None:
+                raise RuntimeError(f"Record {rid} not found")
+            if rec.data is None:
+                raise RuntimeError(f"Record {rid} has no DATA attribute")
+            e = _Entry(rec.fn.name if rec.fn else None, rec.data)
+            self.cache.add_entry(rid, e)
+        return e
+
+    def read(self, rid: int, offset: int, size: int) -> bytes:
+        """size byte từ offset (cắt ở kích thước file); qua cache."""
+        e = self._entry(rid)
+        size = max(0, min(size, e.data.real_size - offset))
+        buf = self.cache.get(rid, offset, size)
+        if buf is None:
+            buf = read_range(self.dev, self.boot, e.data, offset, size)
+            self.bytes_read += len(buf)
+            self.cache.put(rid, offset, buf)
+        return buf
+
+    def preview(self, rid: int, offset: int = 0, size: int = PREVIEW_SIZE) -> Preview:
+        """Đoạn [offset, offset+size) của record; ảnh (offset 0) không lớn hơn IMAGE_PREVIEW_MAX
+        được đọc cả file để giải mã được thumbnail."""
+        e = self._entry(rid)
+        if e.kind is None:
+            # offset 0: đoạn đọc để nhận dạng cũng là đoạn cần xem (lần đọc sau trúng cache)
+            e.kind = sniff(self.read(rid, 0, max(size, 4096) if offset == 0 else 4096))
+        total = e.data.real_size
+        if e.kind == 'image' and offset == 0 and total <= IMAGE_PREVIEW_MAX:
+            size = max(size, total)
+        return Preview(rid, e.name, total, offset, self.read(rid, offset, size), e.kind)
+
+    def stats(self) -> Dict[str, int]:
+        return {'bytes_read': self.bytes_read, 'cache_hits': self.cache.hits,
+                'cache_misses': self.cache.misses}
@@ -0,0 +1,250 @@
+"""Xuất hàng loạt vào kho theo nội dung (content-addressed): mỗi nội dung chỉ được ghi một lần.
+
+Bố cục thư mục đích:
+  objects/ab/abcdef...   nội dung file, tên là hash (sha256 / blake2b) của nội dung
+  manifest.jsonl         mỗi record một dòng: record, name, size, <algo>: hash, object, duplicate
+Hash được tính trong lúc đọc dữ liệu. File nhỏ hơn MEMORY_LIMIT được giữ trong RAM tới khi có
+hash nên bản trùng không tốn byte ghi nào; file lớn hơn được ghi ra file tạm rồi bỏ nếu trùng.
+Nhiều record được xuất song song trên thread pool, mọi lần đọc đi qua một IoScheduler
+(core.iosched) như các job của service. Kho dùng lại được giữa các lần xuất: object đã có
+từ trước cũng được tính là trùng.
+"""
+from __future__ import annotations
+import hashlib, json, os, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from ..core.device import open_device
+from ..core.iosched import IoScheduler, ScheduledDevice
+from ..core.partitions import OffsetDevice
+from ..core.stats import ScanStats, instrument
+from ..fs.ntfs.boot import parse_boot_sector, NtfsBoot
+from ..fs.ntfs.mft import read_mft_record
+from ..core.constants import HASH_ALGOS
+from .export import iter_data
+
+MEMORY_LIMIT = 64 * 1024 * 1024
+MANIFEST = 'manifest.jsonl'
+
+
+class ContentStore:
+    """Thread-safe: nhiều thread put() cùng lúc; hai nội dung giống nhau chỉ một bản được ghi.
+    Bản trùng chỉ được xác nhận sau khi bản đầu tiên đã nằm trên đĩa: thread có cùng hash chờ
+    lần ghi đang chạy, và tự ghi object nếu lần ghi đó lỗi."""
+
+    def __init__(self, root: str, algo: str = 'sha256') -> None:
+        if algo not in HASH_ALGOS:
+            raise ValueError(f"hash must be one of {HASH_ALGOS}")
+        self.root = root
+        self.algo = algo
+        self._objects = os.path.join(root, 'objects')
+        self._tmp = os.path.join(root, 'tmp')
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._tmp, exist_ok=True)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._known = self._scan_objects()   # đã trên đĩa
+        self._inflight: Dict[str, threading.Event] = {}   # hash -> đang được một thread ghi
+        self._manifest = open(os.path.join(root, MANIFEST), 'a', encoding='utf-8')
+        # số liệu (cập nhật dưới self._lock)
+        self.files = 0
+        self.duplicates = 0
+        self.bytes_in = 0
+        self.bytes_written = 0
+
+    def _scan_objects(self) -> set:
+        """Hash của các object đã có trong objects/<2 ký tự>/; bỏ qua file lạ (.DS_Store,
+        Thumbs.db, file tạm của một lần copy dở) và tên không phải hash của algo."""
+        n = hashlib.new(self.algo).digest_size * 2
+        hexdigits = set('0123456789abcdef')
+        known = set()
+        with os.scandir(self._objects) as subs:
+            for sub in subs:
+                if not sub.is_dir() or len(sub.name) != 2:
+                    continue
+                with os.scandir(sub.path) as entries:
+                    for e in entries:
+                        name = e.name
+                        if (len(name) == n and name[:2] == sub.name and set(name) <= hexdigits
+                                and e.is_file()):
+                            known.add(name)
+        return known
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self._objects, digest[:2], digest)
+
+    def _claim(self, digest: str) -> bool:
+        """True nếu thread này phải ghi object `digest` (rồi gọi _release); False nếu object đã
+        nằm trên đĩa. Khi thread khác đang ghi cùng hash thì chờ nó xong."""
+        while True:
+            with self._lock:
+                if digest in self._known:
+                    return False
+                ev = self._inflight.get(digest)
+                if ev is None:
+                    self._inflight[digest] = threading.Event()
+                    return True
+            ev.wait()   # lần ghi kia lỗi: vòng sau thread này nhận ghi
+
+    def _release(self, digest: str, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self._known.add(digest)
+            ev = self._inflight.pop(digest)
+        ev.set()
+
+    def _commit(self, digest: str, tmp: str) -> None:
+        path = self.object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp, path)
+
+    def _tmp_path(self) -> str:
+        with self._lock:
+            self._seq += 1
+            return os.path.join(self._tmp, f"{os.getpid()}-{self._seq}.part")
+
+    def put(self, chunks: Iterable[bytes], size_hint: int) -> Tuple[str, int, bool]:
+        """Ghi nội dung (các chunk) vào kho; trả (hash, số byte, duplicate)."""
+        h = hashlib.new(self.algo)
+        if size_hint <= MEMORY_LIMIT:
+            parts = []
+            for c in chunks:
+                h.update(c)
+                parts.append(c)
+            digest = h.hexdigest()
+            size = sum(len(c) for c in parts)
+            dup = not self._claim(digest)
+            if not dup:
+                tmp = self._tmp_path()
+                ok = False
+                try:
+                    with open(tmp, 'wb') as f:
+                        f.writelines(parts)
+                    self._commit(digest, tmp)
+                    ok = True
+                finally:
+                    self._release(digest, ok)
+                    if not ok and os.path.exists(tmp):
+                        os.remove(tmp)
+        else:
+            tmp = self._tmp_path()
+            size = 0
+            try:
+                with open(tmp, 'wb') as f:
+                    for c in chunks:
+                        h.update(c)
+                        f.write(c)
+                        size += len(c)
+                digest = h.hexdigest()
+                dup = not self._claim(digest)
+                if dup:
+                    os.remove(tmp)
+                else:
+                    ok = False
+                    try:
+                        self._commit(digest, tmp)
+                        ok = True
+                    finally:
+                        self._release(digest, ok)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+        with self._lock:
+            self.files += 1
+            self.bytes_in += size
+            if dup:
+                self.duplicates += 1
+            else:
+                self.bytes_written += size
+        return digest, size, dup
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Thêm một dòng vào manifest."""
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._manifest.write(line)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'files': self.files, 'unique': self.files - self.duplicates,
+                    'duplicates': self.duplicates, 'bytes': self.bytes_in,
+                    'bytes_written': self.bytes_written}
+
+    def close(self) -> None:
+        self._manifest.close()
+        try:
+            os.rmdir(self._tmp)
+        except OSError:
+            pass
+
+
+def _export_one(dev, boot: NtfsBoot, store: ContentStore, rid: int) -> Dict[str, Any]:
+    try:
+        rec = read_mft_record(dev, boot, rid)
+    except (ValueError, IOError):
+        rec = None
+    if rec is None or rec.data is None:
+        return {'record': rid, 'error': 'record not found' if rec is None else 'no DATA attribute'}
+    size = rec.data.real_size
+    # chỉ lấy real_size byte: phần dư của cluster cuối khác nhau giữa các bản trùng
+    try:
+        digest, n, dup = store.put(iter_data(dev, boot, rec.data, size), size)
+    except (RuntimeError, OSError) as e:
+        # lỗi của một record (đọc, ghi, hết chỗ) không dừng cả lần xuất
+        return {'record': rid, 'error': str(e)}
+    return {'record': rid, 'name': rec.fn.name if rec.fn else None, 'size': n,
+            store.algo: digest, 'object': os.path.relpath(store.object_path(digest), store.root),
+            'duplicate': dup}
+
+
+def export_records(image_path: str, records: Iterable[int], out_dir: str, algo: str = 'sha256',
+                   workers: int = 4, stats: Optional[ScanStats] = None, offset: int = 0,
+                   progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Xuất các record vào kho out_dir (xem đầu module); trả tổng kết (files, unique,
+    duplicates, bytes, bytes_written, errors). Dòng manifest theo thứ tự `records`; với nội
+    dung trùng, bản được ghi (duplicate=False) là bản đọc xong trước. workers: số record xuất
+    song song (1: tuần tự, không qua IoScheduler). progress(manifest_entry) sau mỗi record."""
+    t0 = time.perf_counter()
+    store = ContentStore(out_dir, algo)
+    raw = instrument(open_device(image_path), stats)
+    sched = None
+    if workers > 1:
+        sched = IoScheduler(raw)
+        dev = ScheduledDevice(sched)
+    else:
+        dev = raw
+    if offset:
+        dev = OffsetDevice(dev, offset)
+    errors = 0
+    try:
+        boot = parse_boot_sector(dev.read(0, 512))
+
+        def done(entry: Dict[str, Any]) -> None:
+            nonlocal errors
+            store.record(entry)
+            if 'error' in entry:
+                errors += 1
+            if progress is not None:
+                progress(entry)
+
+        if sched is None:
+            for rid in records:
+                done(_export_one(dev, boot, store, rid))
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pyrecover-export') as pool:
+                for entry in pool.map(lambda rid: _export_one(dev, boot, store, rid), records):
+                    done(entry)
+    finally:
+        store.close()
+        if sched is not None:
+            sched.close()
+        raw.close()
+    summary = store.snapshot()
+    summary['errors'] = errors
+    if stats is not None:
+        stats.add_time('export', time.perf_counter() - t0)
+        stats.count('files_exported', summary['files'])
+        stats.count('duplicates', summary['duplicates'])
+        stats.count('bytes_written', summary['bytes_written'])
+    return summary
+
@@ -0,0 +1,199 @@
+"""Quét nhiều volume / image cùng lúc: một process worker cho mỗi đĩa vật lý, song song giữa các đĩa.
+
+Mỗi nguồn (file image, ổ "D:", /dev/sdb...) được đọc bảng phân vùng MBR/GPT để tìm mọi
+volume NTFS; kết quả của tất cả volume được trả về dần dần qua một generator duy nhất.
+"""
+from __future__ import annotations
+import multiprocessing, os, queue, stat, sys, time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterator, List
+from ..core.device import open_device, configure_io, io_options
+from ..core.partitions import Partition, find_ntfs_volumes, open_partition
+from ..fs.ntfs.boot import parse_boot_sector
+from .metadata_scan import build_filter, iter_deleted
+
+QUEUE_MAX = 64      # số lô đang chờ consumer
+SEND_BATCH = 512    # số kết quả mỗi lô gửi từ process worker
+
+
+class _Stopped(BaseException):
+    """Consumer đã bỏ ngang generator (BaseException để không bị except Exception nuốt)."""
+
+
+@dataclass
+class VolumeTarget:
+    source: str
+    partition: Partition
+    disk: Hashable   # các target cùng disk được quét tuần tự
+
+    def describe(self) -> Dict[str, Any]:
+        p = self.partition
+        return {'source': self.source, 'partition': p.index, 'scheme': p.scheme,
+                'volume_offset': p.offset, 'volume_size': p.size, 'type': p.type, 'name': p.name}
+
+
+def _windows_disk(path: str) -> Hashable | None:
+    """Số đĩa vật lý của volume "C:" / "\\\\.\\C:" (IOCTL_VOLUME_GET_VOLUME_DISK_EXTENTS)."""
+    letter = path.rstrip('\\')[-2:]
+    if len(letter) != 2 or letter[1] != ':':
+        return None
+    try:
+        import struct, win32file
+        h = win32file.CreateFile('\\\\.\\' + letter, 0, 3, None, 3, 0, None)
+        try:
+            buf = win32file.DeviceIoControl(h, 0x00560000, None, 32)
+        finally:
+            h.Close()
+        return ('disk', struct.unpack_from('<I', buf, 8)[0])   # extent đầu: DiskNumber
+    except Exception:
+        return None
+
+
+def disk_key(path: str) -> Hashable:
+    """Khóa "đĩa vật lý" của nguồn: các nguồn cùng khóa không được đọc song song."""
+    if sys.platform == 'win32':
+        key = _windows_disk(path)
+        if key is not None:
+            return key
+        return ('path', os.path.abspath(path)[:2].upper())   # file image: theo ổ chứa nó
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ('path', path)
+    if stat.S_ISBLK(st.st_mode):
+        # /dev/sdb1 → sdb: partition có thư mục cha là đĩa trong /sys/class/block
+        name = os.path.basename(os.path.realpath(path))
+        sys_dir = os.path.realpath(os.path.join('/sys/class/block', name))
+        if os.path.exists(os.path.join(sys_dir, 'partition')):
+            return ('disk', os.path.basename(os.path.dirname(sys_dir)))
+        return ('disk', name)
+    # file image: theo filesystem chứa nó (xấp xỉ một đĩa)
+    return ('fs', st.st_dev)
+
+
+def discover(sources: List[str]) -> Iterator[Dict[str, Any] | VolumeTarget]:
+    """VolumeTarget cho từng volume NTFS; nguồn không đọc được → dict {'source', 'error'}."""
+    for src in sources:
+        try:
+            dev = open_device(src)
+            try:
+                parts = find_ntfs_volumes(dev)
+            finally:
+                dev.close()
+        except Exception as e:
+            yield {'event': 'error', 'source': src, 'error': f"{type(e).__name__}: {e}"}
+            continue
+        if not parts:
+            yield {'event': 'error', 'source': src, 'error': 'no NTFS volume found'}
+            continue
+        key = disk_key(src)
+        for p in parts:
+            yield VolumeTarget(src, p, key)
+
+
+def _scan_target(t: VolumeTarget, keep, index_slack: bool, put) -> None:
+    t0 = time.perf_counter()
+    base = t.describe()
+    dev = open_partition(open_device(t.source), t.partition)
+    n = 0
+    try:
+        boot = parse_boot_sector(dev.read(0, 512))
+        for _, _, entry in iter_deleted(dev, boot, keep, index_slack):
+            put({**entry, 'source': t.source, 'partition': t.partition.index,
+                 'volume_offset': t.partition.offset})
+            n += 1
+    except Exception as e:
+        put({'event': 'error', **base, 'error': f"{type(e).__name__}: {e}", 'found': n})
+        return
+    finally:
+        dev.close()
+    put({'event': 'volume_done', **base, 'found': n, 'seconds': round(time.perf_counter() - t0, 3)})
+
+
+def _scan_disk(targets: List[VolumeTarget], filters: Dict[str, Any], index_slack: bool, q, stop) -> None:
+    """Chạy trong process worker: quét tuần tự các volume của một đĩa, gửi kết quả theo lô."""
+    keep = build_filter(**filters)
+    batch: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        if not batch:
+            return
+        while True:
+            try:
+                q.put(list(batch), timeout=0.2)
+                break
+            except queue.Full:
+                if stop.is_set():
+                    raise _Stopped()
+        batch.clear()
+
+    def put(item: Dict[str, Any]) -> None:
+        batch.append(item)
+        if len(batch) >= SEND_BATCH or 'event' in item:
+            flush()
+            if stop.is_set():
+                raise _Stopped()
+
+    try:
+        for t in targets:
+            if stop.is_set():
+                break
+            _scan_target(t, keep, index_slack, put)
+        flush()
+    except _Stopped:
+        pass
+
+
+def batch_scan(sources: List[str], workers: int | None = None, name_contains: str | None = None,
+               min_size: int | None = None, max_size: int | None = None,
+               modified_after: int | None = None, modified_before: int | None = None,
+               index_slack: bool = False) -> Iterator[Dict[str, Any]]:
+    """Trả dần từng file đã xóa (dict như scan_deleted + 'source', 'partition', 'volume_offset')
+    xen với event {'event': 'volume'|'volume_done'|'error', ...}. workers: số đĩa quét song song
+    tối đa (mặc định: số đĩa, không quá số CPU). Mỗi đĩa một process — parse MFT tốn CPU,
+    thread Python không chạy song song được phần đó."""
+    filters = dict(name_contains=name_contains, min_size=min_size, max_size=max_size,
+                   modified_after=modified_after, modified_before=modified_before)
+    groups: 'OrderedDict[Hashable, List[VolumeTarget]]' = OrderedDict()
+    for t in discover(sources):
+        if isinstance(t, dict):
+            yield t
+            continue
+        yield {'event': 'volume', **t.describe()}
+        groups.setdefault(t.disk, []).append(t)
+    if not groups:
+        return
+
+    n = min(workers or len(groups), len(groups), os.cpu_count() or 1)
+    with multiprocessing.Manager() as mgr:
+        q = mgr.Queue(QUEUE_MAX)
+        stop = mgr.Event()
+        # process worker (spawn trên Windows) không thừa hưởng configure_io của process cha
+        pool = ProcessPoolExecutor(max_workers=n, initializer=configure_io, initargs=tuple(io_options().values()))
+        try:
+            futures = {pool.submit(_scan_disk, targets, filters, index_slack, q, stop): targets
+                       for targets in groups.values()}
+            while True:
+                try:
+                    yield from q.get(timeout=0.2)
+                    continue
+                except queue.Empty:
+                    pass
+                if not all(f.done() for f in futures):
+                    continue
+                # mọi worker đã xong: lấy nốt phần còn trong hàng đợi
+                while True:
+                    try:
+                        yield from q.get_nowait()
+                    except queue.Empty:
+                        break
+                for f, targets in futures.items():
+                    if f.exception() is not None:
+                        for t in targets:
+                            yield {'event': 'error', **t.describe(), 'error': f"worker failed: {f.exception()}"}
+                break
+        finally:
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
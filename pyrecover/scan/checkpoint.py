@@ -0,0 +1,142 @@
+"""Checkpoint cho các lần quét dài (scan MFT, carve) để chạy lại tiếp được sau khi process chết.
+
+Mỗi checkpoint gồm hai file:
+  <path>          trạng thái (pickle, ghi nguyên tử bằng tmp + os.replace): vị trí tiếp theo
+                  cần xử lý (record MFT hoặc byte offset), số byte hợp lệ của file kết quả...
+  <path>.results  kết quả đã tìm được, JSON lines, chỉ ghi thêm.
+Kết quả được fsync trước khi ghi trạng thái, nên trạng thái trên đĩa luôn chỉ tới một
+tiền tố đầy đủ của file kết quả; phần ghi sau checkpoint cuối bị cắt bỏ khi resume.
+"""
+from __future__ import annotations
+import hashlib, json, os, pickle, time
+from typing import Any, Dict, Hashable, Iterator, Optional
+from ..fs.ntfs.boot import parse_boot_sector
+from .incremental import volume_key
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_INTERVAL = 30.0   # giây giữa hai lần ghi checkpoint
+
+
+def device_key(dev) -> tuple:
+    """Nhận diện volume/device để không resume nhầm checkpoint của đĩa khác."""
+    try:
+        return ('ntfs',) + volume_key(parse_boot_sector(dev.read(0, 512)))
+    except Exception:
+        return ('raw', getattr(dev, 'size', 0) or 0)
+
+
+def default_checkpoint_path(key: Hashable, op: str) -> str:
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.pyrecover')
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return os.path.join(base, 'PyRecover', 'checkpoints', f"{op}-{digest}.ckpt")
+
+
+class ScanCheckpoint:
+    """position: mọi đơn vị (record / byte) nhỏ hơn position đã xử lý xong và kết quả của
+    chúng đã nằm trong file kết quả. state: trạng thái riêng của lần quét cần để chạy tiếp
+    (vd. SeqMap + danh sách thư mục khi quét thêm slack $I30), phải pickle được."""
+
+    def __init__(self, path: str, op: str, volume: tuple, params: Dict[str, Any],
+                 interval: float = CHECKPOINT_INTERVAL) -> None:
+        self.path = path
+        self.op = op
+        self.volume = tuple(volume)
+        self.params = dict(params)
+        self.interval = interval
+        self.position = 0
+        self.state: Any = None
+        self.count = 0          # số kết quả trong file kết quả
+        self.done = False
+        self._results_len = 0
+        self._out = None
+        self._last = time.monotonic()
+
+    @property
+    def results_path(self) -> str:
+        return self.path + '.results'
+
+    @classmethod
+    def create(cls, path: str, op: str, volume: tuple, params: Dict[str, Any], position: int = 0,
+               **kw) -> 'ScanCheckpoint':
+        """Bắt đầu lần quét mới: xóa kết quả của checkpoint cũ cùng đường dẫn (nếu có)."""
+        ck = cls(path, op, volume, params, **kw)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        ck._out = open(ck.results_path, 'wb')
+        ck.save(position)
+        return ck
+
+    @classmethod
+    def load(cls, path: str, op: str, volume: tuple, params: Dict[str, Any], **kw) -> Optional['ScanCheckpoint']:
+        """None nếu không có checkpoint, khác phiên bản, hoặc được tạo cho volume / lệnh /
+        tùy chọn khác (resume với bộ lọc khác sẽ cho kết quả lẫn lộn)."""
+        try:
+            with open(path, 'rb') as f:
+                version, st = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+        if version != CHECKPOINT_VERSION or st['op'] != op or tuple(st['volume']) != tuple(volume) \
+                or st['params'] != dict(params):
+            return None
+        ck = cls(path, op, volume, params, **kw)
+        ck.position, ck.state, ck.count, ck.done = st['position'], st['state'], st['count'], st['done']
+        ck._results_len = st['results_len']
+        try:
+            out = open(ck.results_path, 'r+b')
+        except OSError:
+            return None
+        out.truncate(ck._results_len)   # bỏ kết quả ghi sau checkpoint cuối
+        out.seek(ck._results_len)
+        ck._out = out
+        return ck
+
+    def add(self, item: Any) -> None:
+        self._out.write(json.dumps(item, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.count += 1
+
+    def progress(self, position: int, state: Any = None) -> None:
+        """Gọi thường xuyên (mỗi record / chunk); chỉ ghi ra đĩa mỗi `interval` giây."""
+        if time.monotonic() - self._last >= self.interval:
+            self.save(position, state)
+
+    def save(self, position: int, state: Any = None) -> None:
+        self._out.flush()
+        os.fsync(self._out.fileno())
+        self.position = position
+        self.state = state
+        self._results_len = self._out.tell()
+        st = {'op': self.op, 'volume': self.volume, 'params': self.params, 'position': position,
+              'state': state, 'count': self.count, 'done': self.done, 'results_len': self._results_len}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump((CHECKPOINT_VERSION, st), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._last = time.monotonic()
+
+    def finish(self, state: Any = None) -> None:
+        """Đánh dấu đã quét xong (resume sau đó chỉ đọc lại kết quả); state: kết quả tổng hợp
+        sau khi quét (nếu có) cần giữ cho lần đọc lại."""
+        self.done = True
+        self.save(self.position, state)
+
+    def results(self) -> Iterator[Any]:
+        """Các kết quả đã ghi (gồm cả phần chưa tới checkpoint)."""
+        self._out.flush()
+        with open(self.results_path, 'rb') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def discard(self) -> None:
+        """Xóa checkpoint + kết quả (khi kết quả đã được lưu ở nơi khác)."""
+        self.close()
+        for p in (self.path, self.results_path):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
@@ -0,0 +1,93 @@
+"""Bộ lọc của lần quét, chia theo giai đoạn để áp dụng càng sớm càng tốt (xem iter_deleted):
+  1. cờ header (đã xóa / thư mục)      — trước khi apply fixup, parse attribute
+  2. tên, đuôi, glob/regex, ngày sửa   — ngay sau $STANDARD_INFORMATION / $FILE_NAME, trước khi
+                                         giải mã $DATA (runlist)
+  3. kích thước                        — sau khi parse record
+  4. path                              — sau khi duyệt xong, trên cây thư mục (PathBuilder, có nhớ)
+"""
+from __future__ import annotations
+import fnmatch, re
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional, Sequence
+
+
+def normalize_path(path: str) -> str:
+    """'./Users/An/' , '\\Users\\an' → 'users/an' (NTFS không phân biệt hoa thường; '.' là gốc)."""
+    p = path.replace('\\', '/').strip('/')
+    if p == '.' or p.startswith('./'):
+        p = p[1:].lstrip('/')
+    return p.lower()
+
+
+@dataclass
+class ScanFilter:
+    """Gọi như keep(name, size, mtime) -> bool (giai đoạn 2 + 3) để tương thích với build_filter.
+    extensions: không phân biệt hoa thường, có hoặc không có dấu chấm ('jpg', '.JPG').
+    name_glob: fnmatch, không phân biệt hoa thường; name_regex: re.search, không phân biệt hoa thường.
+    modified_after/modified_before: FILETIME. path_prefix: thư mục (vd. 'Users/an/Documents')."""
+    deleted_only: bool = True
+    name_contains: Optional[str] = None
+    extensions: Sequence[str] = ()
+    name_glob: Optional[str] = None
+    name_regex: Optional[str] = None
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    modified_after: Optional[int] = None
+    modified_before: Optional[int] = None
+    path_prefix: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.extensions = tuple(self.extensions or ())
+        self._nc = (self.name_contains or '').lower()
+        self._exts = tuple('.' + e.lower().lstrip('.') for e in self.extensions)
+        self._glob = re.compile(fnmatch.translate(self.name_glob), re.IGNORECASE) if self.name_glob else None
+        self._regex = re.compile(self.name_regex, re.IGNORECASE) if self.name_regex else None
+        self._prefix = normalize_path(self.path_prefix) if self.path_prefix else None
+        self._by_name = bool(self._nc or self._exts or self._glob or self._regex
+                             or self.modified_after is not None or self.modified_before is not None)
+
+    @property
+    def filters_names(self) -> bool:
+        """True nếu giai đoạn 2 có điều kiện (đáng dừng parse record sớm)."""
+        return self._by_name
+
+    @property
+    def filters_paths(self) -> bool:
+        return self._prefix is not None
+
+    def by_name(self, name: str, mtime: int) -> bool:
+        if self._nc and self._nc not in name.lower():
+            return False
+        if self._exts and not name.lower().endswith(self._exts):
+            return False
+        if self._glob is not None and not self._glob.match(name):
+            return False
+        if self._regex is not None and not self._regex.search(name):
+            return False
+        if self.modified_after is not None and mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and mtime > self.modified_before:
+            return False
+        return True
+
+    def by_size(self, size: int) -> bool:
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        return True
+
+    def by_path(self, path: Optional[str]) -> bool:
+        if self._prefix is None:
+            return True
+        if path is None:
+            return False
+        p = normalize_path(path)
+        return not self._prefix or p == self._prefix or p.startswith(self._prefix + '/')
+
+    def __call__(self, name: str, size: int, mtime: int) -> bool:
+        return self.by_size(size) and self.by_name(name, mtime)
+
+    def params(self) -> Dict[str, Any]:
+        """Các tùy chọn (để so khi resume checkpoint)."""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
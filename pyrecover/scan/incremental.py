@@ -0,0 +1,156 @@
+from __future__ import annotations
+import os, pickle
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+from ..core.device import open_device
+from ..core.stats import ScanStats, instrument
+from ..fs.ntfs.boot import parse_boot_sector, NtfsBoot
+from ..fs.ntfs.mft import iter_mft_records, RecordSummary
+
+SNAPSHOT_VERSION = 1
+REC_IN_USE = 0x0001
+REC_IS_DIR = 0x0002
+
+
+def volume_key(boot: NtfsBoot) -> Tuple[int, int, int]:
+    return (boot.volume_serial, boot.total_sectors, boot.mft_lcn)
+
+
+def default_snapshot_path(boot: NtfsBoot) -> str:
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.pyrecover')
+    return os.path.join(base, 'PyRecover', 'snapshots', f"{boot.volume_serial:016X}.snap")
+
+
+class MftSnapshot:
+    """Trạng thái MFT của một lần quét: record -> (lsn, seq, flags, RecordSummary).
+    Lần quét sau so header (lsn/seq/flags) với snapshot để bỏ qua record không đổi."""
+
+    def __init__(self, volume: Tuple[int, int, int]) -> None:
+        self.volume = volume
+        self.entries: Dict[int, Tuple[int, int, int, RecordSummary]] = {}
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + '.tmp'
+        # lưu tuple thuần (không pickle class) để file snapshot không phụ thuộc tên module
+        rows = [(idx, lsn, seq, flags, tuple(summ)) for idx, (lsn, seq, flags, summ) in self.entries.items()]
+        with open(tmp, 'wb') as f:
+            pickle.dump((SNAPSHOT_VERSION, self.volume, rows), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, volume: Tuple[int, int, int] | None = None) -> Optional['MftSnapshot']:
+        """None nếu không có file, khác phiên bản hoặc là snapshot của volume khác."""
+        try:
+            with open(path, 'rb') as f:
+                version, vol, rows = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+        if version != SNAPSHOT_VERSION or (volume is not None and tuple(vol) != tuple(volume)):
+            return None
+        snap = cls(tuple(vol))
+        snap.entries = {idx: (lsn, seq, flags, RecordSummary(*s)) for idx, lsn, seq, flags, s in rows}
+        return snap
+
+
+@dataclass
+class ScanDelta:
+    added: List[int] = field(default_factory=list)          # record mới (hoặc bị tái sử dụng cho file khác)
+    removed: List[int] = field(default_factory=list)        # file trong snapshot không còn (mất record / record bị tái sử dụng)
+    newly_deleted: List[int] = field(default_factory=list)  # bị xóa từ lần trước (kể cả file tạo rồi xóa giữa hai lần quét)
+    changed: List[int] = field(default_factory=list)        # vẫn là file đó nhưng record đã sửa
+    reused: int = 0      # số record lấy lại từ snapshot (không parse)
+    parsed: int = 0      # số record phải parse lại
+
+    def as_dict(self) -> dict:
+        return {
+            'added': self.added, 'removed': self.removed,
+            'newly_deleted': self.newly_deleted, 'changed': self.changed,
+            'reused': self.reused, 'parsed': self.parsed,
+        }
+
+
+def _classify(delta: ScanDelta, idx: int, old, seq: int, in_use: bool) -> None:
+    if old is None:
+        # record chưa có trong snapshot: file mới, hoặc file tạo rồi xóa giữa hai lần quét
+        (delta.added if in_use else delta.newly_deleted).append(idx)
+        return
+    old_seq, old_in_use = old[1], bool(old[2] & REC_IN_USE)
+    # xóa file làm tăng sequence đúng 1 → record đã xóa có seq+1 vẫn là file cũ
+    same_file = seq == old_seq or (not in_use and seq == (old_seq + 1) & 0xFFFF)
+    if not same_file:
+        if in_use:
+            delta.added.append(idx)
+        else:
+            # record được dùng cho file khác rồi file đó bị xóa: file cũ mất, file mới đã xóa
+            delta.removed.append(idx)
+            delta.newly_deleted.append(idx)
+    elif old_in_use and not in_use:
+        delta.newly_deleted.append(idx)
+    elif in_use and not old_in_use:
+        delta.added.append(idx)
+    else:
+        delta.changed.append(idx)
+
+
+def iter_incremental(dev, boot: NtfsBoot, old: MftSnapshot | None, new: MftSnapshot,
+                     delta: ScanDelta | None = None, stats=None, start: int = 0) -> Iterator[Tuple[int, RecordSummary, bool]]:
+    """Duyệt MFT, trả (record, summary, parsed) theo thứ tự record; record có header
+    (lsn, seq, flags) giống snapshot cũ được lấy lại nguyên từ snapshot (parsed=False).
+    Ghi kết quả vào `new` và (nếu có) phân loại thay đổi vào `delta`.
+    start > 0 (chạy tiếp từ checkpoint): `new` chỉ chứa các record từ start trở đi, không
+    dùng làm snapshot được; delta.removed không được tính."""
+    prev = old.entries if old is not None else {}
+    pending: List[int] = []
+
+    def skip(idx: int, lsn: int, seq: int, flags: int) -> bool:
+        e = prev.get(idx)
+        if e is None or e[0] != lsn or e[1] != seq or e[2] != flags & (REC_IN_USE | REC_IS_DIR):
+            return False
+        new.entries[idx] = e
+        pending.append(idx)
+        return True
+
+    def drain() -> Iterator[Tuple[int, RecordSummary, bool]]:
+        if delta is not None:
+            delta.reused += len(pending)
+        for p in pending:
+            yield p, new.entries[p][3], False
+        pending.clear()
+
+    for idx, rec in iter_mft_records(dev, boot, skip=skip if prev else None, stats=stats, start=start):
+        yield from drain()
+        flags = (REC_IN_USE if rec.in_use else 0) | (REC_IS_DIR if rec.is_dir else 0)
+        summ = rec.summary()
+        new.entries[idx] = (rec.lsn, rec.seq, flags, summ)
+        if delta is not None:
+            delta.parsed += 1
+            _classify(delta, idx, prev.get(idx), rec.seq, rec.in_use)
+        yield idx, summ, True
+    yield from drain()
+
+    if delta is not None and not start:
+        delta.removed.extend(idx for idx in prev if idx not in new.entries)
+        delta.removed.sort()
+
+
+def incremental_rescan(image_path: str, snapshot_path: str | None = None, stats: ScanStats | None = None) -> ScanDelta:
+    """Quét lại so với snapshot lần trước (nếu có) rồi ghi snapshot mới."""
+    dev = instrument(open_device(image_path), stats)
+    try:
+        boot = parse_boot_sector(dev.read(0, 512))
+        path = snapshot_path or default_snapshot_path(boot)
+        vol = volume_key(boot)
+        old = MftSnapshot.load(path, vol)
+        new = MftSnapshot(vol)
+        delta = ScanDelta()
+        for _ in iter_incremental(dev, boot, old, new, delta, stats=stats):
+            pass
+        if stats is not None:
+            with stats.stage('snapshot.save'):
+                new.save(path)
+        else:
+            new.save(path)
+        return delta
+    finally:
+        dev.close()
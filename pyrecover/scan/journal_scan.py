@@ -0,0 +1,60 @@
+from __future__ import annotations
+from typing import List, Dict, Any
+from ..core.device import open_device
+from ..core.stats import ScanStats, instrument
+from ..core.utils import filetime_to_iso
+from ..fs.ntfs.boot import parse_boot_sector
+from ..fs.ntfs.mft import read_mft_record
+from ..fs.ntfs.usn import find_usn_journal, iter_usn_events, DELETE_RENAME_MASK
+
+
+def recent_changes(image_path: str, since: int | None = None, reason_mask: int = DELETE_RENAME_MASK,
+                   resolve: bool = False, stats: ScanStats | None = None) -> List[Dict[str, Any]]:
+    """Liệt kê event xóa/đổi tên trong $UsnJrnl kể từ `since` (FILETIME).
+    resolve=True: chỉ đọc đúng các record MFT bị ảnh hưởng (không quét cả MFT) để biết
+    record còn mô tả file đó không (đã xóa nhưng chưa bị tái sử dụng → còn khôi phục được)."""
+    dev = instrument(open_device(image_path), stats)
+    try:
+        boot = parse_boot_sector(dev.read(0, 512))
+        stream = find_usn_journal(dev, boot)
+        if stream is None:
+            raise RuntimeError("USN journal not found ($Extend\\$UsnJrnl:$J)")
+        events = list(iter_usn_events(dev, boot, stream, since=since, reason_mask=reason_mask))
+        if stats is not None:
+            stats.count('usn_events', len(events))
+        current: Dict[int, Any] = {}
+        if resolve:
+            for ref in sorted({ev.file_ref for ev in events}):
+                try:
+                    current[ref] = read_mft_record(dev, boot, ref)
+                except Exception:
+                    current[ref] = None
+        out: List[Dict[str, Any]] = []
+        for ev in events:
+            item = {
+                'usn': ev.usn,
+                'time': filetime_to_iso(ev.timestamp),
+                'reasons': ev.reasons,
+                'record': ev.file_ref,
+                'seq': ev.file_seq,
+                'parent': ev.parent_ref,
+                'name': ev.name,
+            }
+            if resolve:
+                rec = current.get(ev.file_ref)
+                if rec is None:
+                    item['mft'] = None
+                else:
+                    # xóa làm tăng sequence: seq+1 & !in_use nghĩa là record vẫn là file này
+                    same = rec.seq == ev.file_seq or (not rec.in_use and rec.seq == (ev.file_seq + 1) & 0xFFFF)
+                    item['mft'] = {
+                        'in_use': rec.in_use,
+                        'seq': rec.seq,
+                        'name': rec.fn.name if rec.fn else None,
+                        'size': rec.size,
+                        'same_file': same,
+                    }
+            out.append(item)
+        return out
+    finally:
+        dev.close()
@@ -1,37 +1,318 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Iterable
-from ..core.device_windows import DeviceWindows
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Tuple
+from ..core.device import open_device
+from ..core.stats import ScanStats, instrument
+from ..core.utils import filetime_to_iso
 from ..fs.ntfs.boot import parse_boot_sector, NtfsBoot
-from ..fs.ntfs.mft import iter_mft_records, MftRecord
+from ..fs.ntfs.mft import iter_mft_records, MftRecord, RecordSummary
+from ..fs.ntfs.index import scan_index_slack, SeqMap, IndexEntry
+from .checkpoint import ScanCheckpoint, default_checkpoint_path, device_key
+from .filters import ScanFilter
+from .incremental import REC_IN_USE, REC_IS_DIR
+from .paths import PathBuilder
+from .recoverability import ClusterUsage, apply_scores, read_bitmap
 
 
-def scan_deleted(image_path: str, path_filter: str | None = None, name_contains: str | None = None) -> List[Dict[str, Any]]:
-    dev = DeviceWindows(image_path)
+def sort_key(sort_by: str, rid: int, s) -> Any:
+    """Khóa sắp xếp (một trong core.constants.SORT_KEYS) của record rid (s: RecordSummary)."""
+    if sort_by == 'record':
+        return rid
+    if sort_by == 'name':
+        return s.name.lower()
+    # size/created/modified: so sánh giá trị thô (int, FILETIME) chứ không phải chuỗi ISO
+    return getattr(s, sort_by)
+
+
+def record_entry(rid: int, rec: MftRecord, s: RecordSummary | None = None) -> Dict[str, Any]:
+    if s is None:
+        s = rec.summary()
+    return {
+        'record': rid,
+        'name': s.name,
+        'is_dir': rec.is_dir,
+        'has_runs': bool(rec.data and rec.data.non_resident and rec.data.run_count > 0),
+        'resident_len': (len(rec.data.resident_data) if rec.data and rec.data.resident_data else 0),
+        'size': s.size,
+        'allocated_size': s.allocated,
+        'created': filetime_to_iso(s.created),
+        'modified': filetime_to_iso(s.modified),
+        'mft_modified': filetime_to_iso(s.mft_modified),
+        'accessed': filetime_to_iso(s.accessed),
+        'streams': [{'name': st.name, 'size': st.real_size} for st in rec.streams],
+        'source': 'mft',
+    }
+
+
+def index_entry(e: IndexEntry) -> Dict[str, Any]:
+    """Entry khôi phục từ slack của $I30: chỉ có metadata (record MFT đã bị tái sử dụng)."""
+    return {
+        'record': e.file_ref,
+        'name': e.name,
+        'is_dir': e.is_dir,
+        'has_runs': False,
+        'resident_len': 0,
+        'size': e.real_size,
+        'allocated_size': e.allocated_size,
+        'created': filetime_to_iso(e.created),
+        'modified': filetime_to_iso(e.modified),
+        'mft_modified': filetime_to_iso(e.mft_modified),
+        'accessed': filetime_to_iso(e.accessed),
+        'streams': [],
+        'source': 'index_slack',
+        'parent': e.parent_ref,
+        'dir_record': e.dir_record,
+    }
+
+
+def build_filter(name_contains: str | None = None, min_size: int | None = None, max_size: int | None = None,
+                 modified_after: int | None = None,
+                 modified_before: int | None = None) -> ScanFilter:
+    """keep(name, size, mtime) -> bool theo các tiêu chí của scan_deleted (ScanFilter gọi được
+    như hàm; truyền cho iter_deleted thì được áp dụng sớm, xem scan.filters)."""
+    return ScanFilter(name_contains=name_contains, min_size=min_size, max_size=max_size,
+                      modified_after=modified_after, modified_before=modified_before)
+
+
+@dataclass
+class WalkState:
+    """Trạng thái của iter_deleted cần để chạy tiếp (pickle trong checkpoint)."""
+    known: SeqMap | None = None            # slack $I30: seq / in_use của mọi record
+    dirs: List[tuple] = field(default_factory=list)   # slack $I30: (record, $INDEX_ALLOCATION)
+    usage: ClusterUsage | None = None      # recoverability
+    tree: Dict[int, RecordSummary] | None = None      # lọc path: summary của thư mục
+    pending: List[tuple] = field(default_factory=list)  # lọc path: (record, summary, entry) chờ lọc
+
+
+def _name_accept(flt: ScanFilter, keep_dirs: int, keep_live: bool) -> Callable[[int, Any, Any], bool]:
+    """Hàm accept(flags, fn, si) cho iter_mft_records: lọc theo tên/ngày trước khi giải mã
+    $DATA; thư mục (keep_dirs) và record đang dùng (keep_live) luôn được parse tiếp."""
+    def accept(flags: int, fn, si) -> bool:
+        if flags & keep_dirs or keep_live and flags & REC_IN_USE:
+            return True
+        return fn is not None and flt.by_name(fn.name, si.modified if si else 0)
+    return accept
+
+
+def _track_filtered(known: SeqMap, accept: Callable[[int, Any, Any], bool]
+                    ) -> Tuple[Callable[[int, int, int, int], bool], Callable[[int, Any, Any], bool]]:
+    """(skip, accept) cho iter_mft_records: record bị accept loại vẫn được ghi (seq, in_use) vào
+    known, nếu không entry slack $I30 trỏ tới nó bị báo lại như file mồ côi. skip không bỏ record
+    nào, chỉ giữ seq từ header đã đọc để accept dùng khi loại record đó."""
+    hdr = [0, 0]   # (record, seq) của record đang parse
+
+    def skip(idx: int, lsn: int, seq: int, flags: int) -> bool:
+        hdr[0], hdr[1] = idx, seq
+        return False
+
+    def track(flags: int, fn, si) -> bool:
+        if accept(flags, fn, si):
+            return True
+        known.add(hdr[0], hdr[1], bool(flags & REC_IN_USE))
+        return False
+    return skip, track
+
+
+def iter_deleted(dev, boot: NtfsBoot, keep: Callable[[str, int, int], bool] | None = None,
+                 index_slack: bool = False, stats: ScanStats | None = None, start: int = 0,
+                 state: WalkState | None = None,
+                 progress: Callable[[int, Any], None] | None = None,
+                 usage: ClusterUsage | None = None) -> Iterator[Tuple[int, Any, Dict[str, Any]]]:
+    """(record, summary/IndexEntry để sắp xếp, entry) của file đã xóa trên volume đang mở,
+    theo thứ tự gặp (record MFT trước, rồi entry từ slack $I30). record = -1 nếu không biết.
+    keep: ScanFilter — áp dụng sớm: record đang dùng bị bỏ ngay từ cờ header, tên/ngày được
+    lọc trước khi giải mã $DATA; lọc path cần cây thư mục nên file qua các bộ lọc khác được
+    giữ lại và yield (kèm 'path') sau khi duyệt xong MFT. deleted_only=False: yield cả file
+    đang dùng (entry có 'in_use'). Hàm keep(name, size, mtime) bất kỳ: lọc sau khi parse.
+    usage: nếu có, thu thập runlist của file đang dùng / file đã xóa được yield để chấm
+    khả năng khôi phục sau khi duyệt xong (xem scan.recoverability).
+    progress(next_record, state): gọi trước mỗi record MFT — mọi record nhỏ hơn đã xử lý và
+    đã được yield; start/state: chạy tiếp từ giá trị progress đã báo (xem scan.checkpoint)."""
+    flt = keep if isinstance(keep, ScanFilter) else None
+    if state is None:
+        state = WalkState(known=SeqMap() if index_slack else None, usage=usage,
+                          tree={} if flt is not None and flt.filters_paths else None)
+    known, dirs, usage, tree = state.known, state.dirs, state.usage, state.tree
+    deleted_only = flt is None or flt.deleted_only
+    # record đang dùng vẫn phải parse đủ khi trạng thái cần tới (seq cho slack $I30, runlist
+    # cho recoverability); thư mục luôn được parse khi lọc path
+    need_live = known is not None or usage is not None
+    keep_dirs = REC_IS_DIR if tree is not None else 0
+    skip = None
+    if deleted_only and not need_live:
+        skip = lambda idx, lsn, seq, flags: flags & REC_IN_USE and not flags & keep_dirs
+    accept = _name_accept(flt, keep_dirs, need_live or not deleted_only) \
+        if flt is not None and flt.filters_names else None
+    if accept is not None and known is not None:
+        skip, accept = _track_filtered(known, accept)   # need_live: skip chưa được đặt
+    for rid, rec in iter_mft_records(dev, boot, stats=stats, start=start, skip=skip, accept=accept):
+        if progress is not None:
+            progress(rid, state)
+        if known is not None:
+            known.add(rid, rec.seq, rec.in_use)
+            if rec.index_alloc is not None:
+                dirs.append((rid, rec.index_alloc))
+        if tree is not None and rec.is_dir and rec.fn is not None:
+            tree[rid] = rec.summary()
+        if rec.in_use:
+            if usage is not None:
+                usage.add_live(rec)
+            if deleted_only:
+                continue  # chỉ quan tâm đã xóa
+        if rec.fn is None or rec.data is None:
+            continue
+        if keep is not None and not keep(rec.fn.name, rec.data.real_size, rec.si.modified if rec.si else 0):
+            continue
+        if usage is not None and not rec.in_use:
+            usage.add_deleted(rid, rec.data)
+        s = rec.summary()
+        entry = record_entry(rid, rec, s)
+        if not deleted_only:
+            entry['in_use'] = rec.in_use
+        if tree is not None:
+            state.pending.append((rid, s, entry))
+            continue
+        yield rid, s, entry
+    pb = None
+    if tree is not None:
+        pb = PathBuilder(tree)
+        for rid, s, entry in state.pending:
+            tree[rid] = s
+            path = pb.path(rid)
+            if flt.by_path(path):
+                entry['path'] = path
+                yield rid, s, entry
+    if index_slack:
+        t0 = time.perf_counter()
+        for e in scan_index_slack(dev, boot, dirs, known):
+            if keep is not None and not keep(e.name, e.real_size, e.modified):
+                continue
+            entry = index_entry(e)
+            if pb is not None:
+                parent = pb.path(e.parent_ref)
+                path = f"{parent}/{e.name}" if parent else None
+                if not flt.by_path(path):
+                    continue
+                entry['path'] = path
+            yield (e.file_ref if e.file_ref is not None else -1), e, entry
+        if stats is not None:
+            stats.add_time('index_slack', time.perf_counter() - t0)
+
+
+def _entry_sort_key(sort_by: str, entry: Dict[str, Any]) -> Any:
+    """Như sort_key nhưng trên entry đã ghi (kết quả đọc lại từ checkpoint): ngày ở dạng
+    ISO cùng định dạng nên so chuỗi đúng thứ tự thời gian; None (không có) đứng đầu.
+    record None (entry slack $I30 mất header) là -1, như khi quét không có checkpoint."""
+    v = entry[sort_by]
+    if sort_by == 'name':
+        return v.lower()
+    if sort_by in ('created', 'modified'):
+        return v or ''
+    return -1 if v is None else v
+
+
+def scan_deleted(image_path: str, path_filter: str | None = None, name_contains: str | None = None,
+                 min_size: int | None = None, max_size: int | None = None,
+                 modified_after: int | None = None, modified_before: int | None = None,
+                 sort_by: str | None = None, index_slack: bool = False,
+                 stats: ScanStats | None = None, checkpoint: str | None = None,
+                 resume: bool = False, recoverability: bool = False,
+                 min_recoverable: float | None = None, extensions: Iterable[str] = (),
+                 name_glob: str | None = None, name_regex: str | None = None,
+                 include_live: bool = False) -> List[Dict[str, Any]]:
+    """modified_after/modified_before là FILETIME (xem core.utils.parse_date_arg).
+    path_filter: chỉ file nằm dưới thư mục này (vd. 'Users/an/Documents'), entry có thêm 'path';
+    extensions / name_glob / name_regex / include_live: xem scan.filters.ScanFilter.
+    index_slack=True: quét thêm slack của index thư mục ($I30) để tìm file mà record MFT
+    đã bị tái sử dụng.
+    stats: nếu có, ghi số liệu đọc/parse vào đó (xem core.stats).
+    checkpoint: file checkpoint — ghi định kỳ record đã quét tới và kết quả tìm được
+    (xem scan.checkpoint); resume=True: chạy tiếp từ checkpoint đó (mặc định: đường dẫn
+    theo volume), ValueError nếu không có checkpoint khớp volume và tùy chọn.
+    recoverability=True: thêm 'recoverable' (% cluster chưa bị cấp lại theo $Bitmap và runlist
+    của file đang dùng, xem scan.recoverability); min_recoverable: bỏ file dưới ngưỡng % đó."""
+    dev = instrument(open_device(image_path), stats)
     try:
         boot = parse_boot_sector(dev.read(0, 512))
+        keep = ScanFilter(not include_live, name_contains, tuple(extensions), name_glob, name_regex,
+                          min_size, max_size, modified_after, modified_before, path_filter)
+        score = recoverability or min_recoverable is not None
+        if checkpoint is not None or resume:
+            params = dict(keep.params(), index_slack=index_slack, recoverability=score)
+            results = _scan_checkpointed(dev, boot, keep, params, sort_by, stats, checkpoint, resume)
+            return _min_recoverable(results, min_recoverable)
+        usage = ClusterUsage() if score else None
         results: List[Dict[str, Any]] = []
-        pf = (path_filter or '').lower()
-        nc = (name_contains or '').lower()
-        for rid, rec in iter_mft_records(dev, boot):
-            if rec.in_use:
-                continue  # chỉ quan tâm đã xóa
-            if rec.fn is None or rec.data is None:
-                continue
-            name = rec.fn.name
-            # Đường dẫn đầy đủ cần dựng từ parent chain; MVP: lọc đơn giản theo tên
-            if nc and nc not in name.lower():
-                continue
-            if pf and pf not in name.lower():
-                # tạm thời không có full path → cho phép lọc theo name chứa folder keyword
-                pass
-            entry = {
-                'record': rid,
-                'name': name,
-                'is_dir': rec.is_dir,
-                'has_runs': (rec.data.non_resident and len(rec.data.runs) > 0),
-                'resident_len': (len(rec.data.resident_data) if rec.data.resident_data else 0),
-            }
+        keys: List[Any] = []
+        for rid, s, entry in iter_deleted(dev, boot, keep, index_slack, stats, usage=usage):
             results.append(entry)
+            if sort_by:
+                keys.append(sort_key(sort_by, rid, s))
+        if usage is not None:
+            apply_scores(results, _score(dev, boot, usage, stats))
+            if min_recoverable is not None:
+                kept = [i for i, e in enumerate(results) if recoverable_enough(e, min_recoverable)]
+                results = [results[i] for i in kept]
+                keys = [keys[i] for i in kept] if sort_by else keys
+        if sort_by:
+            order = sorted(range(len(results)), key=keys.__getitem__)
+            results = [results[i] for i in order]
         return results
     finally:
         dev.close()
+
+
+def _score(dev, boot: NtfsBoot, usage: ClusterUsage, stats: ScanStats | None) -> Dict[int, float]:
+    t0 = time.perf_counter()
+    bitmap = read_bitmap(dev, boot)
+    scores = usage.scores(bitmap, boot.cluster_size)
+    if stats is not None:
+        stats.add_time('recoverability', time.perf_counter() - t0)
+        if bitmap is None:
+            stats.count('bitmap_unreadable')
+    return scores
+
+
+def recoverable_enough(entry: Dict[str, Any], threshold: float) -> bool:
+    """entry['recoverable'] >= threshold; entry từ slack $I30 không có runlist (None) được giữ
+    lại vì không biết để loại."""
+    return entry.get('recoverable') is None or entry['recoverable'] >= threshold
+
+
+def _min_recoverable(results: List[Dict[str, Any]], threshold: float | None) -> List[Dict[str, Any]]:
+    if threshold is None:
+        return results
+    return [e for e in results if recoverable_enough(e, threshold)]
+
+
+def _scan_checkpointed(dev, boot: NtfsBoot, keep, params: Dict[str, Any], sort_by: str | None,
+                       stats: ScanStats | None, path: str | None, resume: bool) -> List[Dict[str, Any]]:
+    vol = device_key(dev)
+    if path is None:
+        path = default_checkpoint_path(vol, 'scan-mft')
+    if resume:
+        ck = ScanCheckpoint.load(path, 'scan-mft', vol, params)
+        if ck is None:
+            raise ValueError(f"No checkpoint to resume at {path} (missing, or made for another volume/options)")
+    else:
+        ck = ScanCheckpoint.create(path, 'scan-mft', vol, params)
+    try:
+        if not ck.done:
+            usage = None
+            if params['recoverability']:
+                # resume: runlist đã thu thập trước đó nằm trong state của checkpoint
+                usage = ck.state.usage if ck.state is not None else ClusterUsage()
+            for _, _, entry in iter_deleted(dev, boot, keep, params['index_slack'], stats,
+                                            ck.position, ck.state, ck.progress, usage):
+                ck.add(entry)
+            # điểm tính một lần khi quét xong, giữ trong checkpoint cho lần đọc lại
+            ck.finish(_score(dev, boot, usage, stats) if usage is not None else None)
+        results = list(ck.results())
+        if params['recoverability']:
+            apply_scores(results, ck.state or {})
+    finally:
+        ck.close()
+    if sort_by:
+        results.sort(key=lambda e: _entry_sort_key(sort_by, e))
+    return results
@@ -0,0 +1,55 @@
+from __future__ import annotations
+from typing import Dict, Mapping, Optional
+from ..fs.ntfs.mft import RecordSummary
+
+ROOT_RECORD = 5  # thư mục gốc "."
+
+
+class PathBuilder:
+    """Dựng đường dẫn từ chuỗi parent của RecordSummary, nhớ sẵn path của từng thư mục
+    nên file cùng thư mục chỉ tốn một lần tra dict thay vì đi lại cả chuỗi parent."""
+
+    def __init__(self, index: Mapping[int, RecordSummary], stats=None, max_depth: int = 64) -> None:
+        self.index = index
+        self.stats = stats
+        self.max_depth = max_depth
+        self._dirs: Dict[int, Optional[str]] = {}
+
+    def _dir_path(self, rid: int) -> Optional[str]:
+        memo = self._dirs
+        if rid in memo:
+            if self.stats is not None:
+                self.stats.cache('paths', True)
+            return memo[rid]
+        if self.stats is not None:
+            self.stats.cache('paths', False)
+        # đi lên tới thư mục đã nhớ / gốc / vòng lặp, rồi điền memo trên đường quay xuống
+        chain = []
+        seen = set()
+        cur: Optional[int] = rid
+        base: Optional[str] = None
+        while cur is not None and len(chain) < self.max_depth:
+            if cur in memo:
+                base = memo[cur]
+                break
+            summ = self.index.get(cur)
+            if summ is None or cur in seen:
+                break
+            seen.add(cur)
+            chain.append((cur, summ.name))
+            if summ.parent is None or summ.parent == cur:
+                break
+            cur = summ.parent
+        for r, name in reversed(chain):
+            base = f"{base}/{name}" if base else name
+            memo[r] = base
+        return memo.get(rid, base)
+
+    def path(self, rid: int) -> Optional[str]:
+        summ = self.index.get(rid)
+        if summ is None:
+            return None
+        if summ.parent is None or summ.parent == rid:
+            return summ.name
+        parent = self._dir_path(summ.parent)
+        return f"{parent}/{summ.name}" if parent else summ.name
@@ -0,0 +1,142 @@
+"""Ước lượng khả năng khôi phục của file đã xóa: tỉ lệ cluster dữ liệu của file vẫn trống
+trong $Bitmap và không nằm trong runlist của file đang dùng (tức là chưa bị ghi đè).
+
+Runlist của file đang dùng được thu thập trong cùng lần duyệt MFT; sau khi duyệt xong, các
+extent của mọi file đã xóa được sắp theo LCN và quét một lượt song song với danh sách extent
+đang dùng (đã gộp, sắp xếp), đếm bit của $Bitmap bằng popcount trên cả đoạn byte.
+"""
+from __future__ import annotations
+from array import array
+from typing import Dict, List, Optional, Tuple
+from ..fs.ntfs.boot import NtfsBoot
+from ..fs.ntfs.mft import read_mft_record, DataAttr, MftRecord, SPARSE_LCN
+
+BITMAP_RECORD = 6   # $Bitmap: 1 bit / cluster, 1 = đang được cấp phát
+READ_CHUNK = 4 * 1024 * 1024
+
+
+def read_bitmap(dev, boot: NtfsBoot) -> Optional[bytes]:
+    """Nội dung $Bitmap của volume; None nếu record 6 không phải $Bitmap hoặc không đọc được."""
+    try:
+        rec = read_mft_record(dev, boot, BITMAP_RECORD)
+    except (ValueError, IOError):
+        return None
+    if rec is None or rec.fn is None or rec.fn.name != '$Bitmap' or rec.data is None:
+        return None
+    data = rec.data
+    if data.resident_data is not None:
+        return data.resident_data
+    cs = boot.cluster_size
+    parts: List[bytes] = []
+    remaining = data.real_size
+    try:
+        for lcn, length in data.iter_runs():
+            if remaining <= 0:
+                break
+            n = min(length * cs, remaining)
+            if lcn == SPARSE_LCN:
+                parts.append(bytes(n))
+            else:
+                off = boot.lcn_to_off(lcn)
+                for pos in range(0, n, READ_CHUNK):
+                    parts.append(dev.read(off + pos, min(READ_CHUNK, n - pos)))
+            remaining -= n
+    except (ValueError, IOError):
+        return None
+    return b''.join(parts)
+
+
+def _set_bits(bitmap: bytes, a: int, b: int) -> int:
+    """Số cluster đang cấp phát trong [a, b); cluster ngoài bitmap (ngoài volume) coi như đã cấp."""
+    nbits = len(bitmap) * 8
+    extra = b - max(a, nbits) if b > nbits else 0
+    b = min(b, nbits)
+    if b <= a:
+        return extra
+    lo, hi = a >> 3, (b + 7) >> 3
+    v = int.from_bytes(bitmap[lo:hi], 'little') >> (a & 7)
+    return (v & ((1 << (b - a)) - 1)).bit_count() + extra
+
+
+class ClusterUsage:
+    """Thu thập trong lúc duyệt MFT: extent của file đang dùng và runlist của file đã xóa.
+    Pickle được (lưu trong checkpoint cùng trạng thái quét)."""
+
+    def __init__(self) -> None:
+        self._live = array('q')    # [start0, end0, start1, end1, ...] theo LCN
+        self._deleted: Dict[int, Tuple[array, int]] = {}   # record -> (run_pairs, real_size)
+
+    def add_live(self, rec: MftRecord) -> None:
+        attrs = [rec.data, rec.index_alloc, *rec.streams]
+        for a in attrs:
+            if a is None or not a.non_resident:
+                continue
+            for lcn, length in a.iter_runs():
+                if lcn != SPARSE_LCN and length > 0:
+                    self._live.append(lcn)
+                    self._live.append(lcn + length)
+
+    def add_deleted(self, rid: int, data: DataAttr) -> None:
+        if data.non_resident:
+            self._deleted[rid] = (data.run_pairs, data.real_size)
+
+    def _merged_live(self) -> Tuple[List[int], List[int]]:
+        p = self._live
+        spans = sorted(zip(p[0::2], p[1::2]))
+        starts: List[int] = []
+        ends: List[int] = []
+        for s, e in spans:
+            if ends and s <= ends[-1]:
+                if e > ends[-1]:
+                    ends[-1] = e
+            else:
+                starts.append(s)
+                ends.append(e)
+        return starts, ends
+
+    def scores(self, bitmap: Optional[bytes], cluster_size: int) -> Dict[int, float]:
+        """record -> % cluster cần cho real_size còn khôi phục được (sparse không tính).
+        bitmap=None (không đọc được $Bitmap): chỉ đối chiếu với runlist của file đang dùng."""
+        need: Dict[int, int] = {}
+        extents: List[Tuple[int, int, int]] = []
+        for rid, (pairs, size) in self._deleted.items():
+            n = -(-size // cluster_size)
+            total = n
+            for lcn, length in zip(pairs[0::2], pairs[1::2]):
+                if n <= 0:
+                    break
+                take = min(length, n)
+                n -= take
+                if lcn == SPARSE_LCN:
+                    total -= take
+                else:
+                    extents.append((lcn, lcn + take, rid))
+            need[rid] = total   # cluster thiếu trong runlist (n > 0 còn lại) tính là mất
+        extents.sort()
+        starts, ends = self._merged_live()
+        good = dict.fromkeys(need, 0)
+        j = 0
+        nlive = len(starts)
+        for s, e, rid in extents:
+            while j < nlive and ends[j] <= s:
+                j += 1
+            free = (e - s) - (_set_bits(bitmap, s, e) if bitmap is not None else 0)
+            k = j
+            while k < nlive and starts[k] < e:
+                a, b = max(s, starts[k]), min(e, ends[k])
+                # cluster trống trong bitmap nhưng nằm trong runlist của file đang dùng
+                free -= (b - a) - (_set_bits(bitmap, a, b) if bitmap is not None else 0)
+                k += 1
+            good[rid] += free
+        return {rid: 100.0 if n <= 0 else round(100.0 * max(0, good[rid]) / n, 1)
+                for rid, n in need.items()}
+
+
+def apply_scores(entries: List[dict], scores: Dict[int, float]) -> None:
+    """Thêm 'recoverable' (%) vào entry của scan_deleted: record MFT không có runlist
+    (resident / rỗng) là 100; entry từ slack $I30 là None (không biết runlist)."""
+    for e in entries:
+        if e.get('source') == 'mft':
+            e['recoverable'] = scores.get(e['record'], 100.0)
+        else:
+            e['recoverable'] = None
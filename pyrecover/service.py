@@ -0,0 +1,497 @@
+"""Service khôi phục chạy lâu dài (asyncio): giữ device và index MFT đã parse giữa các job.
+
+Giao thức: JSON lines qua Unix socket hoặc TCP localhost. Mỗi dòng gửi lên là một request
+    {"op": "scan", "image": "/evidence/disk.img", "min_size": 1024, "paths": true, "min_recoverable": 50}
+    {"op": "scan", "image": "...", "extensions": ["docx", "xlsx"], "path_prefix": "Users/an/Documents"}
+    {"op": "export", "image": "...", "record": 1234, "out": "case7/1234.bin"}
+    {"op": "carve", "image": "...", "start": 0, "end": null, "align": 512}
+    {"op": "status"} | {"op": "cancel", "job": 7} | {"op": "watch", "job": 7} | {"op": "close", "image": "..."}
+Mọi request phải có "token": token ngẫu nhiên của lần chạy service, ghi vào file chỉ chủ sở
+hữu đọc được (0600, xem default_token_path; call() tự đọc). Request sai token hoặc dòng không
+phải JSON object: service trả lỗi rồi đóng kết nối (một trang web gửi HTTP POST tới cổng
+localhost không chạy được job nào). "out" của export là đường dẫn bên trong export root
+(--export-root); không có export root thì export bị từ chối.
+Job (scan/export/carve) trả về luồng event cùng "job": id — queued, started, progress..., rồi
+done (kèm "result") / error / cancelled. Gửi "wait": false để chỉ nhận event queued.
+"tag" trong request (nếu có) được lặp lại trong mọi event để client ghép cặp.
+
+Mỗi image có một pool thread chạy tối đa JOBS_PER_VOLUME job cùng lúc; mọi lần đọc của các
+job đó đi qua một IoScheduler (core.iosched) sắp xếp/gộp theo offset vật lý, nên job chạy song
+song không làm đầu đọc nhảy qua lại trên cùng đĩa. Job trên các image khác nhau độc lập.
+"""
+from __future__ import annotations
+import asyncio, hashlib, hmac, itertools, json, os, secrets, socket, sys, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from .core.constants import SORT_KEYS
+from .core.device import open_device
+from .core.iosched import IoScheduler, ScheduledDevice
+from .core.stats import ScanStats, instrument
+from .core.utils import parse_date_arg
+from .fs.ntfs.boot import parse_boot_sector
+from .fs.ntfs.mft import iter_mft_records, read_mft_record, RecordSummary
+from .scan.filters import ScanFilter
+from .scan.metadata_scan import record_entry, sort_key, recoverable_enough
+from .scan.recoverability import ClusterUsage, apply_scores, read_bitmap
+from .scan.paths import PathBuilder
+from .recover.export import export_data
+from .carve.scanner import scan_signatures
+
+DEFAULT_LISTEN = '127.0.0.1:8765'
+JOB_OPS = ('scan', 'export', 'carve')
+KEEP_FINISHED = 1000
+JOBS_PER_VOLUME = 4
+PROGRESS_RECORDS = 20000
+CARVE_WINDOW = 256 * 1024 * 1024
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: int
+    op: str
+    params: Dict[str, Any]
+    state: str = 'queued'   # queued / running / done / error / cancelled
+    cancelled: bool = False
+    result: Any = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    listeners: List[asyncio.Queue] = field(default_factory=list)
+
+    def info(self) -> Dict[str, Any]:
+        return {'job': self.id, 'op': self.op, 'state': self.state, 'image': self.params.get('image'),
+                'created': self.created, 'started': self.started, 'finished': self.finished}
+
+
+class Volume:
+    """Image/ổ đĩa đang mở cùng cache MFT. Job đọc qua self.dev (ScheduledDevice);
+    self.stats chỉ đo lần đọc vật lý (thread dispatcher) và lần dựng index (có khóa)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.stats = ScanStats()
+        self.raw = instrument(open_device(path), self.stats)
+        self.boot = parse_boot_sector(self.raw.read(0, 512))
+        self.sched = IoScheduler(self.raw)
+        self.dev = ScheduledDevice(self.sched)
+        self.executor = ThreadPoolExecutor(max_workers=JOBS_PER_VOLUME, thread_name_prefix='pyrecover-job')
+        self.pending = 0
+        self._index_lock = threading.Lock()
+        # (summary theo record, [(record, entry) đã xóa]) — thay cả cặp một lần khi refresh
+        self.index: Optional[Tuple[Dict[int, RecordSummary], List[Tuple[int, Dict[str, Any]]]]] = None
+
+    def load_index(self, progress: Callable[[Dict[str, Any]], None], refresh: bool = False) -> bool:
+        """Duyệt MFT một lần, giữ summary (để dựng path) và entry của record đã xóa (kèm
+        'recoverable', xem scan.recoverability). Trả False nếu đã có sẵn trong cache."""
+        with self._index_lock:
+            if self.index is not None and not refresh:
+                return False
+            return self._load_index(progress)
+
+    def _load_index(self, progress: Callable[[Dict[str, Any]], None]) -> bool:
+        summaries: Dict[int, RecordSummary] = {}
+        deleted: List[Tuple[int, Dict[str, Any]]] = []
+        usage = ClusterUsage()
+        n = 0
+        for rid, rec in iter_mft_records(self.dev, self.boot, stats=self.stats):
+            summaries[rid] = rec.summary()
+            if rec.in_use:
+                usage.add_live(rec)
+            elif rec.fn is not None and rec.data is not None:
+                usage.add_deleted(rid, rec.data)
+                deleted.append((rid, record_entry(rid, rec)))
+            n += 1
+            if n % PROGRESS_RECORDS == 0:
+                progress({'stage': 'mft', 'records': n})
+        progress({'stage': 'recoverability', 'records': n})
+        scores = usage.scores(read_bitmap(self.dev, self.boot), self.boot.cluster_size)
+        apply_scores([e for _, e in deleted], scores)
+        self.index = (summaries, deleted)
+        return True
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.sched.close()
+        self.raw.close()
+
+
+def default_token_path(listen: str) -> str:
+    """File token của service nghe ở `listen` (mỗi địa chỉ một file)."""
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.pyrecover')
+    digest = hashlib.sha1(listen.encode()).hexdigest()[:12]
+    return os.path.join(base, 'PyRecover', f"service-{digest}.token")
+
+
+def write_token(path: str) -> str:
+    """Sinh token mới và ghi vào path với quyền 0600; trả token."""
+    token = secrets.token_urlsafe(32)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='ascii') as f:
+        os.chmod(path, 0o600)   # file có từ trước giữ quyền cũ khi mở
+        f.write(token + '\n')
+    return token
+
+
+def resolve_export_path(root: Optional[str], out: str) -> str:
+    """Đường dẫn thật của `out` (tương đối: tính từ root); ValueError nếu không có export root
+    hoặc out (sau khi giải symlink / '..') nằm ngoài root."""
+    if not root:
+        raise ValueError("export is disabled (start the service with --export-root)")
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, out))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"'out' must be a file under the export root {root}")
+    return path
+
+
+# ---- job chạy trên thread của volume -------------------------------------------
+
+def _job_scan(vol: Volume, p: Dict[str, Any], progress) -> Any:
+    t0 = time.perf_counter()
+    loaded = vol.load_index(progress, refresh=bool(p.get('refresh')))
+    dates = [parse_date_arg(v) if isinstance(v, str) else v
+             for v in (p.get('modified_after'), p.get('modified_before'))]
+    keep = ScanFilter(name_contains=p.get('name_contains'), extensions=p.get('extensions') or (),
+                      name_glob=p.get('name_glob'), name_regex=p.get('name_regex'),
+                      min_size=p.get('min_size'), max_size=p.get('max_size'),
+                      modified_after=dates[0], modified_before=dates[1], path_prefix=p.get('path_prefix'))
+    min_rec = p.get('min_recoverable')
+    sums, deleted = vol.index
+    pb = PathBuilder(sums) if p.get('paths') or keep.filters_paths else None
+    rows = []
+    for rid, entry in deleted:
+        s = sums[rid]
+        if keep(s.name, s.size, s.modified) and (min_rec is None or recoverable_enough(entry, float(min_rec))) \
+                and (not keep.filters_paths or keep.by_path(pb.path(rid))):
+            rows.append((rid, s, entry))
+    sort_by = p.get('sort')
+    if sort_by:
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {SORT_KEYS}")
+        rows.sort(key=lambda r: sort_key(sort_by, r[0], r[1]))
+    limit = p.get('limit')
+    if limit is not None:
+        rows = rows[:int(limit)]
+    items = [e for _, _, e in rows]
+    if p.get('paths'):
+        items = [{**e, 'path': pb.path(rid)} for (rid, _, _), e in zip(rows, items)]
+    return {'items': items, 'cached': not loaded, 'seconds': round(time.perf_counter() - t0, 4)}
+
+
+def _job_export(vol: Volume, p: Dict[str, Any], progress) -> Any:
+    rid = int(p['record'])
+    out = p['out']
+    try:
+        rec = read_mft_record(vol.dev, vol.boot, rid)
+    except (ValueError, IOError):
+        rec = None
+    if rec is None:
+        raise RuntimeError(f"Record {rid} not found")
+    total = rec.data.real_size if rec.data else 0
+    n = export_data(vol.dev, vol.boot, rec, out,
+                    progress=lambda done: progress({'bytes': done, 'total': total}))
+    return {'record': rid, 'out': out, 'bytes': n}
+
+
+def _job_carve(vol: Volume, p: Dict[str, Any], progress) -> Any:
+    start = int(p.get('start') or 0)
+    end = p.get('end')
+    if end is None:
+        end = getattr(vol.dev, 'size', None) or vol.boot.total_sectors * vol.boot.bytes_per_sector
+    align = int(p.get('align') or 512)
+    hits = []
+    pos = start
+    # chia thành cửa sổ lớn để báo tiến độ / cho phép hủy giữa chừng
+    while pos < end:
+        stop = min(end, pos + CARVE_WINDOW)
+        hits.extend({'offset': off, 'kind': kind} for off, kind in scan_signatures(vol.dev, pos, stop, align))
+        pos = stop
+        progress({'offset': pos, 'end': end, 'hits': len(hits)})
+    return {'items': hits}
+
+
+JOBS: Dict[str, Callable] = {'scan': _job_scan, 'export': _job_export, 'carve': _job_carve}
+
+
+# ---- service -------------------------------------------------------------------
+
+class RecoveryService:
+    """token: bắt buộc trong mọi request; export_root: thư mục duy nhất export được ghi vào."""
+
+    def __init__(self, token: str, export_root: Optional[str] = None) -> None:
+        self.token = token
+        self.export_root = export_root
+        self.volumes: Dict[str, Volume] = {}
+        self.jobs: 'OrderedDict[int, Job]' = OrderedDict()
+        self._ids = itertools.count(1)
+        self._open_lock = asyncio.Lock()
+
+    async def volume(self, image: str) -> Volume:
+        key = os.path.abspath(image) if os.path.exists(image) else image
+        async with self._open_lock:
+            vol = self.volumes.get(key)
+            if vol is None:
+                vol = await asyncio.get_running_loop().run_in_executor(None, Volume, image)
+                self.volumes[key] = vol
+            return vol
+
+    def _publish(self, job: Job, event: Dict[str, Any]) -> None:
+        event = {'job': job.id, **event}
+        if 'tag' in job.params:
+            event['tag'] = job.params['tag']
+        for q in job.listeners:
+            q.put_nowait(event)
+
+    def submit(self, op: str, params: Dict[str, Any]) -> Job:
+        if op not in JOBS:
+            raise ValueError(f"unknown op {op!r}")
+        if not params.get('image'):
+            raise ValueError("'image' is required")
+        if op == 'export':
+            params = dict(params, out=resolve_export_path(self.export_root, str(params['out'])))
+        job = Job(next(self._ids), op, params)
+        self.jobs[job.id] = job
+        while len(self.jobs) > KEEP_FINISHED:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.state in ('queued', 'running'):
+                break
+            self.jobs.popitem(last=False)
+        asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    async def _run(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        self._publish(job, {'event': 'queued'})
+        try:
+            vol = await self.volume(job.params['image'])
+        except Exception as e:
+            self._finish(job, 'error', error=f"open failed: {e}")
+            return
+        vol.pending += 1
+
+        def progress(info: Dict[str, Any]) -> None:
+            if job.cancelled:
+                raise JobCancelled()
+            loop.call_soon_threadsafe(self._publish, job, {'event': 'progress', **info})
+
+        def work() -> Any:
+            if job.cancelled:
+                raise JobCancelled()
+            loop.call_soon_threadsafe(self._started, job)
+            return JOBS[job.op](vol, job.params, progress)
+
+        try:
+            result = await loop.run_in_executor(vol.executor, work)
+        except JobCancelled:
+            self._finish(job, 'cancelled')
+        except Exception as e:
+            self._finish(job, 'error', error=f"{type(e).__name__}: {e}")
+        else:
+            self._finish(job, 'done', result=result)
+        finally:
+            vol.pending -= 1
+
+    def _started(self, job: Job) -> None:
+        job.state = 'running'
+        job.started = time.time()
+        self._publish(job, {'event': 'started'})
+
+    def _finish(self, job: Job, state: str, result: Any = None, error: str | None = None) -> None:
+        job.state, job.result, job.error, job.finished = state, result, error, time.time()
+        ev: Dict[str, Any] = {'event': state}
+        if state == 'done':
+            ev['result'] = result
+        elif error:
+            ev['error'] = error
+        self._publish(job, ev)
+        job.listeners.clear()
+
+    def cancel(self, job_id: int) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.state not in ('queued', 'running'):
+            return False
+        job.cancelled = True
+        return True
+
+    async def close_volume(self, image: str) -> bool:
+        key = os.path.abspath(image) if os.path.exists(image) else image
+        vol = self.volumes.pop(key, None)
+        if vol is None:
+            return False
+        await asyncio.get_running_loop().run_in_executor(None, vol.close)
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'volumes': [{'image': k, 'pending': v.pending, 'io': v.sched.snapshot(),
+                         'records_cached': len(v.index[0]) if v.index is not None else None,
+                         'stats': v.stats.snapshot()} for k, v in self.volumes.items()],
+            'jobs': [j.info() for j in self.jobs.values() if j.state in ('queued', 'running')],
+        }
+
+    # ---- kết nối client ----
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        lock = asyncio.Lock()
+        forwarders = set()
+
+        async def send(obj: Dict[str, Any]) -> None:
+            data = (json.dumps(obj, ensure_ascii=False) + '\n').encode('utf-8')
+            async with lock:
+                writer.write(data)
+                await writer.drain()
+
+        async def forward(q: asyncio.Queue) -> None:
+            while True:
+                ev = await q.get()
+                await send(ev)
+                if ev['event'] in ('done', 'error', 'cancelled'):
+                    return
+
+        def subscribe(job: Job) -> None:
+            q: asyncio.Queue = asyncio.Queue()
+            job.listeners.append(q)
+            t = asyncio.get_running_loop().create_task(forward(q))
+            forwarders.add(t)
+            t.add_done_callback(forwarders.discard)
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # dòng không phải JSON object (vd. header HTTP) / sai token: trả lỗi rồi đóng kết nối
+                try:
+                    req = json.loads(line)
+                except ValueError as e:
+                    await send({'error': f"bad request: {e}"})
+                    break
+                if not isinstance(req, dict):
+                    await send({'error': "bad request: expected a JSON object"})
+                    break
+                token = req.get('token')
+                if not isinstance(token, str) or not hmac.compare_digest(token, self.token):
+                    await send({'error': "unauthorized"})
+                    break
+                try:
+                    op = req.get('op')
+                    if op in JOB_OPS:
+                        job = self.submit(op, req)
+                        if req.get('wait', True):
+                            subscribe(job)   # đăng ký trước khi task của job kịp phát 'queued'
+                        else:
+                            await send({'job': job.id, 'event': 'queued', **({'tag': req['tag']} if 'tag' in req else {})})
+                    elif op == 'watch':
+                        job = self.jobs.get(int(req['job']))
+                        if job is None:
+                            await send({'error': f"no such job {req['job']}"})
+                        elif job.state in ('queued', 'running'):
+                            subscribe(job)
+                        else:
+                            await send({'job': job.id, 'event': job.state, 'result': job.result, 'error': job.error})
+                    elif op == 'cancel':
+                        await send({'job': req.get('job'), 'cancelling': self.cancel(int(req['job']))})
+                    elif op == 'status':
+                        await send(self.status())
+                    elif op == 'close':
+                        await send({'image': req.get('image'), 'closed': await self.close_volume(req['image'])})
+                    elif op == 'ping':
+                        await send({'pong': True})
+                    else:
+                        await send({'error': f"unknown op {op!r}"})
+                except (ValueError, KeyError, TypeError) as e:
+                    await send({'error': f"bad request: {e}"})
+            if forwarders:
+                await asyncio.gather(*forwarders, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for t in forwarders:
+                t.cancel()
+            writer.close()
+
+    async def shutdown(self) -> None:
+        for key in list(self.volumes):
+            await self.close_volume(key)
+
+
+def _parse_listen(listen: str) -> Tuple[str, Any]:
+    if listen.startswith('unix:'):
+        return 'unix', listen[5:]
+    host, _, port = listen.rpartition(':')
+    host = host.strip('[]') or '127.0.0.1'
+    if host not in ('127.0.0.1', 'localhost', '::1'):
+        # JSON lines không mã hóa (không TLS): token đi qua mạng ở dạng rõ nên chỉ cho phép
+        # nghe trên loopback
+        raise ValueError(f"refusing to listen on non-loopback address {host!r}")
+    return 'tcp', (host, int(port))
+
+
+async def serve(listen: str = DEFAULT_LISTEN, token_file: Optional[str] = None,
+                export_root: Optional[str] = None) -> None:
+    """token_file: nơi ghi token của lần chạy này (mặc định default_token_path(listen)), bị
+    xóa khi dừng. export_root: thư mục cho job export (None: không cho export)."""
+    kind, addr = _parse_listen(listen)
+    token_file = token_file or default_token_path(listen)
+    svc = RecoveryService(write_token(token_file), export_root)
+    if kind == 'unix':
+        if os.path.exists(addr):
+            os.unlink(addr)
+        old = os.umask(0o177)   # socket tạo ra đã là 0600, không có lúc nào người khác kết nối được
+        try:
+            server = await asyncio.start_unix_server(svc.handle, path=addr, limit=1 << 20)
+        finally:
+            os.umask(old)
+        os.chmod(addr, 0o600)
+    else:
+        server = await asyncio.start_server(svc.handle, addr[0], addr[1], limit=1 << 20)
+    print(f"pyrecover service listening on {listen} (token in {token_file})", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await svc.shutdown()
+        try:
+            os.remove(token_file)
+        except OSError:
+            pass
+
+
+def call(request: Dict[str, Any], listen: str = DEFAULT_LISTEN, timeout: float | None = None,
+         token: Optional[str] = None, token_file: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Client đồng bộ cho script: gửi một request, trả từng event cho tới khi job kết thúc
+    (hoặc một dòng trả lời với op không phải job). token: mặc định đọc từ token_file
+    (mặc định default_token_path(listen))."""
+    kind, addr = _parse_listen(listen)
+    if token is None:
+        with open(token_file or default_token_path(listen), encoding='ascii') as f:
+            token = f.read().strip()
+    request = dict(request, token=token)
+    if kind == 'unix':
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET6 if ':' in addr[0] else socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    with sock:
+        sock.connect(addr)
+        sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        with sock.makefile('r', encoding='utf-8') as f:
+            for line in f:
+                ev = json.loads(line)
+                yield ev
+                if request.get('op') not in JOB_OPS or not request.get('wait', True):
+                    return
+                if ev.get('event') in ('done', 'error', 'cancelled') or 'job' not in ev:
+                    return
+
+
+if __name__ == '__main__':
+    asyncio.run(serve(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LISTEN))